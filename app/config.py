@@ -10,11 +10,105 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Authenticated principal cache settings
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+    PRINCIPAL_CACHE_TTL_SECONDS: float = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    
+    # Password hashing pool settings (0 workers hashes inline)
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+    PASSWORD_HASH_QUEUE_DEPTH: int = int(os.getenv("PASSWORD_HASH_QUEUE_DEPTH", "64"))
+    
     # Database settings
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./airline.db")
+    # Defaults to DATABASE_URL with its async driver (aiosqlite, asyncpg)
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")
+    # "default" keeps driver defaults, "production" applies the pool and pragma settings below
+    DATABASE_PROFILE: str = os.getenv("DATABASE_PROFILE", "default")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    # Negative values are KiB, as in PRAGMA cache_size
+    SQLITE_CACHE_SIZE: int = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    # Connections for async endpoints on SQLite. 1 runs their database work in
+    # order; more let reads overlap under WAL (the production profile), but
+    # colliding writes then wait on the busy timeout and may fail
+    ASYNC_SQLITE_POOL_SIZE: int = int(os.getenv("ASYNC_SQLITE_POOL_SIZE", "1"))
+    
+    # Payment gateway settings (the in-process mock is used unless PAYMENT_GATEWAY_MOCK=false)
+    PAYMENT_GATEWAY_MOCK: bool = os.getenv("PAYMENT_GATEWAY_MOCK", "true").lower() == "true"
+    PAYMENT_GATEWAY_URL: str = os.getenv("PAYMENT_GATEWAY_URL", "https://mock-payment-gateway.example.com/api/v1/process")
+    PAYMENT_GATEWAY_REFUND_URL: str = os.getenv("PAYMENT_GATEWAY_REFUND_URL", "https://mock-payment-gateway.example.com/api/v1/refund")
+    PAYMENT_API_KEY: str = os.getenv("PAYMENT_API_KEY", "mock-payment-api-key")
+    PAYMENT_GATEWAY_TIMEOUT_SECONDS: float = float(os.getenv("PAYMENT_GATEWAY_TIMEOUT_SECONDS", "10"))
+    PAYMENT_GATEWAY_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("PAYMENT_GATEWAY_CONNECT_TIMEOUT_SECONDS", "2"))
+    PAYMENT_GATEWAY_MAX_CONCURRENCY: int = int(os.getenv("PAYMENT_GATEWAY_MAX_CONCURRENCY", "50"))
+    PAYMENT_GATEWAY_MAX_RETRIES: int = int(os.getenv("PAYMENT_GATEWAY_MAX_RETRIES", "2"))
+    PAYMENT_GATEWAY_RETRY_BACKOFF_SECONDS: float = float(os.getenv("PAYMENT_GATEWAY_RETRY_BACKOFF_SECONDS", "0.2"))
+    PAYMENT_GATEWAY_BREAKER_THRESHOLD: int = int(os.getenv("PAYMENT_GATEWAY_BREAKER_THRESHOLD", "5"))
+    PAYMENT_GATEWAY_BREAKER_RESET_SECONDS: float = float(os.getenv("PAYMENT_GATEWAY_BREAKER_RESET_SECONDS", "30"))
+    
+    # Unpaid booking holds: PENDING bookings older than this are cancelled by the sweeper
+    BOOKING_HOLD_MINUTES: int = int(os.getenv("BOOKING_HOLD_MINUTES", "15"))
+    HOLD_SWEEPER_ENABLED: bool = os.getenv("HOLD_SWEEPER_ENABLED", "true").lower() == "true"
+    HOLD_SWEEP_INTERVAL_SECONDS: float = float(os.getenv("HOLD_SWEEP_INTERVAL_SECONDS", "60"))
+    HOLD_SWEEP_BATCH_SIZE: int = int(os.getenv("HOLD_SWEEP_BATCH_SIZE", "500"))
+    HOLD_SWEEP_MAX_BATCHES: int = int(os.getenv("HOLD_SWEEP_MAX_BATCHES", "100"))
+    # Time for a payment already at the gateway to finish after its hold expires
+    HOLD_SWEEP_GRACE_SECONDS: int = int(os.getenv("HOLD_SWEEP_GRACE_SECONDS", "60"))
+    
+    # Idempotency-Key settings for booking and payment retries
+    IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_CACHE_SIZE: int = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "100000"))
+    IDEMPOTENCY_WAIT_SECONDS: float = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+    
+    # Response compression settings (GZIP_MINIMUM_SIZE=0 turns gzip off)
+    GZIP_MINIMUM_SIZE: int = int(os.getenv("GZIP_MINIMUM_SIZE", "4096"))
+    GZIP_COMPRESS_LEVEL: int = int(os.getenv("GZIP_COMPRESS_LEVEL", "5"))
+    
+    # Metrics settings
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    
+    # Profiling settings (PROFILING_ENABLED=false leaves the middleware out entirely,
+    # so an admin's X-Profile header does nothing unless it is set)
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILE_SAMPLE_RATE: float = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    PROFILE_SLOW_SECONDS: float = float(os.getenv("PROFILE_SLOW_SECONDS", "0"))
+    # Share of requests watched for PROFILE_SLOW_SECONDS; profiling every one costs too much
+    PROFILE_SLOW_SAMPLE_RATE: float = float(os.getenv("PROFILE_SLOW_SAMPLE_RATE", "0.05"))
+    PROFILE_INTERVAL_SECONDS: float = float(os.getenv("PROFILE_INTERVAL_SECONDS", "0.005"))
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "./profiles")
+    PROFILE_MAX_FILES: int = int(os.getenv("PROFILE_MAX_FILES", "50"))
+    
+    # Flight catalog conditional GET settings
+    CATALOG_CACHE_CONTROL: str = os.getenv("CATALOG_CACHE_CONTROL", "public, no-cache")
+    
+    # Seat map settings
+    DEFAULT_CABIN_LAYOUT: str = os.getenv("DEFAULT_CABIN_LAYOUT", "ABC-DEF")
+    
+    # Group booking settings
+    GROUP_BOOKING_MAX_SEATS: int = int(os.getenv("GROUP_BOOKING_MAX_SEATS", "500"))
+    
+    # Flight search cache settings
+    SEARCH_CACHE_SIZE: int = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))
+    SEARCH_CACHE_TTL_SECONDS: float = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "60"))
+    
+    # E-ticket cache settings
+    E_TICKET_CACHE_SIZE: int = int(os.getenv("E_TICKET_CACHE_SIZE", "50000"))
+    E_TICKET_CACHE_TTL_SECONDS: float = float(os.getenv("E_TICKET_CACHE_TTL_SECONDS", "3600"))
+    
+    # Connection search settings
+    MIN_CONNECTION_MINUTES: int = int(os.getenv("MIN_CONNECTION_MINUTES", "45"))
+    MAX_LAYOVER_HOURS: int = int(os.getenv("MAX_LAYOVER_HOURS", "12"))
+    ROUTE_GRAPH_REFRESH_SECONDS: float = float(os.getenv("ROUTE_GRAPH_REFRESH_SECONDS", "300"))
+    
+    # Dashboard counter settings
+    STATS_COUNTER_SHARDS: int = int(os.getenv("STATS_COUNTER_SHARDS", "8"))
     
-    # Payment gateway mock settings
-    PAYMENT_GATEWAY_URL: str = "https://mock-payment-gateway.example.com/api/v1/process"
-    PAYMENT_API_KEY: str = "mock-payment-api-key"
+    # Popular routes tracker settings
+    POPULAR_ROUTES_REFRESH_SECONDS: float = float(os.getenv("POPULAR_ROUTES_REFRESH_SECONDS", "30"))
+    POPULAR_ROUTES_MAX_WINDOW_HOURS: int = int(os.getenv("POPULAR_ROUTES_MAX_WINDOW_HOURS", "168"))
 
 settings = Settings()
\ No newline at end of file
@@ -1,14 +1,122 @@
-from sqlalchemy import create_engine
+import threading
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
 
+# Async drivers for the backends we run on
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+
+def async_database_url(url: str) -> str:
+    # sqlite:///./airline.db -> sqlite+aiosqlite:///./airline.db
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.get_backend_name()}, set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+PROFILES = ("default", "production")
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+def engine_options(url: str, profile: str) -> dict:
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown DATABASE_PROFILE {profile!r}, expected one of {', '.join(PROFILES)}")
+    if is_sqlite(url):
+        # Tuning for SQLite happens in the connect pragmas below
+        return {}
+    if profile == "default":
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    }
+
+def sqlite_pragmas() -> dict:
+    # WAL lets readers proceed while a write is in progress; NORMAL only
+    # syncs at checkpoints, which is still safe against corruption in WAL mode
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+    }
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: dict):
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def create_db_engine(url: str, profile: str = settings.DATABASE_PROFILE) -> Engine:
+    options = engine_options(url, profile)
+    if is_sqlite(url):
+        options["connect_args"] = {"check_same_thread": False}
+    db_engine = create_engine(url, **options)
+    if is_sqlite(url) and profile == "production":
+        apply_sqlite_pragmas(db_engine, sqlite_pragmas())
+    return db_engine
+
+def create_async_db_engine(url: str, profile: str = settings.DATABASE_PROFILE):
+    if is_sqlite(url):
+        # SQLite has a single writer: by default async sessions queue for one
+        # connection in order instead of racing for the file lock and timing
+        # out. The routes commit before gateway calls and password hashing, so
+        # the connection is only held for database work
+        options = {"poolclass": AsyncAdaptedQueuePool, "pool_size": settings.ASYNC_SQLITE_POOL_SIZE, "max_overflow": 0}
+    else:
+        options = engine_options(url, profile)
+    db_engine = create_async_engine(url, **options)
+    if is_sqlite(url) and profile == "production":
+        apply_sqlite_pragmas(db_engine.sync_engine, sqlite_pragmas())
+    return db_engine
+
 # Create SQLAlchemy engine
-engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False})
+engine = create_db_engine(settings.DATABASE_URL)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine on the same database, for async def endpoints. It is created
+# on first use, so the app imports without the async driver installed
+_async_engine = None
+_async_sessionmaker = None
+_async_engine_lock = threading.Lock()
+
+def get_async_engine():
+    global _async_engine, _async_sessionmaker
+    with _async_engine_lock:
+        if _async_engine is None:
+            url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+            try:
+                async_engine = create_async_db_engine(url)
+            except ImportError as e:
+                raise RuntimeError(
+                    f"The async driver for {make_url(url).drivername} is not installed ({e}); "
+                    "install it or set ASYNC_DATABASE_URL"
+                ) from e
+            _async_engine = async_engine
+            # Objects stay loaded after commit: async sessions cannot lazy-load expired attributes
+            _async_sessionmaker = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+async def dispose_async_engine():
+    if _async_engine is not None:
+        await _async_engine.dispose()
+
 # Create Base class
 Base = declarative_base()
 
@@ -18,4 +126,10 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Async database dependency
+async def get_async_db():
+    get_async_engine()
+    async with _async_sessionmaker() as db:
+        yield db
\ No newline at end of file
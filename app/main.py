@@ -1,11 +1,20 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
 import logging
 import time
 
-from app.database import engine, Base
+from app.config import settings
+from app.database import SessionLocal, dispose_async_engine, engine, Base
 from app.routes import api_router
+from app.services.hold_sweeper import hold_sweeper
+from app.services.password_hasher import password_hasher
+from app.services.payment_gateway import payment_gateway
+from app.utils.idempotency import IdempotencyMiddleware
+from app.utils.metrics import METRICS_MEDIA_TYPE, request_metrics, route_template
+from app.utils.profiling import ProfilingMiddleware, profile_store, stack_sampler
+from app.utils.query_counter import QUERY_COUNT_HEADER, count_queries
 
 # Configure logging
 logging.basicConfig(
@@ -25,7 +34,8 @@ Base.metadata.create_all(bind=engine)
 app = FastAPI(
     title="Airline Reservation System API",
     description="API for an airline reservation system",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -37,13 +47,81 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Request logging middleware
+# Retried booking and payment requests with an Idempotency-Key get the first response back
+app.add_middleware(
+    IdempotencyMiddleware,
+    paths=[
+        r"/api/bookings/",
+        r"/api/bookings/\d+/payment",
+        r"/api/bookings/group",
+        r"/api/bookings/group/[^/]+/payment",
+    ]
+)
+
+# Sampled, slow or admin-requested (X-Profile: true) requests are profiled;
+# when disabled the middleware is not installed at all, and the header is ignored
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        sampler=stack_sampler,
+        store=profile_store,
+        sample_rate=settings.PROFILE_SAMPLE_RATE,
+        slow_seconds=settings.PROFILE_SLOW_SECONDS,
+        slow_sample_rate=settings.PROFILE_SLOW_SAMPLE_RATE
+    )
+
+# Compress large responses for clients that accept gzip; outermost, so
+# idempotent replays are stored uncompressed
+if settings.GZIP_MINIMUM_SIZE:
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=settings.GZIP_MINIMUM_SIZE,
+        compresslevel=settings.GZIP_COMPRESS_LEVEL
+    )
+
+@app.on_event("startup")
+def start_password_hasher():
+    password_hasher.start()
+
+@app.on_event("shutdown")
+def stop_password_hasher():
+    password_hasher.shutdown()
+
+@app.on_event("startup")
+async def start_hold_sweeper():
+    if settings.HOLD_SWEEPER_ENABLED:
+        hold_sweeper.start(SessionLocal)
+
+@app.on_event("shutdown")
+async def stop_hold_sweeper():
+    await hold_sweeper.stop()
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    await dispose_async_engine()
+
+@app.on_event("shutdown")
+async def close_payment_gateway():
+    await payment_gateway.aclose()
+
+# Request logging and metrics middleware
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    logger.info(f"{request.method} {request.url.path} - {process_time:.4f}s")
+    start_time = time.perf_counter()
+    # An exception escaping the app is answered 500 by the error handler
+    status_code = 500
+    with count_queries() as queries, request_metrics.track(request.method):
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+        finally:
+            process_time = time.perf_counter() - start_time
+            request_metrics.observe(
+                request.method, route_template(request.scope), status_code,
+                process_time, queries.count, queries.seconds
+            )
+    response.headers[QUERY_COUNT_HEADER] = str(queries.count)
+    logger.info(f"{request.method} {request.url.path} - {process_time:.4f}s - {queries.count} queries")
     return response
 
 # Error handler for unhandled exceptions
@@ -67,6 +145,12 @@ def read_root():
         "redoc_url": "/redoc"
     }
 
+# Prometheus scrape endpoint; keep it off the public network
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return PlainTextResponse(request_metrics.render(), media_type=METRICS_MEDIA_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -1,3 +1,8 @@
 from app.models.user import User, UserRole
 from app.models.flight import Flight
-from app.models.booking import Booking, BookingStatus, PaymentStatus
\ No newline at end of file
+from app.models.booking import Booking, BookingStatus, PaymentStatus
+from app.models.seat_map import SeatMap
+from app.models.stats import StatCounter
+from app.models.revenue import DailyRevenue
+from app.models.route_stats import RouteStat, RouteHourlyStat
+from app.models.catalog_version import CatalogVersion
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 import enum
@@ -17,12 +17,18 @@ class PaymentStatus(enum.Enum):
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        # Expired unpaid holds, found by the hold sweeper
+        Index("ix_bookings_status_booking_date", "status", "booking_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     booking_reference = Column(String, unique=True, index=True)
+    # Shared by all bookings made together through POST /bookings/group
+    group_reference = Column(String, nullable=True, index=True)
     passenger_id = Column(Integer, ForeignKey("users.id"))
-    flight_id = Column(Integer, ForeignKey("flights.id"))
-    booking_date = Column(DateTime, default=datetime.utcnow)
+    flight_id = Column(Integer, ForeignKey("flights.id"), index=True)
+    booking_date = Column(DateTime, default=datetime.utcnow, index=True)
     seat_number = Column(String)
     status = Column(Enum(BookingStatus), default=BookingStatus.PENDING)
     payment_status = Column(Enum(PaymentStatus), default=PaymentStatus.PENDING)
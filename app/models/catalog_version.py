@@ -0,0 +1,12 @@
+from sqlalchemy import Column, DateTime, Integer
+from app.database import Base
+
+class CatalogVersion(Base):
+    __tablename__ = "catalog_versions"
+    
+    # The catalog version is the sum of the shards' versions and was last
+    # changed at the latest updated_at; writers pick a random shard, as for
+    # StatCounter, so bookings do not serialize on a single row
+    shard = Column(Integer, primary_key=True, default=0)
+    version = Column(Integer, default=0)
+    updated_at = Column(DateTime)
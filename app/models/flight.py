@@ -1,19 +1,24 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class Flight(Base):
     __tablename__ = "flights"
+    __table_args__ = (
+        # Route + time lookups used by flight search
+        Index("ix_flights_route_departure", "departure_city", "arrival_city", "departure_time"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     flight_number = Column(String, unique=True, index=True)
     airline = Column(String)
     departure_city = Column(String)
     arrival_city = Column(String)
-    departure_time = Column(DateTime)
+    departure_time = Column(DateTime, index=True)
     arrival_time = Column(DateTime)
     price = Column(Float)
     available_seats = Column(Integer)
     is_active = Column(Boolean, default=True)
     
-    bookings = relationship("Booking", back_populates="flight")
\ No newline at end of file
+    bookings = relationship("Booking", back_populates="flight")
+    seat_map = relationship("SeatMap", back_populates="flight", uselist=False)
\ No newline at end of file
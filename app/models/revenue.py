@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, Float, Date, UniqueConstraint
+from app.database import Base
+
+class DailyRevenue(Base):
+    __tablename__ = "daily_revenue"
+    __table_args__ = (
+        UniqueConstraint("date", "departure_city", "arrival_city", "airline", name="uq_daily_revenue_bucket"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    # Booking date of the paid bookings in this bucket
+    date = Column(Date, index=True)
+    departure_city = Column(String)
+    arrival_city = Column(String)
+    airline = Column(String)
+    revenue = Column(Float, default=0.0)
+    bookings = Column(Integer, default=0)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+from app.database import Base
+
+class RouteStat(Base):
+    __tablename__ = "route_stats"
+    
+    # All-time confirmed bookings per route
+    departure_city = Column(String, primary_key=True)
+    arrival_city = Column(String, primary_key=True)
+    bookings = Column(Integer, default=0)
+
+class RouteHourlyStat(Base):
+    __tablename__ = "route_hourly_stats"
+    __table_args__ = (
+        UniqueConstraint("hour", "departure_city", "arrival_city", name="uq_route_hourly_bucket"),
+    )
+    
+    # Confirmed bookings per route, bucketed by the hour they were booked
+    id = Column(Integer, primary_key=True, index=True)
+    hour = Column(DateTime, index=True)
+    departure_city = Column(String)
+    arrival_city = Column(String)
+    bookings = Column(Integer, default=0)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, LargeBinary, ForeignKey
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+class SeatMap(Base):
+    __tablename__ = "seat_maps"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    flight_id = Column(Integer, ForeignKey("flights.id"), unique=True, index=True)
+    rows = Column(Integer)
+    # Seats on the flight; the last row may be partly filled. Null for maps
+    # where every seat of every row exists
+    seats = Column(Integer, nullable=True)
+    # Seat letters per row, with "-" marking an aisle, e.g. "ABC-DEF"
+    layout = Column(String)
+    # Packed occupied mask, one bit per seat in row-major order
+    occupied = Column(LargeBinary)
+    version = Column(Integer, default=1)
+    
+    flight = relationship("Flight", back_populates="seat_map")
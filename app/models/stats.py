@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String, Float
+from app.database import Base
+
+class StatCounter(Base):
+    __tablename__ = "stat_counters"
+    
+    # A counter is the sum of its shards; writers pick a random shard so hot
+    # counters do not serialize every transaction on a single row
+    name = Column(String, primary_key=True)
+    shard = Column(Integer, primary_key=True, default=0)
+    value = Column(Float, default=0.0)
@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import Dict, List
-from datetime import datetime, timedelta
+from typing import Dict, List, Literal, Optional
+from datetime import date, datetime, timedelta
 
-from app.database import get_db
-from app.models.booking import Booking, BookingStatus, PaymentStatus
-from app.models.flight import Flight
-from app.models.user import User, UserRole
+from app.database import SessionLocal, get_db
+from app.config import settings
+from app.models.user import User
 from app.services.auth import check_admin_access
+from app.services.cache import cache_stats
+from app.services.hold_sweeper import hold_sweeper
+from app.services.payment_gateway import payment_gateway
+from app.services.popular_routes import popular_routes
+from app.services.revenue import daily_revenue, monthly_revenue, weekly_revenue, yearly_revenue
+from app.services.stats import dashboard_stats, reconcile
+from app.utils.profiling import folded, profile_store
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -17,116 +23,148 @@ def get_dashboard_stats(
     db: Session = Depends(get_db),
     current_user: User = Depends(check_admin_access)
 ):
-    # Get total users count
-    total_users = db.query(func.count(User.id)).scalar()
-    passengers_count = db.query(func.count(User.id)).filter(User.role == UserRole.PASSENGER).scalar()
-    staff_count = db.query(func.count(User.id)).filter(User.role == UserRole.STAFF).scalar()
-    
-    # Get flights stats
-    total_flights = db.query(func.count(Flight.id)).scalar()
-    active_flights = db.query(func.count(Flight.id)).filter(Flight.is_active == True).scalar()
-    
-    # Get bookings stats
-    total_bookings = db.query(func.count(Booking.id)).scalar()
-    confirmed_bookings = db.query(func.count(Booking.id)).filter(Booking.status == BookingStatus.CONFIRMED).scalar()
-    pending_bookings = db.query(func.count(Booking.id)).filter(Booking.status == BookingStatus.PENDING).scalar()
-    cancelled_bookings = db.query(func.count(Booking.id)).filter(Booking.status == BookingStatus.CANCELLED).scalar()
-    
-    # Get revenue stats
-    total_revenue = db.query(func.sum(Booking.payment_amount)).filter(
-        Booking.payment_status == PaymentStatus.COMPLETED
-    ).scalar() or 0.0
-    
-    # Get recent booking stats (last 7 days)
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
-    recent_bookings = db.query(func.count(Booking.id)).filter(
-        Booking.booking_date >= seven_days_ago
-    ).scalar()
-    
-    # Compile stats
-    stats = {
-        "user_stats": {
-            "total_users": total_users,
-            "passengers_count": passengers_count,
-            "staff_count": staff_count,
-        },
-        "flight_stats": {
-            "total_flights": total_flights,
-            "active_flights": active_flights,
-        },
-        "booking_stats": {
-            "total_bookings": total_bookings,
-            "confirmed_bookings": confirmed_bookings,
-            "pending_bookings": pending_bookings,
-            "cancelled_bookings": cancelled_bookings,
-            "recent_bookings": recent_bookings,
-        },
-        "financial_stats": {
-            "total_revenue": total_revenue,
-        }
-    }
+    # Counters are maintained by the write paths, so this is a single small read
+    return dashboard_stats(db)
+
+@router.post("/stats/reconcile", response_model=Dict)
+def reconcile_dashboard_stats(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_admin_access)
+):
+    # Recompute the dashboard counters from scratch and report any drift
+    drift = reconcile(db)
+    return {"drifted_counters": len(drift), "drift": drift}
+
+@router.get("/revenue/daily", response_model=List[Dict])
+def get_daily_revenue(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    departure_city: Optional[str] = None,
+    arrival_city: Optional[str] = None,
+    airline: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_admin_access)
+):
+    # Defaults to the last 30 days
+    end_date = end_date or datetime.utcnow().date()
+    start_date = start_date or end_date - timedelta(days=29)
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must not be after end_date"
+        )
     
-    return stats
+    return daily_revenue(
+        db, start_date, end_date,
+        departure_city=departure_city, arrival_city=arrival_city, airline=airline
+    )
+
+@router.get("/revenue/weekly", response_model=List[Dict])
+def get_weekly_revenue(
+    year: int = datetime.now().year,
+    departure_city: Optional[str] = None,
+    arrival_city: Optional[str] = None,
+    airline: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_admin_access)
+):
+    return weekly_revenue(
+        db, year,
+        departure_city=departure_city, arrival_city=arrival_city, airline=airline
+    )
 
 @router.get("/revenue/monthly", response_model=List[Dict])
 def get_monthly_revenue(
     year: int = datetime.now().year,
+    departure_city: Optional[str] = None,
+    arrival_city: Optional[str] = None,
+    airline: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(check_admin_access)
 ):
-    monthly_revenue = []
-    
-    for month in range(1, 13):
-        # Calculate start and end dates for the month
-        start_date = datetime(year, month, 1)
-        if month == 12:
-            end_date = datetime(year + 1, 1, 1)
-        else:
-            end_date = datetime(year, month + 1, 1)
-        
-        # Query revenue for the month
-        revenue = db.query(func.sum(Booking.payment_amount)).filter(
-            Booking.payment_status == PaymentStatus.COMPLETED,
-            Booking.booking_date >= start_date,
-            Booking.booking_date < end_date
-        ).scalar() or 0.0
-        
-        monthly_revenue.append({
-            "month": month,
-            "month_name": start_date.strftime("%B"),
-            "revenue": revenue
-        })
+    return monthly_revenue(
+        db, year,
+        departure_city=departure_city, arrival_city=arrival_city, airline=airline
+    )
+
+@router.get("/revenue/yearly", response_model=List[Dict])
+def get_yearly_revenue(
+    start_year: Optional[int] = None,
+    end_year: Optional[int] = None,
+    departure_city: Optional[str] = None,
+    arrival_city: Optional[str] = None,
+    airline: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_admin_access)
+):
+    # Defaults to the last five years
+    end_year = end_year or datetime.now().year
+    start_year = start_year or end_year - 4
+    if start_year > end_year:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_year must not be after end_year"
+        )
     
-    return monthly_revenue
+    return yearly_revenue(
+        db, start_year, end_year,
+        departure_city=departure_city, arrival_city=arrival_city, airline=airline
+    )
 
 @router.get("/popular-routes", response_model=List[Dict])
 def get_popular_routes(
     limit: int = 5,
+    hours: Optional[int] = Query(None, ge=1, le=settings.POPULAR_ROUTES_MAX_WINDOW_HOURS),
     db: Session = Depends(get_db),
     current_user: User = Depends(check_admin_access)
 ):
-    # This query gets the top routes based on confirmed bookings
-    popular_routes = db.query(
-        Flight.departure_city,
-        Flight.arrival_city,
-        func.count(Booking.id).label("booking_count")
-    ).join(
-        Booking, Booking.flight_id == Flight.id
-    ).filter(
-        Booking.status == BookingStatus.CONFIRMED
-    ).group_by(
-        Flight.departure_city,
-        Flight.arrival_city
-    ).order_by(
-        func.count(Booking.id).desc()
-    ).limit(limit).all()
-    
-    result = []
-    for route in popular_routes:
-        result.append({
-            "departure_city": route.departure_city,
-            "arrival_city": route.arrival_city,
-            "booking_count": route.booking_count
-        })
+    # Top routes by confirmed bookings, all-time or over the last `hours` hours
+    return popular_routes(db, limit, hours)
+
+@router.get("/cache/stats", response_model=Dict)
+def get_cache_stats(current_user: User = Depends(check_admin_access)):
+    # Hit/miss/eviction counters for every in-process cache
+    return cache_stats()
+
+@router.get("/payment-gateway/stats", response_model=Dict)
+def get_payment_gateway_stats(current_user: User = Depends(check_admin_access)):
+    # Circuit state and request/retry counters for the payment gateway client
+    return payment_gateway.stats()
+
+@router.get("/holds/stats", response_model=Dict)
+def get_hold_sweeper_stats(current_user: User = Depends(check_admin_access)):
+    # Seats reclaimed from unpaid bookings whose hold expired
+    return hold_sweeper.stats()
+
+@router.post("/holds/sweep", response_model=Dict)
+def sweep_expired_holds(current_user: User = Depends(check_admin_access)):
+    # Run a sweep now instead of waiting for the next interval. A database
+    # error stops it early; what was reclaimed until then is still reported
+    result = hold_sweeper.sweep(SessionLocal)
+    return {"seats_reclaimed": result.seats_reclaimed, "complete": result.error is None, "error": result.error}
+
+@router.get("/profiles", response_model=List[Dict])
+def list_profiles(current_user: User = Depends(check_admin_access)):
+    # Stored request profiles, newest first, without their stacks
+    return profile_store.list()
+
+@router.get("/profiles/{profile_id}")
+def get_profile(
+    profile_id: str,
+    format: Literal["json", "folded"] = "json",
+    current_user: User = Depends(check_admin_access)
+):
+    record = profile_store.load(profile_id)
+    if record is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
     
-    return result
\ No newline at end of file
+    # Folded stacks load straight into flamegraph.pl or speedscope
+    if format == "folded":
+        return PlainTextResponse(
+            folded(record),
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.folded"'}
+        )
+    return record
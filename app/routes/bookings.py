@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.models.booking import Booking, BookingStatus, PaymentStatus
 from app.models.flight import Flight
 from app.models.user import User, UserRole
@@ -12,27 +14,119 @@ from app.schemas.booking import (
     Booking as BookingSchema,
     BookingCreate,
     BookingUpdate,
+    GroupBooking,
+    GroupBookingCreate,
+    GroupPaymentCreate,
     PaymentCreate,
     ETicket
 )
-from app.services.auth import get_current_active_user
+from app.services.auth import check_staff_access, get_current_active_user, get_current_active_user_async
+from app.services.e_tickets import cached_e_ticket, e_ticket_for, invalidate_booking, ticket_cache
+from app.services.exports import bookings_export
 from app.services.payment import process_payment, refund_payment
+from app.services.payment_gateway import GatewayRejectedError, GatewayResponseError, PaymentGatewayError
+from app.services.hold_sweeper import hold_expired
+from app.services.inventory import reserve_seats, release_seats
+from app.services.events import seats_changed
+from app.services.revenue import record_payment, record_payments, record_refund
+from app.services import popular_routes
+from app.services.stats import BOOKINGS_TOTAL, REVENUE_TOTAL, bookings_by_status, bookings_in_hour, bump
+from app.services.seat_map import SeatConflictError, allocate_group, claim_seat_numbers, release_seat_numbers
+from app.utils.conditional import conditional_response
+from app.utils.pagination import NEXT_CURSOR_HEADER, keyset_page
+from app.utils.serialization import list_response
+from app.utils.streaming import ExportFormat, export_response, ndjson_response
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
 
+def booking_query(db: Session):
+    # Bookings are always returned with their flight and passenger, so load
+    # both in the same statement instead of two lazy loads per booking
+    return db.query(Booking).options(joinedload(Booking.flight), joinedload(Booking.passenger))
+
+def load_booking(db: Session, booking_id: int):
+    return booking_query(db).filter(Booking.id == booking_id).first()
+
+def payment_unavailable(error: PaymentGatewayError):
+    # Nothing was changed. A gateway that rejected the request or sent an
+    # unreadable answer will do the same again; only a timeout or an open
+    # circuit is worth retrying
+    if isinstance(error, (GatewayRejectedError, GatewayResponseError)):
+        return HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(error))
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(error),
+        headers={"Retry-After": "5"}
+    )
+
+async def payment_conflict(payment_result) -> HTTPException:
+    # Another request cancelled or paid the booking while the gateway call was
+    # in flight: give back the charge we just took instead of keeping it
+    if payment_result["status"] == PaymentStatus.COMPLETED:
+        try:
+            await refund_payment(payment_result["payment_id"])
+        except PaymentGatewayError as e:
+            return HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"The booking changed during payment and charge {payment_result['payment_id']} could not be refunded: {e}"
+            )
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="The booking was changed by another request during payment; no charge was kept"
+    )
+
+async def load_booking_async(db: AsyncSession, booking_id: int):
+    result = await db.execute(
+        select(Booking)
+        .options(joinedload(Booking.flight), joinedload(Booking.passenger))
+        .where(Booking.id == booking_id)
+    )
+    return result.scalars().first()
+
 @router.get("/", response_model=List[BookingSchema])
 def get_user_bookings(
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    stream: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    # For regular passengers, show only their bookings
-    if current_user.role == UserRole.PASSENGER:
-        bookings = db.query(Booking).filter(Booking.passenger_id == current_user.id).all()
-    # For admin/staff, show all bookings
-    else:
-        bookings = db.query(Booking).all()
+    def bookings_query(session: Session):
+        query = booking_query(session)
+        # For regular passengers, show only their bookings
+        if current_user.role == UserRole.PASSENGER:
+            query = query.filter(Booking.passenger_id == current_user.id)
+        # For admin/staff, show all bookings
+        return query
+    
+    # Stream every visible booking as NDJSON
+    if stream:
+        return ndjson_response(lambda stream_db: bookings_query(stream_db).order_by(Booking.id), BookingSchema)
+    
+    bookings, next_cursor = keyset_page(bookings_query(db), Booking.id, cursor, limit)
+    return list_response(BookingSchema, bookings, {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None)
+
+@router.get("/export")
+def export_bookings(
+    format: ExportFormat = "csv",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    flight_id: Optional[int] = None,
+    booking_status: Optional[BookingStatus] = None,
+    current_user: User = Depends(check_staff_access)
+):
+    # Full booking dump for finance, streamed as CSV or NDJSON
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must not be after end_date"
+        )
     
-    return bookings
+    return export_response(
+        lambda: bookings_export(start_date, end_date, flight_id, booking_status),
+        format,
+        "bookings"
+    )
 
 @router.get("/{booking_id}", response_model=BookingSchema)
 def get_booking(
@@ -40,7 +134,7 @@ def get_booking(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    booking = load_booking(db, booking_id)
     
     if not booking:
         raise HTTPException(
@@ -71,18 +165,45 @@ def create_booking(
             detail="Flight not found or inactive"
         )
     
+    # Cheap early exit for flights that are already known to be sold out
     if flight.available_seats <= 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No available seats on this flight"
         )
     
+    # Take the seat with a conditional atomic decrement
+    if not reserve_seats(db, flight.id):
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No available seats on this flight"
+        )
+    
+    # Assign the requested seat, rejecting unknown or already booked seats
+    try:
+        claim_seat_numbers(db, flight, [booking.seat_number])
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except SeatConflictError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    
     # Generate a unique booking reference
     booking_reference = f"BK-{uuid.uuid4().hex[:8].upper()}"
     
     # Create booking record
+    booking_date = datetime.utcnow()
     new_booking = Booking(
         booking_reference=booking_reference,
+        booking_date=booking_date,
         passenger_id=current_user.id,
         flight_id=booking.flight_id,
         seat_number=booking.seat_number,
@@ -91,23 +212,217 @@ def create_booking(
         payment_amount=flight.price
     )
     
-    # Reduce available seats
-    flight.available_seats -= 1
-    
     db.add(new_booking)
+    bump(db, {
+        BOOKINGS_TOTAL: 1,
+        bookings_by_status(BookingStatus.PENDING): 1,
+        bookings_in_hour(booking_date): 1
+    })
     db.commit()
-    db.refresh(new_booking)
+    new_booking = load_booking(db, new_booking.id)
+    
+    seats_changed(new_booking.flight_id, -1)
     
     return new_booking
 
+@router.post("/group", response_model=GroupBooking)
+def create_group_booking(
+    group: GroupBookingCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    flight = db.query(Flight).filter(Flight.id == group.flight_id, Flight.is_active == True).first()
+    if not flight:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Flight not found or inactive"
+        )
+    
+    count = group.seats or len(group.seat_numbers)
+    if flight.available_seats < count:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Only {flight.available_seats} seats available on this flight"
+        )
+    
+    # Take every seat with a single conditional decrement: all or nothing
+    if not reserve_seats(db, flight.id, count):
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Not enough available seats on this flight for {count} passengers"
+        )
+    
+    seat_numbers = group.seat_numbers or allocate_group(db, flight, count)
+    if not seat_numbers:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Fewer than {count} seats are free on this flight"
+        )
+    
+    try:
+        claim_seat_numbers(db, flight, seat_numbers)
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except SeatConflictError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    
+    # One executemany insert for the whole group
+    group_reference = f"GR-{uuid.uuid4().hex[:8].upper()}"
+    booking_date = datetime.utcnow()
+    db.execute(insert(Booking), [
+        {
+            "booking_reference": f"BK-{uuid.uuid4().hex[:8].upper()}",
+            "group_reference": group_reference,
+            "booking_date": booking_date,
+            "passenger_id": current_user.id,
+            "flight_id": flight.id,
+            "seat_number": seat_number,
+            "status": BookingStatus.PENDING,
+            "payment_status": PaymentStatus.PENDING,
+            "payment_amount": flight.price
+        }
+        for seat_number in seat_numbers
+    ])
+    bump(db, {
+        BOOKINGS_TOTAL: count,
+        bookings_by_status(BookingStatus.PENDING): count,
+        bookings_in_hour(booking_date): count
+    })
+    db.commit()
+    
+    seats_changed(flight.id, -count)
+    
+    bookings = db.query(Booking).filter(Booking.group_reference == group_reference).order_by(Booking.id).all()
+    return {
+        "group_reference": group_reference,
+        "flight": flight,
+        "bookings": bookings,
+        "total_amount": sum(booking.payment_amount for booking in bookings)
+    }
+
+@router.post("/group/{group_reference}/payment", response_model=GroupBooking)
+async def make_group_payment(
+    group_reference: str,
+    payment_details: GroupPaymentCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
+):
+    result = await db.execute(
+        select(Booking)
+        .options(joinedload(Booking.flight))
+        .where(Booking.group_reference == group_reference)
+        .order_by(Booking.id)
+    )
+    bookings = result.scalars().all()
+    
+    if not bookings:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Booking group not found"
+        )
+    
+    # Check if user is authorized to pay for this group
+    if current_user.role == UserRole.PASSENGER and any(booking.passenger_id != current_user.id for booking in bookings):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to pay for this booking group"
+        )
+    
+    # Cancelled and already paid bookings are left out of the charge
+    unpaid = [
+        booking for booking in bookings
+        if booking.status != BookingStatus.CANCELLED and booking.payment_status != PaymentStatus.COMPLETED
+    ]
+    if not unpaid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="There is nothing left to pay for this booking group"
+        )
+    
+    if any(hold_expired(booking) for booking in unpaid):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The seat holds for this booking group have expired, please book again"
+        )
+    
+    # Don't hold a connection while waiting on the gateway
+    await db.commit()
+    
+    # One charge for the whole group
+    try:
+        payment_result = await process_payment(
+            amount=sum(booking.payment_amount for booking in unpaid),
+            card_number=payment_details.card_number,
+            expiry_date=payment_details.expiry_date,
+            cvv=payment_details.cvv
+        )
+    except PaymentGatewayError as e:
+        raise payment_unavailable(e)
+    
+    # Only write if every booking is still as checked above; the session is
+    # synchronized with the new values
+    completed = payment_result["status"] == PaymentStatus.COMPLETED
+    values = {"payment_status": payment_result["status"], "payment_id": payment_result["payment_id"]}
+    if completed:
+        values["status"] = BookingStatus.CONFIRMED
+    result = await db.execute(
+        update(Booking)
+        .where(
+            Booking.id.in_([booking.id for booking in unpaid]),
+            Booking.status == BookingStatus.PENDING,
+            Booking.payment_status != PaymentStatus.COMPLETED
+        )
+        .values(**values)
+    )
+    if result.rowcount != len(unpaid):
+        await db.rollback()
+        raise await payment_conflict(payment_result)
+    
+    if completed:
+        flight = unpaid[0].flight
+        
+        def confirm(session: Session):
+            bump(session, {
+                bookings_by_status(BookingStatus.PENDING): -len(unpaid),
+                bookings_by_status(BookingStatus.CONFIRMED): len(unpaid),
+                REVENUE_TOTAL: sum(booking.payment_amount for booking in unpaid)
+            })
+            record_payments(session, unpaid, flight)
+            for booking_date in {booking.booking_date for booking in unpaid}:
+                popular_routes.record(
+                    session, flight, booking_date,
+                    sum(1 for booking in unpaid if booking.booking_date == booking_date)
+                )
+        
+        await db.run_sync(confirm)
+    
+    await db.commit()
+    
+    return {
+        "group_reference": group_reference,
+        "flight": bookings[0].flight,
+        "bookings": bookings,
+        "total_amount": sum(booking.payment_amount for booking in bookings if booking.status != BookingStatus.CANCELLED)
+    }
+
 @router.post("/{booking_id}/payment", response_model=BookingSchema)
 async def make_payment(
     booking_id: int,
     payment_details: PaymentCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
 ):
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    booking = await load_booking_async(db, booking_id)
     
     if not booking:
         raise HTTPException(
@@ -129,33 +444,70 @@ async def make_payment(
             detail="Payment has already been processed for this booking"
         )
     
-    # Process payment via payment gateway
-    payment_result = await process_payment(
-        amount=payment_details.amount,
-        card_number=payment_details.card_number,
-        expiry_date=payment_details.expiry_date,
-        cvv=payment_details.cvv
-    )
+    # Unpaid holds expire and are released by the hold sweeper
+    if booking.status == BookingStatus.CANCELLED or hold_expired(booking):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The seat hold for this booking has expired, please book again"
+        )
     
-    # Update booking based on payment result
-    booking.payment_status = payment_result["status"]
-    booking.payment_id = payment_result["payment_id"]
+    # Don't hold a connection while waiting on the gateway
+    await db.commit()
     
-    if payment_result["status"] == PaymentStatus.COMPLETED:
-        booking.status = BookingStatus.CONFIRMED
-    
-    db.commit()
-    db.refresh(booking)
+    # Process payment via payment gateway
+    try:
+        payment_result = await process_payment(
+            amount=payment_details.amount,
+            card_number=payment_details.card_number,
+            expiry_date=payment_details.expiry_date,
+            cvv=payment_details.cvv
+        )
+    except PaymentGatewayError as e:
+        raise payment_unavailable(e)
+    
+    # Update booking based on payment result, but only if it is still as
+    # checked above; the session is synchronized with the new values
+    previous_status = booking.status
+    completed = payment_result["status"] == PaymentStatus.COMPLETED
+    values = {"payment_status": payment_result["status"], "payment_id": payment_result["payment_id"]}
+    if completed:
+        values["status"] = BookingStatus.CONFIRMED
+    result = await db.execute(
+        update(Booking)
+        .where(
+            Booking.id == booking.id,
+            Booking.status == previous_status,
+            Booking.payment_status != PaymentStatus.COMPLETED
+        )
+        .values(**values)
+    )
+    if result.rowcount != 1:
+        await db.rollback()
+        raise await payment_conflict(payment_result)
+    
+    if completed:
+        def confirm(session: Session):
+            bump(session, {
+                bookings_by_status(previous_status): -1,
+                bookings_by_status(BookingStatus.CONFIRMED): 1,
+                REVENUE_TOTAL: booking.payment_amount
+            })
+            record_payment(session, booking, booking.flight)
+            popular_routes.record(session, booking.flight, booking.booking_date, 1)
+        
+        await db.run_sync(confirm)
+    
+    await db.commit()
     
     return booking
 
 @router.post("/{booking_id}/cancel", response_model=BookingSchema)
 async def cancel_booking(
     booking_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
 ):
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    booking = await load_booking_async(db, booking_id)
     
     if not booking:
         raise HTTPException(
@@ -177,70 +529,108 @@ async def cancel_booking(
             detail="Booking is already cancelled"
         )
     
+    # Claim the cancellation before refunding or releasing anything: of
+    # several cancels of one booking, or a cancel racing the hold sweeper or
+    # a payment, only the request whose update matches the status it read
+    # goes on to refund and hand back the seat
+    previous_status = booking.status
+    claim = await db.execute(
+        update(Booking)
+        .where(Booking.id == booking.id, Booking.status == previous_status)
+        .values(status=BookingStatus.CANCELLED)
+    )
+    if claim.rowcount != 1:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Booking was changed by another request"
+        )
+    
     # Process refund if payment was completed
+    refunded = False
     if booking.payment_status == PaymentStatus.COMPLETED:
-        refund_result = await refund_payment(booking.payment_id)
+        # Keep the claim, but don't hold the connection during the gateway call
+        await db.commit()
+        try:
+            refund_result = await refund_payment(booking.payment_id)
+        except PaymentGatewayError as e:
+            # Hand the claim back; no money moved and no seat was released
+            await db.execute(
+                update(Booking)
+                .where(Booking.id == booking.id, Booking.status == BookingStatus.CANCELLED)
+                .values(status=previous_status)
+            )
+            await db.commit()
+            raise payment_unavailable(e)
         booking.payment_status = refund_result["status"]
-    
-    # Update booking status
-    booking.status = BookingStatus.CANCELLED
-    
-    # Return seat to available inventory
-    flight = db.query(Flight).filter(Flight.id == booking.flight_id).first()
-    if flight:
-        flight.available_seats += 1
-    
-    db.commit()
-    db.refresh(booking)
+        refunded = booking.payment_status != PaymentStatus.COMPLETED
+    
+    def cancel(session: Session):
+        if refunded:
+            bump(session, {REVENUE_TOTAL: -booking.payment_amount})
+            record_refund(session, booking, booking.flight)
+        
+        bump(session, {bookings_by_status(previous_status): -1, bookings_by_status(BookingStatus.CANCELLED): 1})
+        if previous_status == BookingStatus.CONFIRMED:
+            popular_routes.record(session, booking.flight, booking.booking_date, -1)
+        
+        # Return seat to available inventory
+        release_seats(session, booking.flight_id)
+        release_seat_numbers(session, booking.flight_id, [booking.seat_number])
+    
+    await db.run_sync(cancel)
+    await db.commit()
+    
+    seats_changed(booking.flight_id, 1)
+    invalidate_booking(booking.id)
     
     return booking
 
 @router.get("/{booking_id}/e-ticket", response_model=ETicket)
 def generate_e_ticket(
     booking_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    # Get booking with related data
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
-    
-    if not booking:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Booking not found"
-        )
-    
-    # Check if user is authorized to view this e-ticket
-    if current_user.role == UserRole.PASSENGER and booking.passenger_id != current_user.id:
+    # A confirmed booking's e-ticket is cached until its flight, passenger
+    # or status changes, so repeat downloads only re-read the columns it is
+    # built from instead of loading and serializing the booking again
+    e_ticket = cached_e_ticket(db, booking_id)
+    
+    if e_ticket is None:
+        generation = ticket_cache.generation
+        
+        # Get booking with related data
+        booking = load_booking(db, booking_id)
+        
+        if not booking:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Booking not found"
+            )
+        
+        # Check if user is authorized to view this e-ticket
+        if current_user.role == UserRole.PASSENGER and booking.passenger_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to access this e-ticket"
+            )
+        
+        # Check if booking is confirmed (payment completed)
+        if booking.status != BookingStatus.CONFIRMED:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="E-ticket is only available for confirmed bookings"
+            )
+        
+        # Generate e-ticket
+        e_ticket = e_ticket_for(booking, generation)
+    
+    elif current_user.role == UserRole.PASSENGER and e_ticket.passenger_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to access this e-ticket"
         )
     
-    # Check if booking is confirmed (payment completed)
-    if booking.status != BookingStatus.CONFIRMED:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="E-ticket is only available for confirmed bookings"
-        )
-    
-    # Get related passenger and flight info
-    passenger = db.query(User).filter(User.id == booking.passenger_id).first()
-    flight = db.query(Flight).filter(Flight.id == booking.flight_id).first()
-    
-    # Generate e-ticket
-    e_ticket = ETicket(
-        booking_reference=booking.booking_reference,
-        passenger_name=passenger.full_name,
-        flight_number=flight.flight_number,
-        airline=flight.airline,
-        departure_city=flight.departure_city,
-        arrival_city=flight.arrival_city,
-        departure_time=flight.departure_time,
-        arrival_time=flight.arrival_time,
-        seat_number=booking.seat_number,
-        booking_date=booking.booking_date,
-        payment_amount=booking.payment_amount
-    )
-    
-    return e_ticket
\ No newline at end of file
+    return conditional_response(request, e_ticket.body, e_ticket.etag)
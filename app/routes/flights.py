@@ -1,24 +1,88 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+from dataclasses import asdict
+import base64
 
 from app.database import get_db
+from app.config import settings
 from app.models.flight import Flight
-from app.schemas.flight import Flight as FlightSchema, FlightCreate, FlightUpdate, FlightSearch
-from app.services.auth import get_current_active_user, check_admin_access
+from app.schemas.flight import Flight as FlightSchema, FlightCreate, FlightUpdate, FlightSearch, ConnectionSearch, Itinerary, FlightImportResult
+from app.schemas.booking import ETicket
+from app.schemas.seat_map import SeatMap as SeatMapSchema
+from app.services.auth import get_current_active_user, check_admin_access, check_staff_access
+from app.services.catalog_version import Version, catalog_version, touch_catalog
+from app.services.events import flight_changed, snapshot
+from app.services.e_tickets import e_tickets_for_flight
+from app.services.exports import flight_manifest
+from app.services.flight_import import FORMATS, ImportFileError, detect_format, import_flights, iter_rows
+from app.services.flight_search import search_flights as cached_search_flights
+from app.services.route_graph import get_route_graph
+from app.services.stats import FLIGHTS_ACTIVE, FLIGHTS_TOTAL, bump
+from app.services.seat_map import create_seat_map, ensure_capacity, get_or_create_seat_map, load_bitmap
+from app.utils.conditional import conditional_response, etag_for, not_modified, not_modified_response, validator_headers
+from app.utils.pagination import NEXT_CURSOR_HEADER, keyset_page
+from app.utils.serialization import list_response
+from app.utils.streaming import ExportFormat, export_response, ndjson_response
 
 router = APIRouter(prefix="/flights", tags=["Flights"])
 
+def catalog_headers(version: Version) -> Dict[str, str]:
+    return validator_headers(version.etag, version.last_modified, settings.CATALOG_CACHE_CONTROL)
+
 @router.get("/", response_model=List[FlightSchema])
 def get_all_flights(
+    request: Request,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
+    stream: bool = False,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
-    flights = db.query(Flight).filter(Flight.is_active == True).offset(skip).limit(limit).all()
-    return flights
+    # Read the version before the query, so a change made while it runs
+    # is picked up by the next poll
+    version = catalog_version(db)
+    headers = catalog_headers(version)
+    if not_modified(request, version.etag, version.last_modified):
+        return not_modified_response(headers)
+    
+    # Stream every active flight as NDJSON
+    if stream:
+        response = ndjson_response(
+            lambda stream_db: stream_db.query(Flight).filter(Flight.is_active == True).order_by(Flight.id),
+            FlightSchema
+        )
+        response.headers.update(headers)
+        return response
+    
+    query = db.query(Flight).filter(Flight.is_active == True)
+    
+    # Offset paging is kept for existing clients; new clients follow the cursor
+    if skip and not cursor:
+        return list_response(FlightSchema, query.offset(skip).limit(limit).all(), headers)
+    
+    flights, next_cursor = keyset_page(query, Flight.id, cursor, limit)
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return list_response(FlightSchema, flights, headers)
+
+@router.get("/search", response_model=List[FlightSchema])
+def search_flights_get(
+    request: Request,
+    search: FlightSearch = Depends(),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    # Same search as POST /search, but as a GET so clients and caches can revalidate it
+    version = catalog_version(db)
+    headers = catalog_headers(version)
+    if not_modified(request, version.etag, version.last_modified):
+        return not_modified_response(headers)
+    
+    return ORJSONResponse(cached_search_flights(db, search), headers=headers)
 
 @router.post("/search", response_model=List[FlightSchema])
 def search_flights(
@@ -26,26 +90,44 @@ def search_flights(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
-    query = db.query(Flight).filter(Flight.is_active == True)
-    
-    if search.departure_city:
-        query = query.filter(Flight.departure_city == search.departure_city)
-    
-    if search.arrival_city:
-        query = query.filter(Flight.arrival_city == search.arrival_city)
-    
-    if search.departure_date:
-        # Extract date only for comparison
-        departure_date = search.departure_date.date()
-        query = query.filter(Flight.departure_time >= datetime.combine(departure_date, datetime.min.time()))
-        query = query.filter(Flight.departure_time < datetime.combine(departure_date, datetime.max.time()))
+    # Results are cached already validated, so they are encoded as they are
+    return ORJSONResponse(cached_search_flights(db, search))
+
+@router.post("/search/connections", response_model=List[Itinerary])
+def search_connections(
+    search: ConnectionSearch,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    # Itineraries with up to two stops, answered from the in-memory route graph
+    start = datetime.combine(search.departure_date.date(), datetime.min.time())
+    itineraries = get_route_graph(db).search(
+        origin=search.departure_city,
+        destination=search.arrival_city,
+        start=start,
+        end=start + timedelta(days=1),
+        max_stops=search.max_stops,
+        sort_by=search.sort_by,
+        limit=search.limit,
+        seats=search.passengers,
+        min_connection=timedelta(minutes=settings.MIN_CONNECTION_MINUTES),
+        max_layover=timedelta(hours=settings.MAX_LAYOVER_HOURS)
+    )
     
-    flights = query.all()
-    return flights
+    return [
+        {
+            "legs": [asdict(leg) for leg in legs],
+            "stops": len(legs) - 1,
+            "total_duration_minutes": int((legs[-1].arrival_time - legs[0].departure_time).total_seconds() // 60),
+            "total_price": sum(leg.price for leg in legs)
+        }
+        for legs in itineraries
+    ]
 
 @router.get("/{flight_id}", response_model=FlightSchema)
 def get_flight(
     flight_id: int, 
+    request: Request,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
@@ -56,7 +138,72 @@ def get_flight(
             detail="Flight not found"
         )
     
-    return flight
+    # The ETag comes from the row itself, so a change made by another worker
+    # or straight in the database is seen on the next request
+    body = FlightSchema.model_validate(flight, from_attributes=True).model_dump_json().encode()
+    return conditional_response(request, body, etag_for(body), settings.CATALOG_CACHE_CONTROL)
+
+@router.get("/{flight_id}/seatmap", response_model=SeatMapSchema)
+def get_seat_map(
+    flight_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    flight = db.query(Flight).filter(Flight.id == flight_id).first()
+    if not flight:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Flight not found"
+        )
+    
+    seat_map = get_or_create_seat_map(db, flight)
+    db.commit()
+    
+    bitmap = load_bitmap(seat_map)
+    return {
+        "flight_id": flight.id,
+        "rows": bitmap.rows,
+        "layout": bitmap.layout,
+        "seats_per_row": bitmap.seats_per_row,
+        "seats": bitmap.capacity,
+        "free_seats": bitmap.free_count(),
+        "occupied": base64.b64encode(bitmap.to_bytes()).decode("ascii")
+    }
+
+@router.get("/{flight_id}/manifest")
+def get_manifest(
+    flight_id: int,
+    format: ExportFormat = "csv",
+    db: Session = Depends(get_db),
+    current_user = Depends(check_staff_access)
+):
+    flight = db.query(Flight).filter(Flight.id == flight_id).first()
+    if not flight:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Flight not found"
+        )
+    
+    # Passenger list for ground ops, streamed as CSV or NDJSON
+    return export_response(lambda: flight_manifest(flight_id), format, f"manifest-{flight.flight_number}")
+
+@router.get("/{flight_id}/e-tickets", response_model=List[ETicket])
+def get_flight_e_tickets(
+    flight_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user = Depends(check_staff_access)
+):
+    # Every confirmed passenger's e-ticket in one joined query, for check-in kiosks
+    tickets = e_tickets_for_flight(db, flight_id)
+    if not tickets and not db.query(Flight.id).filter(Flight.id == flight_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Flight not found"
+        )
+    
+    body = b"[" + b",".join(ticket.body for ticket in tickets) + b"]"
+    return conditional_response(request, body, etag_for(body))
 
 @router.post("/", response_model=FlightSchema)
 def create_flight(
@@ -74,11 +221,43 @@ def create_flight(
     
     db_flight = Flight(**flight.dict())
     db.add(db_flight)
+    create_seat_map(db, db_flight)
+    bump(db, {FLIGHTS_TOTAL: 1, FLIGHTS_ACTIVE: 1 if db_flight.is_active else 0})
+    touch_catalog(db)
     db.commit()
     db.refresh(db_flight)
     
+    flight_changed(snapshot(db_flight))
+    
     return db_flight
 
+@router.post("/import", response_model=FlightImportResult)
+def import_flight_schedule(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user = Depends(check_admin_access)
+):
+    # Bulk load a schedule from CSV or NDJSON; format defaults from the file extension
+    format = format or detect_format(file.filename or "")
+    if format not in FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported format {format}, expected one of {', '.join(FORMATS)}"
+        )
+    
+    try:
+        result = import_flights(db, iter_rows(file.file, format))
+    except ImportFileError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {
+        "inserted": result.inserted,
+        "failed": result.failed,
+        "errors": result.errors,
+        "elapsed_seconds": result.elapsed_seconds,
+        "rows_per_second": result.rows_per_second
+    }
+
 @router.put("/{flight_id}", response_model=FlightSchema)
 def update_flight(
     flight_id: int,
@@ -94,12 +273,22 @@ def update_flight(
         )
     
     # Update flight data
+    was_active = flight.is_active
     for key, value in flight_data.dict(exclude_unset=True).items():
         setattr(flight, key, value)
+    if flight.is_active != was_active:
+        bump(db, {FLIGHTS_ACTIVE: 1 if flight.is_active else -1})
+    
+    # Grow the cabin if the inventory no longer fits the seat map
+    if flight_data.available_seats is not None:
+        ensure_capacity(db, flight)
     
+    touch_catalog(db)
     db.commit()
     db.refresh(flight)
     
+    flight_changed(snapshot(flight))
+    
     return flight
 
 @router.delete("/{flight_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -116,7 +305,13 @@ def delete_flight(
         )
     
     # Soft delete by marking as inactive
+    if flight.is_active:
+        bump(db, {FLIGHTS_ACTIVE: -1})
     flight.is_active = False
+    touch_catalog(db)
+    deactivated = snapshot(flight)
     db.commit()
     
+    flight_changed(deactivated)
+    
     return None
\ No newline at end of file
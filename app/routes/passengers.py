@@ -1,11 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.database import get_db
 from app.models.user import User, UserRole
 from app.schemas.user import User as UserSchema, UserUpdate
-from app.services.auth import get_current_active_user, check_staff_access
+from app.services.auth import get_current_active_user, check_staff_access, invalidate_principal
+from app.services.e_tickets import invalidate_passenger
+from app.services.stats import USERS_TOTAL, bump, users_by_role
+from app.utils.pagination import NEXT_CURSOR_HEADER, keyset_page
+from app.utils.serialization import list_response
+from app.utils.streaming import ndjson_response
 
 router = APIRouter(prefix="/passengers", tags=["Passengers"])
 
@@ -13,11 +18,26 @@ router = APIRouter(prefix="/passengers", tags=["Passengers"])
 def get_all_passengers(
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
+    stream: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(check_staff_access)
 ):
-    passengers = db.query(User).filter(User.role == UserRole.PASSENGER).offset(skip).limit(limit).all()
-    return passengers
+    # Stream every passenger as NDJSON
+    if stream:
+        return ndjson_response(
+            lambda stream_db: stream_db.query(User).filter(User.role == UserRole.PASSENGER).order_by(User.id),
+            UserSchema
+        )
+    
+    query = db.query(User).filter(User.role == UserRole.PASSENGER)
+    
+    # Offset paging is kept for existing clients; new clients follow the cursor
+    if skip and not cursor:
+        return list_response(UserSchema, query.offset(skip).limit(limit).all())
+    
+    passengers, next_cursor = keyset_page(query, User.id, cursor, limit)
+    return list_response(UserSchema, passengers, {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None)
 
 @router.get("/{passenger_id}", response_model=UserSchema)
 def get_passenger(
@@ -73,6 +93,9 @@ def update_passenger(
     db.commit()
     db.refresh(passenger)
     
+    invalidate_principal(passenger.username)
+    invalidate_passenger(passenger.id)
+    
     return passenger
 
 @router.delete("/{passenger_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -88,7 +111,12 @@ def delete_passenger(
             detail="Passenger not found"
         )
     
+    username = passenger.username
     db.delete(passenger)
+    bump(db, {USERS_TOTAL: -1, users_by_role(UserRole.PASSENGER): -1})
     db.commit()
     
+    invalidate_principal(username)
+    invalidate_passenger(passenger_id)
+    
     return None
\ No newline at end of file
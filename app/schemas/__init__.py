@@ -1,5 +1,5 @@
 from app.schemas.user import User, UserCreate, UserUpdate, UserInDB, Token, TokenData
-from app.schemas.flight import Flight, FlightCreate, FlightUpdate, FlightSearch
+from app.schemas.flight import Flight, FlightCreate, FlightUpdate, FlightSearch, ConnectionSearch, Itinerary
 from app.schemas.booking import (
     Booking,
     BookingCreate,
@@ -7,3 +7,4 @@ from app.schemas.booking import (
     PaymentCreate,
     ETicket,
 )
+from app.schemas.seat_map import SeatMap
@@ -1,6 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from typing import List, Optional
 from datetime import datetime
+from app.config import settings
 from app.models.booking import BookingStatus, PaymentStatus
 from app.schemas.flight import Flight
 from app.schemas.user import User
@@ -12,12 +13,27 @@ class BookingBase(BaseModel):
 class BookingCreate(BookingBase):
     pass
 
+class GroupBookingCreate(BaseModel):
+    flight_id: int
+    # Either name the seats, or ask for a number of adjacent seats
+    seat_numbers: Optional[List[str]] = Field(None, min_length=1, max_length=settings.GROUP_BOOKING_MAX_SEATS)
+    seats: Optional[int] = Field(None, ge=1, le=settings.GROUP_BOOKING_MAX_SEATS)
+    
+    @model_validator(mode="after")
+    def check_seats(self):
+        if (self.seat_numbers is None) == (self.seats is None):
+            raise ValueError("Provide either seat_numbers or seats")
+        if self.seat_numbers is not None and len(set(self.seat_numbers)) != len(self.seat_numbers):
+            raise ValueError("seat_numbers must not repeat a seat")
+        return self
+
 class BookingUpdate(BaseModel):
     status: Optional[BookingStatus] = None
 
 class BookingInDB(BookingBase):
     id: int
     booking_reference: str
+    group_reference: Optional[str] = None
     passenger_id: int
     booking_date: datetime
     status: BookingStatus
@@ -25,13 +41,18 @@ class BookingInDB(BookingBase):
     payment_id: Optional[str] = None
     payment_amount: float
     
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class Booking(BookingInDB):
     flight: Optional[Flight] = None
     passenger: Optional[User] = None
 
+class GroupBooking(BaseModel):
+    group_reference: str
+    flight: Flight
+    bookings: List[BookingInDB]
+    total_amount: float
+
 class PaymentCreate(BaseModel):
     booking_id: int
     amount: float
@@ -39,6 +60,12 @@ class PaymentCreate(BaseModel):
     expiry_date: str
     cvv: str
 
+class GroupPaymentCreate(BaseModel):
+    # The charge is the total of the group's unpaid bookings
+    card_number: str
+    expiry_date: str
+    cvv: str
+
 class ETicket(BaseModel):
     booking_reference: str
     passenger_name: str
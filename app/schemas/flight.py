@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Literal, Optional
 from datetime import datetime
 
 class FlightBase(BaseModel):
@@ -29,10 +29,35 @@ class FlightUpdate(BaseModel):
 class Flight(FlightBase):
     id: int
     
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class FlightSearch(BaseModel):
     departure_city: Optional[str] = None
     arrival_city: Optional[str] = None
-    departure_date: Optional[datetime] = None
\ No newline at end of file
+    departure_date: Optional[datetime] = None
+
+class ConnectionSearch(BaseModel):
+    departure_city: str
+    arrival_city: str
+    departure_date: datetime
+    max_stops: int = Field(2, ge=0, le=2)
+    sort_by: Literal["duration", "price"] = "duration"
+    limit: int = Field(5, ge=1, le=50)
+    passengers: int = Field(1, ge=1)
+
+class Itinerary(BaseModel):
+    legs: List[Flight]
+    stops: int
+    total_duration_minutes: int
+    total_price: float
+
+class FlightImportError(BaseModel):
+    row: int
+    error: str
+
+class FlightImportResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[FlightImportError]
+    elapsed_seconds: float
+    rows_per_second: float
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+
+class SeatMap(BaseModel):
+    flight_id: int
+    rows: int
+    layout: str
+    seats_per_row: int
+    # Seats that exist, in row-major order; the rest of the last row does not
+    seats: int
+    free_seats: int
+    # Base64 of the packed occupied mask: seat i (row-major) is bit i % 8 of byte i // 8
+    occupied: str
@@ -1,7 +1,11 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, EmailStr, WithJsonSchema
+from typing import Annotated, Optional
 from app.models.user import UserRole
 
+# Stored addresses were validated when they were written; checking them again
+# on every response was most of the cost of serializing booking lists
+StoredEmail = Annotated[str, WithJsonSchema({"type": "string", "format": "email"})]
+
 class UserBase(BaseModel):
     email: EmailStr
     username: str
@@ -19,10 +23,10 @@ class UserUpdate(BaseModel):
 
 class UserInDB(UserBase):
     id: int
+    email: StoredEmail
     role: UserRole
     
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class User(UserInDB):
     pass
@@ -1,24 +1,67 @@
 from datetime import datetime, timedelta
 from typing import Optional
+import time
 from jose import JWTError, jwt
-from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
 from app.models.user import User, UserRole
-from app.schemas.user import TokenData
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.config import settings
+from app.services.cache import MISSING, TTLCache
+from app.services.password_hasher import HasherBusyError, password_hasher
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
+# Users resolved from bearer tokens, keyed by the exact token string. An entry
+# never outlives its token, so a hit can skip both JWT decoding and the query.
+principal_cache = TTLCache(
+    "principal",
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+def invalidate_principal(username: str):
+    # Call after any change to a user's row (profile, role, deletion)
+    principal_cache.invalidate_tag(username)
+
+def _principal_copy(user: User) -> User:
+    # A session-independent copy that can be shared between requests
+    return User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+
+def hasher_busy_exception():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-in requests, please try again shortly",
+        headers={"Retry-After": "1"},
+    )
+
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    try:
+        return password_hasher.verify(plain_password, hashed_password)
+    except HasherBusyError:
+        raise hasher_busy_exception()
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    try:
+        return password_hasher.hash(password)
+    except HasherBusyError:
+        raise hasher_busy_exception()
+
+async def verify_password_async(plain_password, hashed_password):
+    try:
+        return await password_hasher.verify_async(plain_password, hashed_password)
+    except HasherBusyError:
+        raise hasher_busy_exception()
+
+async def get_password_hash_async(password):
+    try:
+        return await password_hasher.hash_async(password)
+    except HasherBusyError:
+        raise hasher_busy_exception()
 
 def get_user(db: Session, username: str):
     return db.query(User).filter(User.username == username).first()
@@ -31,6 +74,17 @@ def authenticate_user(db: Session, username: str, password: str):
         return False
     return user
 
+async def authenticate_user_async(db: AsyncSession, username: str, password: str):
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
+    # Hand the connection back before waiting for the hashing pool
+    await db.commit()
+    if not user:
+        return False
+    if not await verify_password_async(password, user.hashed_password):
+        return False
+    return user
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -41,28 +95,64 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
+            raise credentials_exception()
     except JWTError:
-        raise credentials_exception
-    user = get_user(db, username=token_data.username)
+        raise credentials_exception()
+    return payload
+
+def _cache_principal(token: str, payload: dict, user: User, generation: int):
+    expires_in = payload.get("exp", 0) - time.time()
+    if expires_in > 0:
+        # Tagged with the username, so a change drops all of the user's tokens
+        principal_cache.set(token, _principal_copy(user), generation=generation, ttl=expires_in, tags=(user.username,))
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    cached = principal_cache.get(token)
+    if cached is not MISSING:
+        return cached
+    
+    payload = _decode_token(token)
+    generation = principal_cache.generation
+    user = get_user(db, username=payload["sub"])
+    if user is None:
+        raise credentials_exception()
+    
+    _cache_principal(token, payload, user, generation)
+    return user
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    cached = principal_cache.get(token)
+    if cached is not MISSING:
+        return cached
+    
+    payload = _decode_token(token)
+    generation = principal_cache.generation
+    result = await db.execute(select(User).where(User.username == payload["sub"]))
+    user = result.scalars().first()
     if user is None:
-        raise credentials_exception
+        raise credentials_exception()
+    
+    _cache_principal(token, payload, user, generation)
     return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     return current_user
 
+async def get_current_active_user_async(current_user: User = Depends(get_current_user_async)):
+    return current_user
+
 def check_admin_access(current_user: User = Depends(get_current_user)):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
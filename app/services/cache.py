@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Set
+
+# Sentinel returned by TTLCache.get on a miss, so None can be cached
+MISSING = object()
+
+_caches: Dict[str, "TTLCache"] = {}
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with LRU eviction and a per-entry TTL.
+    Keeps hit/miss/eviction counters so caches can be sized from real traffic.
+    Entries can carry tags, so everything tagged with one value can be dropped
+    without scanning the whole cache.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (value, expires_at, tags)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._tagged: Dict[Hashable, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; see set()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        _caches[name] = self
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            value, expires_at, _ = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.evictions += 1
+                self.misses += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def _remove(self, key: Hashable) -> bool:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return False
+        for tag in entry[2]:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+        return True
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        generation: int = None,
+        ttl: float = None,
+        tags: Iterable[Hashable] = ()
+    ) -> None:
+        """
+        Store a value. Pass the `generation` read before computing the value to
+        drop the write if anything was invalidated in the meantime, so a slow
+        reader can never put stale data back after a writer cleared it.
+        `ttl` can shorten the cache-wide TTL for this entry; `tags` are the
+        values invalidate_tag() drops it for.
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            lifetime = self.ttl if ttl is None else min(ttl, self.ttl)
+            self._remove(key)
+            tags = frozenset(tags)
+            self._data[key] = (value, time.monotonic() + lifetime, tags)
+            for tag in tags:
+                self._tagged.setdefault(tag, set()).add(key)
+            while len(self._data) > self.maxsize:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        with self._lock:
+            self.generation += 1
+            if not self._remove(key):
+                return False
+            self.invalidations += 1
+            return True
+
+    def invalidate_tag(self, tag: Hashable) -> int:
+        # Proportional to the entries with the tag, not to the cache size
+        with self._lock:
+            self.generation += 1
+            stale = list(self._tagged.get(tag, ()))
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        with self._lock:
+            self.generation += 1
+            stale = [key for key, (value, _, _) in self._data.items() if predicate(key, value)]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self.invalidations += len(self._data)
+            self._data.clear()
+            self._tagged.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in _caches.items()}
@@ -0,0 +1,44 @@
+import random
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.catalog_version import CatalogVersion
+from app.utils.upsert import increment
+
+# Version of the flight catalog for conditional GETs on the list and search
+# routes. Every write path that changes a flight or its seats calls
+# touch_catalog in its own transaction, so the version lives in the database:
+# every worker reads the same one, and it only moves when the catalog changes.
+# A client holding the current ETag is answered 304 after one small read.
+
+@dataclass(frozen=True)
+class Version:
+    number: int
+    last_modified: Optional[datetime]
+
+    @property
+    def etag(self) -> str:
+        # Weak: the same version may be sent gzipped or not
+        return f'W/"catalog-{self.number}"'
+
+def _now() -> datetime:
+    # HTTP dates have whole-second resolution; stored naive UTC like the
+    # other timestamps
+    return datetime.utcnow().replace(microsecond=0)
+
+def touch_catalog(db: Session) -> None:
+    """
+    Move the catalog version forward as part of the caller's transaction.
+    """
+    shard = random.randrange(settings.STATS_COUNTER_SHARDS)
+    increment(db, CatalogVersion, {"shard": shard}, {"version": 1}, {"updated_at": _now()})
+
+def catalog_version(db: Session) -> Version:
+    number, updated_at = db.query(func.sum(CatalogVersion.version), func.max(CatalogVersion.updated_at)).one()
+    last_modified = updated_at.replace(tzinfo=timezone.utc) if updated_at else None
+    return Version(int(number or 0), last_modified)
@@ -0,0 +1,136 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.booking import Booking, BookingStatus
+from app.models.flight import Flight
+from app.models.user import User
+from app.schemas.booking import ETicket
+from app.services import events
+from app.services.cache import MISSING, TTLCache
+from app.utils.conditional import etag_for
+
+# A confirmed booking's e-ticket only changes when its flight or passenger
+# changes, or when the booking is cancelled, so tickets are cached per booking
+# and dropped on those events. The ETag is derived from the ticket content.
+ticket_cache = TTLCache(
+    "e_tickets",
+    maxsize=settings.E_TICKET_CACHE_SIZE,
+    ttl=settings.E_TICKET_CACHE_TTL_SECONDS
+)
+
+@dataclass(frozen=True)
+class CachedTicket:
+    passenger_id: int
+    flight_id: int
+    ticket: ETicket
+    body: bytes
+    etag: str
+
+def build_e_ticket(booking: Booking, flight: Flight, passenger: User) -> CachedTicket:
+    ticket = ETicket(
+        booking_reference=booking.booking_reference,
+        passenger_name=passenger.full_name,
+        flight_number=flight.flight_number,
+        airline=flight.airline,
+        departure_city=flight.departure_city,
+        arrival_city=flight.arrival_city,
+        departure_time=flight.departure_time,
+        arrival_time=flight.arrival_time,
+        seat_number=booking.seat_number,
+        booking_date=booking.booking_date,
+        payment_amount=booking.payment_amount
+    )
+    body = ticket.model_dump_json().encode()
+    return CachedTicket(
+        passenger_id=booking.passenger_id,
+        flight_id=flight.id,
+        ticket=ticket,
+        body=body,
+        etag=etag_for(body)
+    )
+
+# What an e-ticket is built from, labelled as ETicket's fields
+TICKET_COLUMNS = (
+    Booking.booking_reference,
+    User.full_name.label("passenger_name"),
+    Flight.flight_number,
+    Flight.airline,
+    Flight.departure_city,
+    Flight.arrival_city,
+    Flight.departure_time,
+    Flight.arrival_time,
+    Booking.seat_number,
+    Booking.booking_date,
+    Booking.payment_amount,
+)
+
+def cached_e_ticket(db: Session, booking_id: int) -> Optional[CachedTicket]:
+    """
+    A booking's cached e-ticket, if it is still current. Changes made on
+    another worker or directly in SQL send no event here, so a hit is checked
+    against the booking, flight and passenger columns with one primary-key
+    read, and dropped if the booking is no longer confirmed or the ticket
+    would come out different.
+    """
+    cached = ticket_cache.get(booking_id)
+    if cached is MISSING:
+        return None
+    row = db.execute(
+        select(Booking.status, *TICKET_COLUMNS)
+        .join(Flight, Booking.flight_id == Flight.id)
+        .join(User, Booking.passenger_id == User.id)
+        .where(Booking.id == booking_id)
+    ).first()
+    if row is not None and row.status == BookingStatus.CONFIRMED:
+        current = dict(row._mapping)
+        del current["status"]
+        if ETicket(**current) == cached.ticket:
+            return cached
+    invalidate_booking(booking_id)
+    return None
+
+def e_ticket_for(booking: Booking, generation: int) -> CachedTicket:
+    """
+    Build a confirmed booking's e-ticket and cache it. Pass the cache
+    generation read before the booking was loaded.
+    """
+    ticket = build_e_ticket(booking, booking.flight, booking.passenger)
+    ticket_cache.set(booking.id, ticket, generation=generation)
+    return ticket
+
+def e_tickets_for_flight(db: Session, flight_id: int) -> List[CachedTicket]:
+    """
+    Every confirmed booking's e-ticket for a flight, from one joined query.
+    """
+    generation = ticket_cache.generation
+    rows = db.query(Booking, Flight, User).join(
+        Flight, Booking.flight_id == Flight.id
+    ).join(
+        User, Booking.passenger_id == User.id
+    ).filter(
+        Booking.flight_id == flight_id,
+        Booking.status == BookingStatus.CONFIRMED
+    ).order_by(Booking.seat_number, Booking.id).all()
+
+    tickets = []
+    for booking, flight, passenger in rows:
+        ticket = build_e_ticket(booking, flight, passenger)
+        ticket_cache.set(booking.id, ticket, generation=generation)
+        tickets.append(ticket)
+    return tickets
+
+def invalidate_booking(booking_id: int) -> None:
+    ticket_cache.invalidate(booking_id)
+
+def invalidate_passenger(passenger_id: int) -> None:
+    ticket_cache.invalidate_where(lambda booking_id, ticket: ticket.passenger_id == passenger_id)
+
+def _on_flight_changed(flight: events.FlightSnapshot) -> None:
+    ticket_cache.invalidate_where(lambda booking_id, ticket: ticket.flight_id == flight.id)
+
+events.subscribe(events.FLIGHT_CHANGED, _on_flight_changed)
+events.subscribe(events.CATALOG_RESET, ticket_cache.clear)
@@ -0,0 +1,71 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from app.models.flight import Flight
+
+logger = logging.getLogger(__name__)
+
+# In-process notifications for derived state (caches, indexes, counters) that
+# has to follow flight and inventory changes. Routes publish after commit.
+#
+#   flight_changed(snapshot)     a flight was created, updated or deactivated
+#   seats_changed(flight_id, n)  n seats were taken (< 0) or returned (> 0)
+#   catalog_reset()              many flights changed at once, rebuild everything
+FLIGHT_CHANGED = "flight_changed"
+SEATS_CHANGED = "seats_changed"
+CATALOG_RESET = "catalog_reset"
+
+_listeners: Dict[str, List[Callable]] = {
+    FLIGHT_CHANGED: [],
+    SEATS_CHANGED: [],
+    CATALOG_RESET: [],
+}
+
+@dataclass(frozen=True)
+class FlightSnapshot:
+    id: int
+    flight_number: str
+    airline: str
+    departure_city: str
+    arrival_city: str
+    departure_time: datetime
+    arrival_time: datetime
+    price: float
+    available_seats: int
+    is_active: bool
+
+def snapshot(flight: Flight) -> FlightSnapshot:
+    return FlightSnapshot(
+        id=flight.id,
+        flight_number=flight.flight_number,
+        airline=flight.airline,
+        departure_city=flight.departure_city,
+        arrival_city=flight.arrival_city,
+        departure_time=flight.departure_time,
+        arrival_time=flight.arrival_time,
+        price=flight.price,
+        available_seats=flight.available_seats,
+        is_active=flight.is_active
+    )
+
+def subscribe(event: str, listener: Callable) -> None:
+    _listeners[event].append(listener)
+
+def publish(event: str, *args) -> None:
+    # The change is already committed; a failing listener must not fail the request
+    for listener in _listeners[event]:
+        try:
+            listener(*args)
+        except Exception:
+            logger.exception(f"Listener {listener.__qualname__} failed for {event}")
+
+def flight_changed(flight: FlightSnapshot) -> None:
+    publish(FLIGHT_CHANGED, flight)
+
+def seats_changed(flight_id: int, delta: int) -> None:
+    publish(SEATS_CHANGED, flight_id, delta)
+
+def catalog_reset() -> None:
+    publish(CATALOG_RESET)
@@ -0,0 +1,65 @@
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import Select, select
+
+from app.models.booking import Booking, BookingStatus
+from app.models.flight import Flight
+from app.models.user import User
+
+# Column selects for finance and ground ops exports. They are streamed as flat
+# rows by app.utils.streaming.export_response, so none of them load ORM objects.
+
+def bookings_export(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    flight_id: Optional[int] = None,
+    status: Optional[BookingStatus] = None
+) -> Select:
+    statement = select(
+        Booking.id,
+        Booking.booking_reference,
+        Booking.booking_date,
+        Booking.status,
+        Booking.payment_status,
+        Booking.payment_id,
+        Booking.payment_amount,
+        Booking.seat_number,
+        Booking.flight_id,
+        Flight.flight_number,
+        Flight.airline,
+        Flight.departure_city,
+        Flight.arrival_city,
+        Flight.departure_time,
+        Booking.passenger_id,
+        User.full_name.label("passenger_name"),
+        User.email.label("passenger_email")
+    ).join(Flight, Booking.flight_id == Flight.id).outerjoin(User, Booking.passenger_id == User.id)
+    # Bookings outlive deleted passenger accounts; their passenger columns are empty
+
+    # Dates are inclusive on both ends
+    if start_date:
+        statement = statement.where(Booking.booking_date >= datetime.combine(start_date, datetime.min.time()))
+    if end_date:
+        statement = statement.where(Booking.booking_date < datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+    if flight_id is not None:
+        statement = statement.where(Booking.flight_id == flight_id)
+    if status is not None:
+        statement = statement.where(Booking.status == status)
+    return statement.order_by(Booking.id)
+
+def flight_manifest(flight_id: int) -> Select:
+    # Every seat held on the flight, in seat order, including seats whose
+    # passenger account was deleted
+    return select(
+        Booking.seat_number,
+        Booking.booking_reference,
+        User.full_name.label("passenger_name"),
+        User.email.label("passenger_email"),
+        User.phone.label("passenger_phone"),
+        Booking.status,
+        Booking.payment_status
+    ).outerjoin(User, Booking.passenger_id == User.id).where(
+        Booking.flight_id == flight_id,
+        Booking.status != BookingStatus.CANCELLED
+    ).order_by(Booking.seat_number, Booking.id)
@@ -0,0 +1,198 @@
+import csv
+import io
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import IO, Iterable, Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.flight import Flight
+from app.schemas.flight import FlightCreate
+from app.services.catalog_version import touch_catalog
+from app.services.events import catalog_reset
+from app.services.stats import FLIGHTS_ACTIVE, FLIGHTS_TOTAL, bump
+
+# Bulk schedule import. Rows are parsed lazily from the upload, validated and
+# inserted one chunk at a time with a single executemany INSERT, and every
+# chunk is committed on its own so a bad row never throws away earlier work.
+# Seat maps are not written here: they are created on first use, sized from
+# the flight's inventory exactly as POST /flights/ would.
+IMPORT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+FORMATS = ("csv", "ndjson")
+
+Row = Tuple[int, dict]
+
+class ImportFileError(Exception):
+    pass
+
+@dataclass
+class ImportResult:
+    inserted: int = 0
+    failed: int = 0
+    errors: List[dict] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        processed = self.inserted + self.failed
+        return processed / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def reject(self, row: int, error: str) -> None:
+        self.failed += 1
+        # The count stays exact; only the details are capped
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": error})
+
+def detect_format(filename: str) -> str:
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    if extension in ("ndjson", "jsonl"):
+        return "ndjson"
+    return "csv"
+
+def iter_rows(stream: IO[bytes], format: str) -> Iterator[Row]:
+    """
+    Yield (row number, fields) from a binary CSV or NDJSON stream without
+    reading it into memory. Row numbers count data rows from 1.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unsupported import format {format!r}, expected one of {', '.join(FORMATS)}")
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if format == "csv":
+        for number, record in enumerate(csv.DictReader(text), start=1):
+            # Empty cells fall back to the schema defaults
+            yield number, {key: value for key, value in record.items() if key and value not in ("", None)}
+        return
+    number = 0
+    for line in text:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            record = e
+        yield number, record
+
+def _error_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+def _validate(batch: List[Row], result: ImportResult) -> List[Tuple[int, dict]]:
+    valid = []
+    for number, record in batch:
+        if not isinstance(record, dict):
+            result.reject(number, f"invalid JSON: {record}" if isinstance(record, ValueError) else "expected an object")
+            continue
+        try:
+            flight = FlightCreate.model_validate(record)
+        except ValidationError as e:
+            result.reject(number, _error_message(e))
+            continue
+        valid.append((number, flight.model_dump()))
+    return valid
+
+def _insert_batch(db: Session, batch: List[Row], seen: set, result: ImportResult) -> None:
+    valid = _validate(batch, result)
+
+    # One lookup per chunk instead of a uniqueness query per row
+    numbers = [values["flight_number"] for _, values in valid]
+    existing = {
+        number for (number,) in db.query(Flight.flight_number).filter(Flight.flight_number.in_(numbers))
+    } if numbers else set()
+
+    rows = []
+    for number, values in valid:
+        flight_number = values["flight_number"]
+        if flight_number in existing:
+            result.reject(number, f"Flight with number {flight_number} already exists")
+        elif flight_number in seen:
+            result.reject(number, f"Flight number {flight_number} appears more than once in the file")
+        else:
+            seen.add(flight_number)
+            rows.append((number, values))
+
+    try:
+        _insert_rows(db, [values for _, values in rows])
+        result.inserted += len(rows)
+    except IntegrityError:
+        # Another writer added one of these flight numbers after the lookup
+        # above; retry the chunk a row at a time to keep the rest of it
+        db.rollback()
+        for number, values in rows:
+            try:
+                _insert_rows(db, [values])
+                result.inserted += 1
+            except IntegrityError:
+                db.rollback()
+                result.reject(number, f"Flight with number {values['flight_number']} already exists")
+
+def _insert_rows(db: Session, rows: List[dict]) -> None:
+    if rows:
+        db.execute(insert(Flight), rows)
+        bump(db, {FLIGHTS_TOTAL: len(rows), FLIGHTS_ACTIVE: sum(1 for values in rows if values["is_active"])})
+        touch_catalog(db)
+    db.commit()
+
+def import_flights(db: Session, rows: Iterable[Row], batch_size: int = IMPORT_BATCH_SIZE) -> ImportResult:
+    """
+    Insert flights from parsed rows in chunked transactions, collecting per-row errors.
+    Raises ImportFileError if the file cannot be decoded; chunks before the
+    bad data stay imported.
+    """
+    result = ImportResult()
+    seen = set()
+    start = time.perf_counter()
+    batch = []
+    try:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                _insert_batch(db, batch, seen, result)
+                batch = []
+        if batch:
+            _insert_batch(db, batch, seen, result)
+    except UnicodeDecodeError as e:
+        raise ImportFileError(
+            f"The file is not valid UTF-8 ({e.reason}); "
+            f"{result.inserted} flights from earlier chunks were imported"
+        ) from e
+    finally:
+        result.elapsed_seconds = time.perf_counter() - start
+        result.errors.sort(key=lambda error: error["row"])
+        # The search cache and route graph rebuild from the new catalog
+        if result.inserted:
+            catalog_reset()
+    return result
+
+if __name__ == "__main__":
+    # Import job: python -m app.services.flight_import schedule.csv [batch size]
+    if len(sys.argv) not in (2, 3):
+        print("usage: python -m app.services.flight_import <file.csv|file.ndjson> [batch size]")
+        sys.exit(2)
+
+    from app.database import Base, SessionLocal, engine
+    import app.models
+
+    Base.metadata.create_all(bind=engine)
+    path = sys.argv[1]
+    batch_size = int(sys.argv[2]) if len(sys.argv) == 3 else IMPORT_BATCH_SIZE
+    with open(path, "rb") as stream, SessionLocal() as db:
+        try:
+            result = import_flights(db, iter_rows(stream, detect_format(path)), batch_size)
+        except ImportFileError as e:
+            print(e)
+            sys.exit(1)
+    for error in result.errors:
+        print(f"row {error['row']}: {error['error']}")
+    print(
+        f"Imported {result.inserted} flights, rejected {result.failed} rows "
+        f"in {result.elapsed_seconds:.2f}s ({result.rows_per_second:.0f} rows/s)"
+    )
@@ -0,0 +1,76 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.flight import Flight
+from app.schemas.flight import Flight as FlightSchema, FlightSearch
+from app.services import events
+from app.services.cache import MISSING, TTLCache
+
+search_cache = TTLCache(
+    "flight_search",
+    maxsize=settings.SEARCH_CACHE_SIZE,
+    ttl=settings.SEARCH_CACHE_TTL_SECONDS
+)
+
+SearchKey = Tuple[Optional[str], Optional[str], Optional[str]]
+
+def normalize(search: FlightSearch) -> SearchKey:
+    # Mirrors the filters below: empty values are ignored, only the date part is used
+    return (
+        search.departure_city or None,
+        search.arrival_city or None,
+        search.departure_date.date().isoformat() if search.departure_date else None
+    )
+
+def query_flights(db: Session, search: FlightSearch) -> List[Flight]:
+    query = db.query(Flight).filter(Flight.is_active == True)
+    
+    if search.departure_city:
+        query = query.filter(Flight.departure_city == search.departure_city)
+    
+    if search.arrival_city:
+        query = query.filter(Flight.arrival_city == search.arrival_city)
+    
+    if search.departure_date:
+        # Extract date only for comparison
+        departure_date = search.departure_date.date()
+        query = query.filter(Flight.departure_time >= datetime.combine(departure_date, datetime.min.time()))
+        query = query.filter(Flight.departure_time < datetime.combine(departure_date, datetime.max.time()))
+    
+    return query.all()
+
+def search_flights(db: Session, search: FlightSearch) -> List[Dict[str, Any]]:
+    key = normalize(search)
+    cached = search_cache.get(key)
+    if cached is not MISSING:
+        return cached
+    
+    generation = search_cache.generation
+    results = [FlightSchema.model_validate(flight, from_attributes=True).model_dump() for flight in query_flights(db, search)]
+    # Tagged with the flights in them, so a seat change drops only those searches
+    search_cache.set(key, results, generation=generation, tags=[result["id"] for result in results])
+    return results
+
+def _matches(key: SearchKey, flight: events.FlightSnapshot) -> bool:
+    departure_city, arrival_city, departure_date = key
+    return (
+        (departure_city is None or departure_city == flight.departure_city)
+        and (arrival_city is None or arrival_city == flight.arrival_city)
+        and (departure_date is None or departure_date == flight.departure_time.date().isoformat())
+    )
+
+def _on_flight_changed(flight: events.FlightSnapshot) -> None:
+    # Drop results the flight was in (old route/time) and searches it now
+    # matches. Only staff edits a flight, so scanning for matches is fine here
+    search_cache.invalidate_tag(flight.id)
+    search_cache.invalidate_where(lambda key, results: _matches(key, flight))
+
+def _on_seats_changed(flight_id: int, delta: int) -> None:
+    search_cache.invalidate_tag(flight_id)
+
+events.subscribe(events.FLIGHT_CHANGED, _on_flight_changed)
+events.subscribe(events.SEATS_CHANGED, _on_seats_changed)
+events.subscribe(events.CATALOG_RESET, search_cache.clear)
@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.booking import Booking, BookingStatus
+from app.services.events import seats_changed
+from app.services.inventory import release_seats
+from app.services.seat_map import release_seat_numbers
+from app.services.stats import bookings_by_status, bump
+
+logger = logging.getLogger(__name__)
+
+# A PENDING booking holds its seat for BOOKING_HOLD_MINUTES. Payment is refused
+# once the hold has expired, and the sweeper only cancels holds that expired
+# more than HOLD_SWEEP_GRACE_SECONDS ago, so a payment that was already at the
+# gateway when the hold ran out can still finish first.
+
+def hold_expires_at(booking_date: datetime) -> datetime:
+    return booking_date + timedelta(minutes=settings.BOOKING_HOLD_MINUTES)
+
+def hold_expired(booking: Booking, now: Optional[datetime] = None) -> bool:
+    return booking.status == BookingStatus.PENDING and hold_expires_at(booking.booking_date) <= (now or datetime.utcnow())
+
+def expire_batch(db: Session, cutoff: datetime, batch_size: int) -> Dict[int, int]:
+    """
+    Cancel up to `batch_size` PENDING bookings made before `cutoff` and return
+    their seats, in one transaction. Returns seats reclaimed per flight.
+    """
+    # Served by ix_bookings_status_booking_date
+    rows = db.execute(
+        select(Booking.id, Booking.flight_id, Booking.seat_number)
+        .where(Booking.status == BookingStatus.PENDING, Booking.booking_date < cutoff)
+        .order_by(Booking.booking_date)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not rows:
+        return {}
+
+    result = db.execute(
+        update(Booking)
+        .where(Booking.id.in_([row.id for row in rows]), Booking.status == BookingStatus.PENDING)
+        .values(status=BookingStatus.CANCELLED)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(rows):
+        # Something else (a payment) changed one of them; try again next round
+        db.rollback()
+        return {}
+
+    seats = defaultdict(list)
+    for row in rows:
+        seats[row.flight_id].append(row.seat_number)
+    for flight_id, seat_numbers in seats.items():
+        release_seats(db, flight_id, len(seat_numbers))
+        release_seat_numbers(db, flight_id, seat_numbers)
+    bump(db, {bookings_by_status(BookingStatus.PENDING): -len(rows), bookings_by_status(BookingStatus.CANCELLED): len(rows)})
+    db.commit()
+
+    for flight_id, seat_numbers in seats.items():
+        seats_changed(flight_id, len(seat_numbers))
+    return {flight_id: len(seat_numbers) for flight_id, seat_numbers in seats.items()}
+
+@dataclass
+class SweepResult:
+    seats_reclaimed: int = 0
+    # Set when a batch failed; the sweep stopped there and the rest is left
+    # for the next one
+    error: Optional[str] = None
+
+class HoldSweeper:
+    """
+    Periodically cancels expired seat holds in bounded batches. Each sweep
+    runs in a worker thread so the event loop keeps serving requests, and
+    keeps counters for the admin API.
+    """
+
+    def __init__(self, interval: float, batch_size: int, max_batches: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self.sweeps = 0
+        self.seats_reclaimed = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.last_sweep_at: Optional[datetime] = None
+        self.last_sweep_seconds = 0.0
+        self.last_sweep_reclaimed = 0
+
+    def sweep(self, session_factory, now: Optional[datetime] = None) -> SweepResult:
+        """
+        Expire every hold past its grace period, batch by batch. A batch that
+        fails on a database error (a lock timeout, a lost connection) is rolled
+        back and ends the sweep; the seats reclaimed so far are still reported.
+        """
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(minutes=settings.BOOKING_HOLD_MINUTES, seconds=settings.HOLD_SWEEP_GRACE_SECONDS)
+        start = time.perf_counter()
+        result = SweepResult()
+        for _ in range(self.max_batches):
+            with session_factory() as db:
+                try:
+                    by_flight = expire_batch(db, cutoff, self.batch_size)
+                except SQLAlchemyError as e:
+                    db.rollback()
+                    # The driver's message, without the statement attached to it
+                    result.error = f"{type(e).__name__}: {getattr(e, 'orig', None) or e}"
+                    logger.warning(f"Hold sweeper batch failed, retrying next sweep: {result.error}")
+                    break
+            batch = sum(by_flight.values())
+            result.seats_reclaimed += batch
+            if batch < self.batch_size:
+                break
+        with self._lock:
+            self.sweeps += 1
+            self.seats_reclaimed += result.seats_reclaimed
+            if result.error is not None:
+                self.errors += 1
+                self.last_error = result.error
+            self.last_sweep_at = now
+            self.last_sweep_seconds = time.perf_counter() - start
+            self.last_sweep_reclaimed = result.seats_reclaimed
+        return result
+
+    async def _run(self, session_factory):
+        while True:
+            try:
+                result = await asyncio.to_thread(self.sweep, session_factory)
+                if result.seats_reclaimed:
+                    logger.info(f"Hold sweeper reclaimed {result.seats_reclaimed} seats")
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                logger.exception("Hold sweeper failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self, session_factory) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run(session_factory))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "running": self._task is not None,
+                "hold_minutes": settings.BOOKING_HOLD_MINUTES,
+                "interval_seconds": self.interval,
+                "batch_size": self.batch_size,
+                "sweeps": self.sweeps,
+                "seats_reclaimed": self.seats_reclaimed,
+                "errors": self.errors,
+                "last_error": self.last_error,
+                "last_sweep_at": self.last_sweep_at,
+                "last_sweep_seconds": self.last_sweep_seconds,
+                "last_sweep_reclaimed": self.last_sweep_reclaimed,
+            }
+
+hold_sweeper = HoldSweeper(
+    interval=settings.HOLD_SWEEP_INTERVAL_SECONDS,
+    batch_size=settings.HOLD_SWEEP_BATCH_SIZE,
+    max_batches=settings.HOLD_SWEEP_MAX_BATCHES
+)
+
+if __name__ == "__main__":
+    # One-off sweep: python -m app.services.hold_sweeper sweep
+    if sys.argv[1:] != ["sweep"]:
+        print("usage: python -m app.services.hold_sweeper sweep")
+        sys.exit(2)
+
+    from app.database import Base, SessionLocal, engine
+    import app.models
+
+    Base.metadata.create_all(bind=engine)
+    result = hold_sweeper.sweep(SessionLocal)
+    print(f"Expired {result.seats_reclaimed} unpaid bookings and reclaimed their seats")
+    if result.error is not None:
+        print(f"Stopped early: {result.error}")
+        sys.exit(1)
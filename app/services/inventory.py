@@ -0,0 +1,45 @@
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.flight import Flight
+from app.services.catalog_version import touch_catalog
+
+# Seat inventory is only ever changed with single conditional UPDATE statements.
+# The database applies the check and the decrement atomically, so concurrent
+# bookings can never oversell a flight and no row is read and written back.
+
+def reserve_seats(db: Session, flight_id: int, count: int = 1) -> bool:
+    """
+    Atomically take `count` seats from an active flight.
+    Returns False when the flight does not have enough seats left (sold out).
+    The change joins the caller's transaction and is applied on commit.
+    """
+    result = db.execute(
+        update(Flight)
+        .where(
+            Flight.id == flight_id,
+            Flight.is_active == True,
+            Flight.available_seats >= count
+        )
+        .values(available_seats=Flight.available_seats - count)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return False
+    touch_catalog(db)
+    return True
+
+def release_seats(db: Session, flight_id: int, count: int = 1) -> bool:
+    """
+    Atomically return `count` seats to a flight's inventory.
+    """
+    result = db.execute(
+        update(Flight)
+        .where(Flight.id == flight_id)
+        .values(available_seats=Flight.available_seats + count)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return False
+    touch_catalog(db)
+    return True
@@ -0,0 +1,115 @@
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+class HasherBusyError(Exception):
+    pass
+
+# Run inside the worker processes
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a pool of worker processes so hashing uses every core and
+    never holds up request threads. At most `workers` hashes run at once and
+    `queue_depth` more may wait; anything beyond that is rejected immediately
+    with HasherBusyError instead of queueing without bound.
+    With `workers` set to 0, hashing runs inline in the calling thread.
+    Request handlers use the async variants, which wait for the pool without
+    holding a server thread, so the queue bound is what limits waiting logins.
+    """
+
+    def __init__(self, workers: int, queue_depth: int):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self._slots = threading.BoundedSemaphore(workers + queue_depth) if workers else None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _admit(self) -> None:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HasherBusyError("Password hashing queue is full")
+
+    def _done(self) -> None:
+        with self._lock:
+            self.completed += 1
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        self._admit()
+        try:
+            result = self._get_pool().submit(fn, *args).result()
+            self._done()
+            return result
+        finally:
+            self._slots.release()
+
+    async def _run_async(self, fn, *args):
+        if not self.workers:
+            return await run_in_threadpool(fn, *args)
+        self._admit()
+        try:
+            result = await asyncio.wrap_future(self._get_pool().submit(fn, *args))
+            self._done()
+            return result
+        finally:
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password)
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return self._run(_verify, plain_password, hashed_password)
+
+    async def hash_async(self, password: str) -> str:
+        return await self._run_async(_hash, password)
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run_async(_verify, plain_password, hashed_password)
+
+    def start(self) -> None:
+        # Start the worker processes ahead of the first login, while the
+        # server has few threads to copy into them
+        if self.workers:
+            pool = self._get_pool()
+            for future in [pool.submit(int) for _ in range(self.workers)]:
+                future.result()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_DEPTH)
\ No newline at end of file
@@ -1,12 +1,17 @@
+import random
 import uuid
 from app.config import settings
 from app.models.booking import PaymentStatus
+from app.services.payment_gateway import GatewayResponseError, payment_gateway
 
-# Mock payment gateway integration
-async def process_payment(amount: float, card_number: str, expiry_date: str, cvv: str):
-    # In a real-world scenario, this would call an external payment gateway API
-    # For this mock implementation, we'll simulate a successful payment for most cases
-    
+# Payment gateway integration. Calls go to PAYMENT_GATEWAY_URL through the
+# pooled client in app.services.payment_gateway; with PAYMENT_GATEWAY_MOCK
+# (the default) they are answered in process instead. Both raise
+# PaymentGatewayError when the gateway cannot be reached, and its subclasses
+# GatewayRejectedError when it refuses the request and GatewayResponseError
+# when its answer cannot be read.
+
+def mock_charge(amount: float, card_number: str, expiry_date: str, cvv: str):
     # Mock validation
     if len(card_number) < 13 or len(card_number) > 19:
         return {"status": PaymentStatus.FAILED, "payment_id": None, "message": "Invalid card number"}
@@ -14,15 +19,11 @@ async def process_payment(amount: float, card_number: str, expiry_date: str, cvv
     if len(cvv) != 3:
         return {"status": PaymentStatus.FAILED, "payment_id": None, "message": "Invalid CVV"}
     
-    # Generate payment ID (normally would come from payment gateway)
-    payment_id = f"PAY-{uuid.uuid4().hex[:12].upper()}"
-    
     # Mock success/failure (95% success rate for demo)
-    import random
     if random.random() < 0.95:
         return {
             "status": PaymentStatus.COMPLETED,
-            "payment_id": payment_id,
+            "payment_id": f"PAY-{uuid.uuid4().hex[:12].upper()}",
             "message": "Payment processed successfully"
         }
     else:
@@ -32,11 +33,40 @@ async def process_payment(amount: float, card_number: str, expiry_date: str, cvv
             "message": "Payment processing failed. Please try again."
         }
 
-async def refund_payment(payment_id: str):
-    # Mock refund process
-    # In a real-world scenario, this would call the payment gateway's refund API
+def mock_refund(payment_id: str):
     return {
         "status": PaymentStatus.REFUNDED,
         "payment_id": payment_id,
         "message": "Refund processed successfully"
-    }
\ No newline at end of file
+    }
+
+def _result(response: dict):
+    try:
+        payment_status = PaymentStatus(response["status"])
+        payment_id = response.get("payment_id")
+        message = response.get("message", "")
+    except (AttributeError, KeyError, TypeError, ValueError):
+        raise GatewayResponseError(f"Payment gateway sent an invalid response: {str(response)[:200]}")
+    if payment_status == PaymentStatus.COMPLETED and not payment_id:
+        # Without the id the charge could never be refunded
+        raise GatewayResponseError("Payment gateway reported a completed payment without a payment_id")
+    return {"status": payment_status, "payment_id": payment_id, "message": message}
+
+async def process_payment(amount: float, card_number: str, expiry_date: str, cvv: str):
+    if settings.PAYMENT_GATEWAY_MOCK:
+        return mock_charge(amount, card_number, expiry_date, cvv)
+    
+    response = await payment_gateway.post(settings.PAYMENT_GATEWAY_URL, {
+        "amount": amount,
+        "card_number": card_number,
+        "expiry_date": expiry_date,
+        "cvv": cvv
+    })
+    return _result(response)
+
+async def refund_payment(payment_id: str):
+    if settings.PAYMENT_GATEWAY_MOCK:
+        return mock_refund(payment_id)
+    
+    response = await payment_gateway.post(settings.PAYMENT_GATEWAY_REFUND_URL, {"payment_id": payment_id})
+    return _result(response)
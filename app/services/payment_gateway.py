@@ -0,0 +1,216 @@
+import asyncio
+import random
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+import httpx
+
+from app.config import settings
+
+class PaymentGatewayError(Exception):
+    pass
+
+class CircuitOpenError(PaymentGatewayError):
+    pass
+
+class GatewayResponseError(PaymentGatewayError):
+    # The gateway answered, but not with a response we can read
+    pass
+
+class GatewayRejectedError(PaymentGatewayError):
+    # The gateway refused the request (4xx); sending it again will not help
+    pass
+
+# Worth another attempt: the gateway was overloaded or briefly unavailable
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+class CircuitBreaker:
+    """
+    Stops calling a failing gateway. After `threshold` consecutive failures the
+    circuit opens and calls fail immediately for `reset_timeout` seconds; then
+    a single trial call is let through, and its outcome closes or reopens it.
+    """
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return "open"
+            return "half-open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def release_trial(self) -> None:
+        # The trial call ended without an outcome; let the next call try
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or (self._opened_at is None and self._failures >= self.threshold):
+                self.trips += 1
+                self._opened_at = time.monotonic()
+                self._trial_running = False
+
+class PaymentGatewayClient:
+    """
+    Async client for the payment gateway. Requests share a keep-alive
+    connection pool, at most `max_concurrency` are in flight at once, and
+    transient failures (timeouts, connection errors, 429 and 5xx gateway
+    responses) are retried with exponential backoff and full jitter.
+    Every attempt of one logical call carries the same Idempotency-Key, so a
+    retried charge is never taken twice.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        timeout: float,
+        connect_timeout: float,
+        max_concurrency: int,
+        max_retries: int,
+        backoff: float,
+        breaker: CircuitBreaker
+    ):
+        self.api_key = api_key
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.requests = 0
+        self.retries = 0
+        self.rejected = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # The pool belongs to the event loop it was created on
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                ),
+                headers={"Authorization": f"Bearer {self.api_key}"}
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+
+    def _delay(self, attempt: int) -> float:
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    async def post(self, url: str, payload: Dict) -> Dict:
+        """
+        POST a JSON payload and return the decoded response. Raises
+        CircuitOpenError without calling the gateway while the circuit is
+        open, PaymentGatewayError once retries are exhausted,
+        GatewayRejectedError if the gateway answers 4xx and
+        GatewayResponseError if its answer is not JSON.
+        """
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError("Payment gateway is unavailable, please try again shortly")
+
+        try:
+            result = await self._post_with_retries(url, payload)
+        except PaymentGatewayError:
+            raise
+        except asyncio.CancelledError:
+            # The client went away: that says nothing about the gateway, but a
+            # trial call must not leave the circuit half-open forever
+            self.breaker.release_trial()
+            raise
+        except BaseException:
+            # Unexpected errors count against the gateway like failed attempts
+            self.breaker.record_failure()
+            raise
+        return result
+
+    async def _post_with_retries(self, url: str, payload: Dict) -> Dict:
+        client = self._get_client()
+        headers = {"Idempotency-Key": uuid.uuid4().hex}
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.retries += 1
+                await asyncio.sleep(self._delay(attempt - 1))
+            try:
+                async with self._semaphore:
+                    self.requests += 1
+                    response = await client.post(url, json=payload, headers=headers)
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {e}"
+                continue
+            if response.status_code in RETRYABLE_STATUS_CODES or response.status_code >= 500:
+                error = f"gateway answered {response.status_code}"
+                continue
+            self.breaker.record_success()
+            if response.status_code >= 400:
+                raise GatewayRejectedError(f"Payment gateway rejected the request ({response.status_code})")
+            try:
+                return response.json()
+            except ValueError:
+                raise GatewayResponseError("Payment gateway sent a response that is not JSON")
+
+        self.breaker.record_failure()
+        raise PaymentGatewayError(f"Payment gateway failed after {self.max_retries + 1} attempts: {error}")
+
+    def stats(self) -> Dict:
+        return {
+            "circuit": self.breaker.state,
+            "trips": self.breaker.trips,
+            "requests": self.requests,
+            "retries": self.retries,
+            "rejected": self.rejected
+        }
+
+payment_gateway = PaymentGatewayClient(
+    api_key=settings.PAYMENT_API_KEY,
+    timeout=settings.PAYMENT_GATEWAY_TIMEOUT_SECONDS,
+    connect_timeout=settings.PAYMENT_GATEWAY_CONNECT_TIMEOUT_SECONDS,
+    max_concurrency=settings.PAYMENT_GATEWAY_MAX_CONCURRENCY,
+    max_retries=settings.PAYMENT_GATEWAY_MAX_RETRIES,
+    backoff=settings.PAYMENT_GATEWAY_RETRY_BACKOFF_SECONDS,
+    breaker=CircuitBreaker(
+        threshold=settings.PAYMENT_GATEWAY_BREAKER_THRESHOLD,
+        reset_timeout=settings.PAYMENT_GATEWAY_BREAKER_RESET_SECONDS
+    )
+)
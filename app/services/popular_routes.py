@@ -0,0 +1,201 @@
+import heapq
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, event, func, insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.booking import Booking, BookingStatus
+from app.models.flight import Flight
+from app.models.route_stats import RouteHourlyStat, RouteStat
+from app.utils.upsert import increment
+
+Route = Tuple[str, str]
+
+# Number of routes kept in each cached ranking; larger limits recompute
+TOP_CACHE_SIZE = 100
+
+def floor_hour(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+def window_start(hours: int) -> datetime:
+    return floor_hour(datetime.utcnow() - timedelta(hours=hours))
+
+class PopularRoutes:
+    """
+    In-memory confirmed-booking counts per route, all-time and per hour for the
+    configured window. Rankings are computed with a bounded heap and cached
+    until the next change, so repeated reads are a dictionary lookup.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Counter = Counter()
+        self._hourly: Dict[datetime, Counter] = defaultdict(Counter)
+        self._rankings: Dict[Tuple, List[Tuple[Route, int]]] = {}
+        self.loaded_at: Optional[float] = None
+
+    def load(self, totals: Dict[Route, int], hourly: Dict[datetime, Counter]) -> None:
+        with self._lock:
+            self._totals = Counter(totals)
+            self._hourly = defaultdict(Counter, hourly)
+            self._rankings.clear()
+            self.loaded_at = time.monotonic()
+
+    def is_fresh(self) -> bool:
+        return (
+            self.loaded_at is not None
+            and time.monotonic() - self.loaded_at < settings.POPULAR_ROUTES_REFRESH_SECONDS
+        )
+
+    def apply(self, route: Route, hour: datetime, delta: int) -> None:
+        with self._lock:
+            self._totals[route] += delta
+            if hour >= window_start(settings.POPULAR_ROUTES_MAX_WINDOW_HOURS):
+                self._hourly[hour][route] += delta
+            self._rankings.clear()
+
+    def top(self, limit: int, hours: Optional[int] = None) -> List[Tuple[Route, int]]:
+        size = max(limit, TOP_CACHE_SIZE)
+        # Windowed rankings also go stale when the clock moves to the next hour
+        key = (hours, floor_hour(datetime.utcnow()) if hours else None)
+        with self._lock:
+            ranking = self._rankings.get(key)
+            if ranking is None or (len(ranking) < limit and len(ranking) == size):
+                if hours:
+                    start = window_start(hours)
+                    counts = Counter()
+                    for hour, routes in self._hourly.items():
+                        if hour >= start:
+                            counts.update(routes)
+                else:
+                    counts = self._totals
+                ranking = heapq.nlargest(
+                    size,
+                    ((route, count) for route, count in counts.items() if count > 0),
+                    key=lambda item: item[1]
+                )
+                self._rankings[key] = ranking
+            return ranking[:limit]
+
+tracker = PopularRoutes()
+
+_PENDING = "popular_route_deltas"
+
+def record(db: Session, flight: Flight, booking_date: datetime, delta: int) -> None:
+    """
+    Count a booking confirmation (+1) or cancellation of a confirmed booking (-1)
+    for the flight's route. The persisted counters change in the caller's
+    transaction; the in-memory tracker follows once it commits.
+    """
+    route = (flight.departure_city, flight.arrival_city)
+    hour = floor_hour(booking_date)
+    increment(db, RouteStat, {"departure_city": route[0], "arrival_city": route[1]}, {"bookings": delta})
+    if hour >= window_start(settings.POPULAR_ROUTES_MAX_WINDOW_HOURS):
+        increment(
+            db,
+            RouteHourlyStat,
+            {"hour": hour, "departure_city": route[0], "arrival_city": route[1]},
+            {"bookings": delta}
+        )
+    db.info.setdefault(_PENDING, []).append((route, hour, delta))
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed(session):
+    for route, hour, delta in session.info.pop(_PENDING, []):
+        tracker.apply(route, hour, delta)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop(_PENDING, None)
+
+def rebuild(db: Session) -> int:
+    """
+    Recompute the persisted route counters from confirmed bookings.
+    Returns the number of routes.
+    """
+    totals = db.query(
+        Flight.departure_city, Flight.arrival_city, func.count(Booking.id)
+    ).join(
+        Booking, Booking.flight_id == Flight.id
+    ).filter(
+        Booking.status == BookingStatus.CONFIRMED
+    ).group_by(
+        Flight.departure_city, Flight.arrival_city
+    ).all()
+
+    hourly = Counter()
+    recent = db.query(Booking.booking_date, Flight.departure_city, Flight.arrival_city).join(
+        Flight, Booking.flight_id == Flight.id
+    ).filter(
+        Booking.status == BookingStatus.CONFIRMED,
+        Booking.booking_date >= window_start(settings.POPULAR_ROUTES_MAX_WINDOW_HOURS)
+    )
+    for booking_date, departure_city, arrival_city in recent.yield_per(1000):
+        hourly[(floor_hour(booking_date), departure_city, arrival_city)] += 1
+
+    db.execute(delete(RouteStat))
+    db.execute(delete(RouteHourlyStat))
+    if totals:
+        db.execute(insert(RouteStat), [
+            {"departure_city": departure_city, "arrival_city": arrival_city, "bookings": count}
+            for departure_city, arrival_city, count in totals
+        ])
+    if hourly:
+        db.execute(insert(RouteHourlyStat), [
+            {"hour": hour, "departure_city": departure_city, "arrival_city": arrival_city, "bookings": count}
+            for (hour, departure_city, arrival_city), count in hourly.items()
+        ])
+    db.commit()
+    return len(totals)
+
+def refresh(db: Session) -> None:
+    # Reload from the persisted counters, which include other workers' changes
+    cutoff = window_start(settings.POPULAR_ROUTES_MAX_WINDOW_HOURS)
+    db.execute(delete(RouteHourlyStat).where(RouteHourlyStat.hour < cutoff))
+    db.commit()
+
+    totals = {
+        (departure_city, arrival_city): count
+        for departure_city, arrival_city, count in db.query(
+            RouteStat.departure_city, RouteStat.arrival_city, RouteStat.bookings
+        )
+    }
+    if not totals and db.query(Booking.id).filter(Booking.status == BookingStatus.CONFIRMED).first():
+        # Counters were never built for existing data
+        rebuild(db)
+        return refresh(db)
+
+    hourly = defaultdict(Counter)
+    for hour, departure_city, arrival_city, count in db.query(
+        RouteHourlyStat.hour, RouteHourlyStat.departure_city, RouteHourlyStat.arrival_city, RouteHourlyStat.bookings
+    ):
+        hourly[hour][(departure_city, arrival_city)] += count
+    tracker.load(totals, hourly)
+
+def popular_routes(db: Session, limit: int, hours: Optional[int] = None) -> List[Dict]:
+    if not tracker.is_fresh():
+        refresh(db)
+    return [
+        {"departure_city": departure_city, "arrival_city": arrival_city, "booking_count": count}
+        for (departure_city, arrival_city), count in tracker.top(limit, hours)
+    ]
+
+if __name__ == "__main__":
+    # Rebuild job: python -m app.services.popular_routes rebuild
+    if sys.argv[1:] != ["rebuild"]:
+        print("usage: python -m app.services.popular_routes rebuild")
+        sys.exit(2)
+
+    from app.database import Base, SessionLocal, engine
+    import app.models
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        routes = rebuild(db)
+    print(f"Rebuilt counters for {routes} routes")
@@ -0,0 +1,198 @@
+import sys
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, extract, func, insert
+from sqlalchemy.orm import Query, Session
+
+from app.models.booking import Booking, PaymentStatus
+from app.models.flight import Flight
+from app.models.revenue import DailyRevenue
+from app.utils.upsert import increment
+
+# Revenue is rolled up per booking date, route and airline when a payment
+# completes or is refunded, so reports read a few hundred rows at most.
+
+def record_payment(db: Session, booking: Booking, flight: Flight) -> None:
+    _add(db, booking, flight, 1)
+
+def record_refund(db: Session, booking: Booking, flight: Flight) -> None:
+    _add(db, booking, flight, -1)
+
+def record_payments(db: Session, bookings: List[Booking], flight: Flight) -> None:
+    # One bucket update per booking day instead of one per booking
+    by_day = defaultdict(lambda: [0.0, 0])
+    for booking in bookings:
+        bucket = by_day[booking.booking_date.date()]
+        bucket[0] += booking.payment_amount
+        bucket[1] += 1
+    for day, (revenue, count) in by_day.items():
+        increment(
+            db,
+            DailyRevenue,
+            {
+                "date": day,
+                "departure_city": flight.departure_city,
+                "arrival_city": flight.arrival_city,
+                "airline": flight.airline,
+            },
+            {"revenue": revenue, "bookings": count}
+        )
+
+def _add(db: Session, booking: Booking, flight: Flight, sign: int) -> None:
+    increment(
+        db,
+        DailyRevenue,
+        {
+            "date": booking.booking_date.date(),
+            "departure_city": flight.departure_city,
+            "arrival_city": flight.arrival_city,
+            "airline": flight.airline,
+        },
+        {"revenue": sign * booking.payment_amount, "bookings": sign}
+    )
+
+def backfill(db: Session) -> int:
+    """
+    Rebuild the rollup from the bookings table. Returns the number of buckets.
+    """
+    day = func.date(Booking.booking_date)
+    rows = db.query(
+        day,
+        Flight.departure_city,
+        Flight.arrival_city,
+        Flight.airline,
+        func.sum(Booking.payment_amount),
+        func.count(Booking.id)
+    ).join(
+        Flight, Booking.flight_id == Flight.id
+    ).filter(
+        Booking.payment_status == PaymentStatus.COMPLETED
+    ).group_by(
+        day, Flight.departure_city, Flight.arrival_city, Flight.airline
+    ).all()
+
+    db.execute(delete(DailyRevenue))
+    if rows:
+        db.execute(insert(DailyRevenue), [
+            {
+                "date": _as_date(bucket_date),
+                "departure_city": departure_city,
+                "arrival_city": arrival_city,
+                "airline": airline,
+                "revenue": revenue or 0.0,
+                "bookings": bookings,
+            }
+            for bucket_date, departure_city, arrival_city, airline, revenue, bookings in rows
+        ])
+    db.commit()
+    return len(rows)
+
+def _as_date(value) -> date:
+    # SQLite returns date() results as ISO strings
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+def _filtered(query: Query, departure_city: Optional[str], arrival_city: Optional[str], airline: Optional[str]) -> Query:
+    if departure_city:
+        query = query.filter(DailyRevenue.departure_city == departure_city)
+    if arrival_city:
+        query = query.filter(DailyRevenue.arrival_city == arrival_city)
+    if airline:
+        query = query.filter(DailyRevenue.airline == airline)
+    return query
+
+def daily_revenue(db: Session, start: date, end: date, **filters) -> List[Dict]:
+    rows = _filtered(
+        db.query(DailyRevenue.date, func.sum(DailyRevenue.revenue), func.sum(DailyRevenue.bookings)),
+        **filters
+    ).filter(
+        DailyRevenue.date >= start,
+        DailyRevenue.date <= end
+    ).group_by(DailyRevenue.date).all()
+    by_day = {_as_date(day): (revenue or 0.0, bookings or 0) for day, revenue, bookings in rows}
+
+    result = []
+    day = start
+    while day <= end:
+        revenue, bookings = by_day.get(day, (0.0, 0))
+        result.append({"date": day, "revenue": revenue, "bookings": bookings})
+        day += timedelta(days=1)
+    return result
+
+def weekly_revenue(db: Session, year: int, **filters) -> List[Dict]:
+    # ISO weeks; week 1 may start in late December of the previous year
+    start = date.fromisocalendar(year, 1, 1)
+    end = date.fromisocalendar(year + 1, 1, 1) - timedelta(days=1)
+    weeks: Dict[int, Dict] = {}
+    for day in daily_revenue(db, start, end, **filters):
+        week = day["date"].isocalendar()[1]
+        bucket = weeks.setdefault(week, {
+            "year": year,
+            "week": week,
+            "week_start": date.fromisocalendar(year, week, 1),
+            "revenue": 0.0,
+            "bookings": 0,
+        })
+        bucket["revenue"] += day["revenue"]
+        bucket["bookings"] += day["bookings"]
+    return [weeks[week] for week in sorted(weeks)]
+
+def monthly_revenue(db: Session, year: int, **filters) -> List[Dict]:
+    month = extract("month", DailyRevenue.date)
+    rows = _filtered(
+        db.query(month, func.sum(DailyRevenue.revenue), func.sum(DailyRevenue.bookings)),
+        **filters
+    ).filter(
+        DailyRevenue.date >= date(year, 1, 1),
+        DailyRevenue.date < date(year + 1, 1, 1)
+    ).group_by(month).all()
+    by_month = {int(number): (revenue or 0.0, bookings or 0) for number, revenue, bookings in rows}
+
+    return [
+        {
+            "month": number,
+            "month_name": datetime(year, number, 1).strftime("%B"),
+            "revenue": by_month.get(number, (0.0, 0))[0],
+            "bookings": by_month.get(number, (0.0, 0))[1],
+        }
+        for number in range(1, 13)
+    ]
+
+def yearly_revenue(db: Session, start_year: int, end_year: int, **filters) -> List[Dict]:
+    year = extract("year", DailyRevenue.date)
+    rows = _filtered(
+        db.query(year, func.sum(DailyRevenue.revenue), func.sum(DailyRevenue.bookings)),
+        **filters
+    ).filter(
+        DailyRevenue.date >= date(start_year, 1, 1),
+        DailyRevenue.date < date(end_year + 1, 1, 1)
+    ).group_by(year).all()
+    by_year = {int(number): (revenue or 0.0, bookings or 0) for number, revenue, bookings in rows}
+
+    return [
+        {
+            "year": number,
+            "revenue": by_year.get(number, (0.0, 0))[0],
+            "bookings": by_year.get(number, (0.0, 0))[1],
+        }
+        for number in range(start_year, end_year + 1)
+    ]
+
+if __name__ == "__main__":
+    # Backfill job: python -m app.services.revenue backfill
+    if sys.argv[1:] != ["backfill"]:
+        print("usage: python -m app.services.revenue backfill")
+        sys.exit(2)
+
+    from app.database import Base, SessionLocal, engine
+    import app.models
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        buckets = backfill(db)
+    print(f"Rebuilt {buckets} daily revenue buckets")
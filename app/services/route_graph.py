@@ -0,0 +1,203 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from dataclasses import replace
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.flight import Flight
+from app.services import events
+from app.services.events import FlightSnapshot
+
+Departure = Tuple[datetime, int]
+
+class RouteGraph:
+    """
+    In-memory time-expanded flight network. Every airport keeps its departures
+    sorted by time, so "what leaves X between t1 and t2" is a bisect, and a
+    per-route index answers "what flies X -> Y" for the final leg of a search.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._legs: Dict[int, FlightSnapshot] = {}
+        self._departures: Dict[str, List[Departure]] = defaultdict(list)
+        self._by_route: Dict[Tuple[str, str], List[Departure]] = defaultdict(list)
+        # Airports with at least one flight into a city: arrival -> {departure: count}
+        self._inbound: Dict[str, Counter] = defaultdict(Counter)
+        self.loaded_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._legs)
+
+    def load(self, flights: Iterable[FlightSnapshot]) -> None:
+        with self._lock:
+            self._legs.clear()
+            self._departures.clear()
+            self._by_route.clear()
+            self._inbound.clear()
+            for flight in flights:
+                if flight.is_active:
+                    self._legs[flight.id] = flight
+            for flight in self._legs.values():
+                entry = (flight.departure_time, flight.id)
+                self._departures[flight.departure_city].append(entry)
+                self._by_route[(flight.departure_city, flight.arrival_city)].append(entry)
+                self._inbound[flight.arrival_city][flight.departure_city] += 1
+            for departures in self._departures.values():
+                departures.sort()
+            for departures in self._by_route.values():
+                departures.sort()
+            self.loaded_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.loaded_at = None
+
+    def is_fresh(self) -> bool:
+        return (
+            self.loaded_at is not None
+            and time.monotonic() - self.loaded_at < settings.ROUTE_GRAPH_REFRESH_SECONDS
+        )
+
+    def upsert(self, flight: FlightSnapshot) -> None:
+        with self._lock:
+            if self.loaded_at is None:
+                return
+            self._remove(flight.id)
+            if not flight.is_active:
+                return
+            entry = (flight.departure_time, flight.id)
+            self._legs[flight.id] = flight
+            insort(self._departures[flight.departure_city], entry)
+            insort(self._by_route[(flight.departure_city, flight.arrival_city)], entry)
+            self._inbound[flight.arrival_city][flight.departure_city] += 1
+
+    def _remove(self, flight_id: int) -> None:
+        flight = self._legs.pop(flight_id, None)
+        if flight is None:
+            return
+        entry = (flight.departure_time, flight.id)
+        for departures in (
+            self._departures[flight.departure_city],
+            self._by_route[(flight.departure_city, flight.arrival_city)]
+        ):
+            index = bisect_left(departures, entry)
+            if index < len(departures) and departures[index] == entry:
+                departures.pop(index)
+        inbound = self._inbound[flight.arrival_city]
+        inbound[flight.departure_city] -= 1
+        if inbound[flight.departure_city] <= 0:
+            del inbound[flight.departure_city]
+
+    def adjust_seats(self, flight_id: int, delta: int) -> None:
+        with self._lock:
+            flight = self._legs.get(flight_id)
+            if flight is not None:
+                self._legs[flight_id] = replace(flight, available_seats=flight.available_seats + delta)
+
+    def _window(self, departures: List[Departure], start: datetime, end: datetime) -> List[FlightSnapshot]:
+        # Departures are (time, id) pairs; id 0 sorts before any real flight at `start`
+        low = bisect_left(departures, (start, 0))
+        high = bisect_left(departures, (end, 0))
+        return [self._legs[flight_id] for _, flight_id in departures[low:high]]
+
+    def search(
+        self,
+        origin: str,
+        destination: str,
+        start: datetime,
+        end: datetime,
+        max_stops: int = 2,
+        sort_by: str = "duration",
+        limit: int = 5,
+        seats: int = 1,
+        min_connection: timedelta = timedelta(minutes=45),
+        max_layover: timedelta = timedelta(hours=12),
+        max_expansions: int = 200000
+    ) -> List[List[FlightSnapshot]]:
+        """
+        Best-first search for the `limit` cheapest itineraries leaving `origin`
+        in [start, end). Costs (total duration or total price) only grow as legs
+        are added, so complete itineraries come off the heap in cost order.
+        """
+        def cost(path):
+            duration = (path[-1].arrival_time - path[0].departure_time).total_seconds()
+            price = sum(leg.price for leg in path)
+            return (price, duration) if sort_by == "price" else (duration, price)
+
+        with self._lock:
+            # Airports with a direct flight into the destination
+            feeders = self._inbound.get(destination, Counter())
+
+            def reachable(leg, legs_left):
+                # Prune legs that cannot reach the destination with the legs left
+                if leg.arrival_city == destination:
+                    return True
+                if legs_left == 0:
+                    return False
+                return legs_left > 1 or leg.arrival_city in feeders
+
+            heap = []
+            counter = 0
+            for leg in self._window(self._departures.get(origin, []), start, end):
+                if leg.available_seats >= seats and reachable(leg, max_stops):
+                    path = (leg,)
+                    heapq.heappush(heap, (cost(path), counter, path))
+                    counter += 1
+
+            results = []
+            expansions = 0
+            while heap and len(results) < limit and expansions < max_expansions:
+                _, _, path = heapq.heappop(heap)
+                last = path[-1]
+                if last.arrival_city == destination:
+                    results.append(list(path))
+                    continue
+                if len(path) > max_stops:
+                    continue
+                expansions += 1
+
+                visited = {origin}
+                visited.update(leg.arrival_city for leg in path)
+                earliest = last.arrival_time + min_connection
+                latest = last.arrival_time + max_layover
+                if len(path) == max_stops:
+                    # Last allowed leg: only direct flights to the destination
+                    candidates = self._window(self._by_route.get((last.arrival_city, destination), []), earliest, latest)
+                else:
+                    candidates = self._window(self._departures.get(last.arrival_city, []), earliest, latest)
+                legs_left = max_stops - len(path)
+                for leg in candidates:
+                    if leg.available_seats < seats or leg.arrival_city in visited:
+                        continue
+                    if not reachable(leg, legs_left):
+                        continue
+                    extended = path + (leg,)
+                    heapq.heappush(heap, (cost(extended), counter, extended))
+                    counter += 1
+            return results
+
+route_graph = RouteGraph()
+
+def _load_snapshots(db: Session) -> List[FlightSnapshot]:
+    rows = db.query(
+        Flight.id, Flight.flight_number, Flight.airline, Flight.departure_city, Flight.arrival_city,
+        Flight.departure_time, Flight.arrival_time, Flight.price, Flight.available_seats, Flight.is_active
+    ).filter(Flight.is_active == True).all()
+    return [FlightSnapshot(*row) for row in rows]
+
+def get_route_graph(db: Session) -> RouteGraph:
+    # Built on first use and rebuilt periodically to pick up changes from other workers
+    if not route_graph.is_fresh():
+        route_graph.load(_load_snapshots(db))
+    return route_graph
+
+events.subscribe(events.FLIGHT_CHANGED, route_graph.upsert)
+events.subscribe(events.SEATS_CHANGED, route_graph.adjust_seats)
+events.subscribe(events.CATALOG_RESET, route_graph.invalidate)
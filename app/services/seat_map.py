@@ -0,0 +1,268 @@
+import math
+import re
+from typing import List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.config import settings
+from app.models.booking import Booking, BookingStatus
+from app.models.flight import Flight
+from app.models.seat_map import SeatMap
+from app.utils.upsert import insert_if_absent
+
+SEAT_LABEL_PATTERN = re.compile(r"^\s*(\d+)\s*([A-Za-z])\s*$")
+
+class SeatConflictError(Exception):
+    pass
+
+class SeatBitmap:
+    """
+    Cabin layout plus a packed occupied mask. Seat i (row-major, 0-based) is
+    bit i % 8 of byte i // 8, so claim and release are O(1). Only the first
+    `seats` seats exist, so a flight whose capacity is not a multiple of the
+    row width ends in a partial row.
+    """
+
+    def __init__(self, rows: int, layout: str, occupied: Optional[bytes] = None, seats: Optional[int] = None):
+        self.rows = rows
+        self.layout = layout
+        self.letters = layout.replace("-", "")
+        self.seats_per_row = len(self.letters)
+        full = rows * self.seats_per_row
+        self.seats = full if seats is None else min(seats, full)
+        # Contiguous column ranges between aisles, e.g. "ABC-DEF" -> [(0, 3), (3, 6)]
+        self.blocks = []
+        start = 0
+        for block in layout.split("-"):
+            self.blocks.append((start, start + len(block)))
+            start += len(block)
+        size = (rows * self.seats_per_row + 7) // 8
+        self.mask = bytearray(occupied or b"")
+        if len(self.mask) < size:
+            self.mask.extend(bytes(size - len(self.mask)))
+
+    @property
+    def capacity(self) -> int:
+        return self.seats
+
+    def index(self, seat_number: str) -> int:
+        match = SEAT_LABEL_PATTERN.match(seat_number or "")
+        if not match:
+            raise ValueError(f"Invalid seat number {seat_number!r}")
+        row = int(match.group(1))
+        column = self.letters.find(match.group(2).upper())
+        if row < 1 or row > self.rows or column < 0 or (row - 1) * self.seats_per_row + column >= self.seats:
+            raise ValueError(f"Seat {seat_number} does not exist on this flight")
+        return (row - 1) * self.seats_per_row + column
+
+    def label(self, index: int) -> str:
+        row, column = divmod(index, self.seats_per_row)
+        return f"{row + 1}{self.letters[column]}"
+
+    def is_occupied(self, index: int) -> bool:
+        return bool(self.mask[index >> 3] & (1 << (index & 7)))
+
+    def is_free(self, index: int) -> bool:
+        return index < self.seats and not self.is_occupied(index)
+
+    def claim(self, seat_number: str) -> bool:
+        index = self.index(seat_number)
+        if self.is_occupied(index):
+            return False
+        self.mask[index >> 3] |= 1 << (index & 7)
+        return True
+
+    def release(self, seat_number: str) -> bool:
+        index = self.index(seat_number)
+        if not self.is_occupied(index):
+            return False
+        self.mask[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+        return True
+
+    def occupied_count(self) -> int:
+        return bin(int.from_bytes(self.mask, "little")).count("1")
+
+    def free_count(self) -> int:
+        return self.capacity - self.occupied_count()
+
+    def _first_run(self, count: int, spans) -> Optional[List[str]]:
+        for row in range(self.rows):
+            base = row * self.seats_per_row
+            for start, end in spans:
+                run = 0
+                for column in range(start, end):
+                    if not self.is_free(base + column):
+                        run = 0
+                        continue
+                    run += 1
+                    if run == count:
+                        first = base + column - count + 1
+                        return [self.label(i) for i in range(first, first + count)]
+        return None
+
+    def find_adjacent(self, count: int) -> Optional[List[str]]:
+        """
+        First `count` free seats next to each other in one row. Seats within an
+        aisle block are preferred; groups that do not fit in a block may span
+        the aisle. Returns None if no row has room for the group.
+        """
+        if count < 1 or count > self.seats_per_row:
+            return None
+        seats = self._first_run(count, self.blocks)
+        if seats is None and len(self.blocks) > 1:
+            seats = self._first_run(count, [(0, self.seats_per_row)])
+        return seats
+
+    def find_free(self, count: int) -> Optional[List[str]]:
+        """
+        First `count` free seats in cabin order, or None if fewer are free.
+        """
+        seats = []
+        for index in range(self.capacity):
+            if self.is_free(index):
+                seats.append(self.label(index))
+                if len(seats) == count:
+                    return seats
+        return None
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.mask)
+
+def _rows_for(capacity: int, layout: str) -> int:
+    return max(1, math.ceil(capacity / len(layout.replace("-", ""))))
+
+def get_or_create_seat_map(db: Session, flight: Flight) -> SeatMap:
+    seat_map = db.query(SeatMap).filter(SeatMap.flight_id == flight.id).first()
+    if seat_map:
+        return seat_map
+
+    # Flights created before seat maps existed: size the cabin from the remaining
+    # inventory plus live bookings, and mark seats those bookings already hold
+    held = db.query(Booking.seat_number).filter(
+        Booking.flight_id == flight.id,
+        Booking.status != BookingStatus.CANCELLED
+    ).all()
+    layout = settings.DEFAULT_CABIN_LAYOUT
+    seats = flight.available_seats + len(held)
+    bitmap = SeatBitmap(_rows_for(seats, layout), layout, seats=seats)
+    for (seat_number,) in held:
+        try:
+            bitmap.claim(seat_number)
+        except ValueError:
+            pass
+
+    # Concurrent first requests for one flight build the same map; one insert wins
+    insert_if_absent(db, SeatMap, {"flight_id": flight.id}, {
+        "rows": bitmap.rows,
+        "seats": bitmap.seats,
+        "layout": layout,
+        "occupied": bitmap.to_bytes(),
+        "version": 1
+    })
+    return db.query(SeatMap).filter(SeatMap.flight_id == flight.id).populate_existing().one()
+
+def _lock_seat_map(db: Session, flight_id: int) -> Optional[SeatMap]:
+    """
+    The flight's seat map, locked until the caller's transaction ends and read
+    after the lock was taken; None if the flight has no seat map yet. The lock
+    is a write to the row: a row lock on server databases, the database write
+    lock on SQLite. Seat changes to one flight are therefore applied one after
+    another, each to the latest map, and bookings for different seats never
+    conflict.
+    """
+    result = db.execute(
+        update(SeatMap)
+        .where(SeatMap.flight_id == flight_id)
+        .values(version=SeatMap.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return None
+    return db.query(SeatMap).filter(SeatMap.flight_id == flight_id).populate_existing().one()
+
+def _lock_or_create_seat_map(db: Session, flight: Flight) -> SeatMap:
+    seat_map = _lock_seat_map(db, flight.id)
+    if not seat_map:
+        get_or_create_seat_map(db, flight)
+        seat_map = _lock_seat_map(db, flight.id)
+    return seat_map
+
+def create_seat_map(db: Session, flight: Flight) -> SeatMap:
+    layout = settings.DEFAULT_CABIN_LAYOUT
+    bitmap = SeatBitmap(_rows_for(flight.available_seats, layout), layout, seats=flight.available_seats)
+    seat_map = SeatMap(
+        flight=flight,
+        rows=bitmap.rows,
+        seats=bitmap.seats,
+        layout=layout,
+        occupied=bitmap.to_bytes(),
+        version=1
+    )
+    db.add(seat_map)
+    return seat_map
+
+def ensure_capacity(db: Session, flight: Flight) -> None:
+    """
+    Add seats, and rows as needed, to a flight's seat map when its inventory
+    grows past the cabin.
+    """
+    seat_map = _lock_seat_map(db, flight.id)
+    if not seat_map:
+        return
+    bitmap = load_bitmap(seat_map)
+    needed = flight.available_seats + bitmap.occupied_count()
+    if needed > bitmap.capacity:
+        bitmap = SeatBitmap(max(seat_map.rows, _rows_for(needed, seat_map.layout)), seat_map.layout, bitmap.to_bytes(), needed)
+        _save(db, seat_map, bitmap)
+
+def load_bitmap(seat_map: SeatMap) -> SeatBitmap:
+    return SeatBitmap(seat_map.rows, seat_map.layout, seat_map.occupied, seat_map.seats)
+
+def _save(db: Session, seat_map: SeatMap, bitmap: SeatBitmap) -> None:
+    # The row is locked by _lock_seat_map, so nothing changed it since it was read
+    db.execute(
+        update(SeatMap)
+        .where(SeatMap.id == seat_map.id)
+        .values(rows=bitmap.rows, seats=bitmap.seats, occupied=bitmap.to_bytes())
+        .execution_options(synchronize_session=False)
+    )
+    set_committed_value(seat_map, "rows", bitmap.rows)
+    set_committed_value(seat_map, "seats", bitmap.seats)
+    set_committed_value(seat_map, "occupied", bitmap.to_bytes())
+
+def claim_seat_numbers(db: Session, flight: Flight, seat_numbers: List[str]) -> None:
+    """
+    Mark seats as occupied in the caller's transaction.
+    Raises ValueError for unknown seats and SeatConflictError if any is taken.
+    """
+    seat_map = _lock_or_create_seat_map(db, flight)
+    bitmap = load_bitmap(seat_map)
+    for seat_number in seat_numbers:
+        if not bitmap.claim(seat_number):
+            raise SeatConflictError(f"Seat {seat_number} is already booked")
+    _save(db, seat_map, bitmap)
+
+def release_seat_numbers(db: Session, flight_id: int, seat_numbers: List[str]) -> None:
+    seat_map = _lock_seat_map(db, flight_id)
+    if not seat_map:
+        return
+    bitmap = load_bitmap(seat_map)
+    changed = False
+    for seat_number in seat_numbers:
+        try:
+            changed = bitmap.release(seat_number) or changed
+        except ValueError:
+            pass
+    if changed:
+        _save(db, seat_map, bitmap)
+
+def allocate_group(db: Session, flight: Flight, count: int) -> Optional[List[str]]:
+    """
+    Seats for a group without claiming them: side by side when the group fits
+    in a row, otherwise the first free seats in cabin order. The seat map stays
+    locked, so the seats are still free when the caller claims them.
+    """
+    bitmap = load_bitmap(_lock_or_create_seat_map(db, flight))
+    return bitmap.find_adjacent(count) or bitmap.find_free(count)
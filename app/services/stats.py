@@ -0,0 +1,191 @@
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+
+from sqlalchemy import delete, func, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.booking import Booking, BookingStatus, PaymentStatus
+from app.models.flight import Flight
+from app.models.stats import StatCounter
+from app.models.user import User, UserRole
+from app.utils.upsert import increment, insert_if_absent
+
+# Dashboard counters kept in the stat_counters table. Every write path adjusts
+# them in its own transaction, so the dashboard is a single small read.
+USERS_TOTAL = "users.total"
+FLIGHTS_TOTAL = "flights.total"
+FLIGHTS_ACTIVE = "flights.active"
+BOOKINGS_TOTAL = "bookings.total"
+REVENUE_TOTAL = "revenue.total"
+INITIALIZED = "stats.initialized"
+
+RECENT_WINDOW = timedelta(days=7)
+
+def users_by_role(role: UserRole) -> str:
+    return f"users.{role.value}"
+
+def bookings_by_status(status: BookingStatus) -> str:
+    return f"bookings.{status.value}"
+
+def bookings_in_hour(moment: datetime) -> str:
+    # Hourly buckets back the rolling "recent bookings" window
+    return f"bookings.hour.{moment.strftime('%Y-%m-%dT%H')}"
+
+def _recent_hours(now: datetime) -> List[str]:
+    hours = int(RECENT_WINDOW.total_seconds() // 3600)
+    return [bookings_in_hour(now - timedelta(hours=offset)) for offset in range(hours + 1)]
+
+def bump(db: Session, deltas: Dict[str, float]) -> None:
+    """
+    Add deltas to counters as part of the caller's transaction.
+    """
+    shard = random.randrange(settings.STATS_COUNTER_SHARDS)
+    # Fixed order so concurrent writers take row locks in the same sequence
+    for name in sorted(deltas):
+        if deltas[name]:
+            increment(db, StatCounter, {"name": name, "shard": shard}, {"value": deltas[name]})
+
+def read_counters(db: Session, names: Iterable[str]) -> Dict[str, float]:
+    rows = db.query(StatCounter.name, func.sum(StatCounter.value)).filter(
+        StatCounter.name.in_(list(names))
+    ).group_by(StatCounter.name).all()
+    return {name: value for name, value in rows}
+
+def compute_from_scratch(db: Session, now: datetime) -> Dict[str, float]:
+    counters = {
+        USERS_TOTAL: db.query(func.count(User.id)).scalar(),
+        FLIGHTS_TOTAL: db.query(func.count(Flight.id)).scalar(),
+        FLIGHTS_ACTIVE: db.query(func.count(Flight.id)).filter(Flight.is_active == True).scalar(),
+        BOOKINGS_TOTAL: db.query(func.count(Booking.id)).scalar(),
+        REVENUE_TOTAL: db.query(func.sum(Booking.payment_amount)).filter(
+            Booking.payment_status == PaymentStatus.COMPLETED
+        ).scalar() or 0.0,
+    }
+    for role in UserRole:
+        counters[users_by_role(role)] = 0
+    for role, count in db.query(User.role, func.count(User.id)).group_by(User.role).all():
+        counters[users_by_role(role)] = count
+    for booking_status in BookingStatus:
+        counters[bookings_by_status(booking_status)] = 0
+    for booking_status, count in db.query(Booking.status, func.count(Booking.id)).group_by(Booking.status).all():
+        counters[bookings_by_status(booking_status)] = count
+    for name in _recent_hours(now):
+        counters[name] = 0
+    recent = db.query(Booking.booking_date).filter(
+        Booking.booking_date >= now - RECENT_WINDOW - timedelta(hours=1)
+    )
+    for (booking_date,) in recent.yield_per(1000):
+        name = bookings_in_hour(booking_date)
+        if name in counters:
+            counters[name] += 1
+    return counters
+
+def _consistent_reads(db: Session) -> None:
+    """
+    Start a transaction whose reads all see the same moment. On SQLite this
+    takes the write lock up front (an UPDATE that changes nothing), so no bump
+    commits until the transaction ends; server databases get a REPEATABLE READ
+    snapshot.
+    """
+    db.commit()
+    if db.get_bind().dialect.name == "sqlite":
+        db.execute(
+            update(StatCounter)
+            .where(StatCounter.name == INITIALIZED)
+            .values(value=StatCounter.value)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+def reconcile(db: Session) -> Dict[str, Dict[str, float]]:
+    """
+    Recompute every counter from the source tables, correct the stored values
+    and return the counters that had drifted: {name: {expected, actual, drift}}.
+    The source tables and the counters are read as of one moment and the
+    difference is added with bump(), so increments committed while this runs
+    are kept. Ends the caller's transaction.
+    """
+    now = datetime.utcnow()
+    _consistent_reads(db)
+    expected = compute_from_scratch(db, now)
+    actual = read_counters(db, list(expected) + [INITIALIZED])
+    db.commit()
+
+    initialized = INITIALIZED in actual
+    drift = {}
+    deltas = {}
+    for name, value in expected.items():
+        stored = actual.get(name, 0) or 0
+        if abs(stored - value) > 1e-6:
+            deltas[name] = value - stored
+            if initialized:
+                drift[name] = {"expected": value, "actual": stored, "drift": stored - value}
+
+    bump(db, deltas)
+    insert_if_absent(db, StatCounter, {"name": INITIALIZED, "shard": 0}, {"value": 1})
+    # Hourly buckets that fell out of the window are never read again
+    db.execute(
+        delete(StatCounter)
+        .where(StatCounter.name.like("bookings.hour.%"), StatCounter.name.not_in(_recent_hours(now)))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return drift
+
+def dashboard_stats(db: Session) -> Dict:
+    now = datetime.utcnow()
+    recent_hours = _recent_hours(now)
+    names = [
+        USERS_TOTAL, users_by_role(UserRole.PASSENGER), users_by_role(UserRole.STAFF),
+        FLIGHTS_TOTAL, FLIGHTS_ACTIVE,
+        BOOKINGS_TOTAL, REVENUE_TOTAL, INITIALIZED,
+    ] + [bookings_by_status(booking_status) for booking_status in BookingStatus] + recent_hours
+    counters = read_counters(db, names)
+    if INITIALIZED not in counters:
+        # First read after deploy: seed the counters from the source tables.
+        # Concurrent first reads race to insert the marker; only the winner seeds
+        if insert_if_absent(db, StatCounter, {"name": INITIALIZED, "shard": 0}, {"value": 1}):
+            reconcile(db)
+        else:
+            db.commit()
+        counters = read_counters(db, names)
+
+    def count(name):
+        return int(round(counters.get(name, 0) or 0))
+
+    return {
+        "user_stats": {
+            "total_users": count(USERS_TOTAL),
+            "passengers_count": count(users_by_role(UserRole.PASSENGER)),
+            "staff_count": count(users_by_role(UserRole.STAFF)),
+        },
+        "flight_stats": {
+            "total_flights": count(FLIGHTS_TOTAL),
+            "active_flights": count(FLIGHTS_ACTIVE),
+        },
+        "booking_stats": {
+            "total_bookings": count(BOOKINGS_TOTAL),
+            "confirmed_bookings": count(bookings_by_status(BookingStatus.CONFIRMED)),
+            "pending_bookings": count(bookings_by_status(BookingStatus.PENDING)),
+            "cancelled_bookings": count(bookings_by_status(BookingStatus.CANCELLED)),
+            "recent_bookings": sum(count(name) for name in recent_hours),
+        },
+        "financial_stats": {
+            "total_revenue": counters.get(REVENUE_TOTAL, 0.0) or 0.0,
+        }
+    }
+
+if __name__ == "__main__":
+    # Reconciliation job: python -m app.services.stats
+    from app.database import Base, SessionLocal, engine
+    import app.models
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        drift = reconcile(db)
+    for name, values in sorted(drift.items()):
+        print(f"{name}: expected {values['expected']}, stored {values['actual']} ({values['drift']:+})")
+    print(f"{len(drift)} counters drifted")
@@ -0,0 +1,63 @@
+import hashlib
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+JSON_MEDIA_TYPE = "application/json"
+
+def etag_for(body: bytes) -> str:
+    # Strong validator: the same bytes always give the same tag
+    return f'"{hashlib.sha1(body).hexdigest()}"'
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    return "*" in candidates or _opaque(etag) in (_opaque(tag) for tag in candidates)
+
+def not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """
+    True if the client's copy is current. If-Modified-Since only counts when
+    there is no If-None-Match, as in RFC 9110.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if last_modified is None or not if_modified_since:
+        return False
+    try:
+        return last_modified <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        # Unparseable or timezone-less dates are ignored
+        return False
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None, cache_control: str = "private, no-cache") -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+def not_modified_response(headers: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
+
+def conditional_response(
+    request: Request,
+    body: bytes,
+    etag: str,
+    cache_control: str = "private, no-cache"
+) -> Response:
+    """
+    Send a pre-serialized JSON body with its ETag, or 304 Not Modified if the
+    client already holds that version.
+    """
+    headers = validator_headers(etag, cache_control=cache_control)
+    if not_modified(request, etag):
+        return not_modified_response(headers)
+    return Response(content=body, media_type=JSON_MEDIA_TYPE, headers=headers)
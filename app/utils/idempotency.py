@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+import json
+import re
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+from app.config import settings
+from app.services.cache import MISSING, TTLCache
+from app.utils.tokens import bearer_claims
+
+IDEMPOTENCY_KEY_HEADER = "idempotency-key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+# Completed responses by (user, method, path, key), kept for the TTL
+response_store = TTLCache(
+    "idempotency",
+    maxsize=settings.IDEMPOTENCY_CACHE_SIZE,
+    ttl=settings.IDEMPOTENCY_TTL_SECONDS
+)
+
+StoreKey = Tuple[str, str, str, str]
+
+# Answers that depend on the moment (a seat taken, the payment racing a cancel,
+# rate limiting) rather than on the request; a retry may well succeed
+TRANSIENT_STATUS_CODES = {408, 409, 423, 425, 429}
+
+class StoredResponse:
+    __slots__ = ("fingerprint", "status", "headers", "body")
+
+    def __init__(self, fingerprint: str, status: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+        self.fingerprint = fingerprint
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+def _principal(headers: Dict[bytes, bytes]) -> Optional[str]:
+    # Keys are scoped to the verified user, so they survive a token refresh
+    # and one user can never replay another user's response
+    claims = bearer_claims(headers)
+    return claims.get("sub") if claims else None
+
+def _json_response(status: int, detail: str) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+    body = json.dumps({"detail": detail}).encode()
+    return status, [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())], body
+
+class IdempotencyMiddleware:
+    """
+    Honour an Idempotency-Key header on the given POST routes. The first
+    request with a key runs normally and its response is stored; a retry with
+    the same key gets the stored response back without running the endpoint
+    again, and a duplicate that arrives while the first is still running waits
+    for it. Server errors and transient 4xx answers are not stored, so those
+    requests can be retried.
+    The store is per process, like the other in-process caches.
+    """
+
+    def __init__(self, app, paths: Iterable[str], wait_timeout: float = settings.IDEMPOTENCY_WAIT_SECONDS):
+        self.app = app
+        self.paths: List[Pattern] = [re.compile(path) for path in paths]
+        self.wait_timeout = wait_timeout
+        # Keys whose first request is still running; the middleware only ever
+        # runs on the event loop, so plain asyncio primitives are enough
+        self.in_flight: Dict[StoreKey, asyncio.Event] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not any(
+            path.fullmatch(scope["path"]) for path in self.paths
+        ):
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        idempotency_key = headers.get(IDEMPOTENCY_KEY_HEADER.encode(), b"").decode("latin-1").strip()
+        principal = _principal(headers) if idempotency_key else None
+        if not principal:
+            return await self.app(scope, receive, send)
+
+        body = await self._read_body(receive)
+        fingerprint = hashlib.sha256(body).hexdigest()
+        key: StoreKey = (principal, scope["method"], scope["path"], idempotency_key)
+
+        while True:
+            stored = response_store.get(key)
+            if stored is not MISSING:
+                if stored.fingerprint != fingerprint:
+                    return await self._send(send, *_json_response(
+                        422, "Idempotency-Key was already used for a different request"
+                    ))
+                replayed = stored.headers + [(REPLAYED_HEADER.lower().encode(), b"true")]
+                return await self._send(send, stored.status, replayed, stored.body)
+
+            running = self.in_flight.get(key)
+            if running is None:
+                break
+            try:
+                await asyncio.wait_for(running.wait(), self.wait_timeout)
+            except asyncio.TimeoutError:
+                return await self._send(send, *_json_response(
+                    409, "A request with this Idempotency-Key is still being processed"
+                ))
+            # Either the response is stored now, or the first request failed
+            # and this one takes over
+
+        done = asyncio.Event()
+        self.in_flight[key] = done
+        try:
+            await self._run_and_store(scope, body, send, key, fingerprint)
+        finally:
+            del self.in_flight[key]
+            done.set()
+
+    async def _read_body(self, receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    async def _run_and_store(self, scope, body: bytes, send, key: StoreKey, fingerprint: str):
+        status = None
+        response_headers: List[Tuple[bytes, bytes]] = []
+        chunks = []
+        delivered = False
+
+        async def replay_receive():
+            nonlocal delivered
+            if delivered:
+                # Nothing more will arrive; let the app wait like it would for a disconnect
+                await asyncio.Event().wait()
+            delivered = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def capture_send(message):
+            nonlocal status, response_headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, replay_receive, capture_send)
+
+        if status is not None and status < 500 and status not in TRANSIENT_STATUS_CODES:
+            response_store.set(key, StoredResponse(fingerprint, status, response_headers, b"".join(chunks)))
+
+    async def _send(self, send, status: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,132 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# Starlette appends the charset
+METRICS_MEDIA_TYPE = "text/plain; version=0.0.4"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Requests that matched no API route share one label, so scanners probing
+# random paths cannot grow the series without bound
+UNMATCHED_ROUTE = "other"
+
+RouteKey = Tuple[str, str]
+
+def route_template(scope) -> str:
+    # FastAPI stores the matched route in the scope; its path is the template
+    # ("/api/flights/{flight_id}"), which keeps one series per endpoint
+    route = scope.get("route")
+    return route.path if route is not None else UNMATCHED_ROUTE
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        # One slot per bucket plus +Inf; cumulated when rendered
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+def _histogram_lines(name: str, histogram: Histogram, **labels) -> List[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.bounds, histogram.counts):
+        cumulative += count
+        lines.append(f"{name}_bucket{_labels(**labels, le=f'{bound:g}')} {cumulative}")
+    cumulative += histogram.counts[-1]
+    lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {cumulative}")
+    lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum!r}")
+    lines.append(f"{name}_count{_labels(**labels)} {cumulative}")
+    return lines
+
+class RequestMetrics:
+    """
+    Per-route request counters and histograms, rendered in the Prometheus
+    text format. Recording a request is a few dict lookups under one lock,
+    cheap enough to leave on in production.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str, int], int] = defaultdict(int)
+        self.errors: Dict[RouteKey, int] = defaultdict(int)
+        self.latency: Dict[RouteKey, Histogram] = {}
+        self.db_statements: Dict[RouteKey, Histogram] = {}
+        self.db_seconds: Dict[RouteKey, Histogram] = {}
+        self.in_flight: Dict[str, int] = defaultdict(int)
+
+    @contextmanager
+    def track(self, method: str) -> Iterator[None]:
+        with self._lock:
+            self.in_flight[method] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight[method] -= 1
+
+    def observe(self, method: str, route: str, status: int, seconds: float, statements: int, db_seconds: float) -> None:
+        key = (method, route)
+        with self._lock:
+            self.requests[(method, route, status)] += 1
+            if status >= 500:
+                self.errors[key] += 1
+            latency = self.latency.get(key)
+            if latency is None:
+                latency = self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.db_statements[key] = Histogram(STATEMENT_BUCKETS)
+                self.db_seconds[key] = Histogram(DB_TIME_BUCKETS)
+            latency.observe(seconds)
+            self.db_statements[key].observe(statements)
+            self.db_seconds[key].observe(db_seconds)
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP http_requests_total Requests handled, by route and status code.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+            lines += [
+                "# HELP http_request_errors_total Requests that ended in a server error (5xx or unhandled exception).",
+                "# TYPE http_request_errors_total counter",
+            ]
+            for (method, route), count in sorted(self.errors.items()):
+                lines.append(f"http_request_errors_total{_labels(method=method, route=route)} {count}")
+
+            lines += [
+                "# HELP http_requests_in_flight Requests currently being handled.",
+                "# TYPE http_requests_in_flight gauge",
+            ]
+            for method, count in sorted(self.in_flight.items()):
+                lines.append(f"http_requests_in_flight{_labels(method=method)} {count}")
+
+            for name, help_text, histograms in (
+                ("http_request_duration_seconds", "Time until the response started, by route.", self.latency),
+                ("http_request_db_statements", "SQL statements executed per request, by route.", self.db_statements),
+                ("http_request_db_seconds", "Time spent in SQL statements per request, by route.", self.db_seconds),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for (method, route), histogram in sorted(histograms.items()):
+                    lines += _histogram_lines(name, histogram, method=method, route=route)
+
+        return "\n".join(lines) + "\n"
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,254 @@
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.utils.metrics import route_template
+from app.utils.tokens import bearer_claims
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+PROFILE_ID = re.compile(r"\d+-[0-9a-f]{8}")
+
+# Leaf frames in these files are threads waiting for work (idle pool workers,
+# the event loop in select), not time spent on a request
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py", os.path.join("futures", "thread.py"))
+
+@lru_cache(maxsize=8192)
+def _frame_name(code) -> str:
+    filename = code.co_filename
+    for prefix in sys.path:
+        if prefix and filename.startswith(prefix + os.sep):
+            filename = filename[len(prefix) + 1:]
+            break
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+
+class Profile:
+    __slots__ = ("stacks", "samples")
+
+    def __init__(self):
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+class StackSampler:
+    """
+    Statistical profiler: while any profile is open, one background thread
+    snapshots the stack of every other thread each `interval` seconds and
+    adds it, folded, to each open profile. Nothing runs when no profile is
+    open. Profiles are process-wide: a sync endpoint runs on whichever pool
+    thread is free and async ones share the event loop thread, so there is no
+    one thread to follow, and a profile holds the work of every request that
+    was in flight alongside it.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._open: List[Profile] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> Profile:
+        profile = Profile()
+        with self._lock:
+            self._open.append(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+        return profile
+
+    def stop(self, profile: Profile) -> None:
+        with self._lock:
+            self._open.remove(profile)
+
+    def _sample(self, own_id: int) -> Counter:
+        stacks = Counter()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id or frame.f_code.co_filename.endswith(_IDLE_FILES):
+                continue
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            stacks[";".join(reversed(names))] += 1
+        return stacks
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._open:
+                    self._thread = None
+                    return
+            stacks = self._sample(own_id)
+            with self._lock:
+                for profile in self._open:
+                    profile.stacks.update(stacks)
+                    profile.samples += 1
+            time.sleep(self.interval)
+
+class ProfileStore:
+    """
+    Profiles on disk as one JSON file each, keeping the newest `max_files`.
+    """
+
+    def __init__(self, directory: str, max_files: int):
+        self.directory = directory
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def _path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.json")
+
+    def _ids(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        # Ids start with a millisecond timestamp, so they sort oldest first
+        return sorted(name[:-5] for name in names if name.endswith(".json") and PROFILE_ID.fullmatch(name[:-5]))
+
+    def save(self, record: Dict) -> None:
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(record["id"])
+            with open(path + ".tmp", "w") as f:
+                json.dump(record, f)
+            os.replace(path + ".tmp", path)
+            ids = self._ids()
+            for stale in ids[:max(0, len(ids) - self.max_files)]:
+                try:
+                    os.remove(self._path(stale))
+                except FileNotFoundError:
+                    pass
+
+    def list(self) -> List[Dict]:
+        summaries = []
+        for profile_id in reversed(self._ids()):
+            record = self.load(profile_id)
+            if record is not None:
+                record.pop("stacks")
+                summaries.append(record)
+        return summaries
+
+    def load(self, profile_id: str) -> Optional[Dict]:
+        if not PROFILE_ID.fullmatch(profile_id):
+            return None
+        try:
+            with open(self._path(profile_id)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            # Missing, or rotated out while being read
+            return None
+
+def folded(record: Dict) -> str:
+    # One "frame;frame;frame count" line per stack, as read by flamegraph.pl and speedscope
+    return "".join(f"{stack} {count}\n" for stack, count in record["stacks"].items())
+
+class ProfilingMiddleware:
+    """
+    Profile a random `sample_rate` share of requests, and every request from
+    an admin that sends `X-Profile: true`. With `slow_seconds` set, a further
+    random `slow_sample_rate` share is profiled and kept only if it took at
+    least that long. Kept profiles go to the store, labelled with the number
+    of requests in flight, since their stacks cover the whole process; admins
+    fetch them from /api/admin/profiles.
+    """
+
+    def __init__(
+        self,
+        app,
+        sampler: StackSampler,
+        store: ProfileStore,
+        sample_rate: float,
+        slow_seconds: float,
+        slow_sample_rate: float
+    ):
+        self.app = app
+        self.sampler = sampler
+        self.store = store
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_seconds
+        self.slow_sample_rate = slow_sample_rate
+        # Requests being served; only touched on the event loop
+        self.in_flight = 0
+
+    def _requested(self, scope) -> bool:
+        headers = dict(scope["headers"])
+        if headers.get(PROFILE_HEADER.encode(), b"").lower() not in (b"1", b"true"):
+            return False
+        claims = bearer_claims(headers)
+        return bool(claims) and claims.get("role") == "admin"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        self.in_flight += 1
+        try:
+            await self._call(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+    async def _call(self, scope, receive, send):
+        requested = self._requested(scope)
+        sampled = requested or (self.sample_rate > 0 and random.random() < self.sample_rate)
+        watched = not sampled and self.slow_seconds > 0 and random.random() < self.slow_sample_rate
+        if not sampled and not watched:
+            return await self.app(scope, receive, send)
+
+        profile_id = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
+        status = None
+
+        async def profiled_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if requested:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (PROFILE_ID_HEADER.lower().encode(), profile_id.encode())
+                    ]
+            await send(message)
+
+        started_at = datetime.utcnow()
+        start = time.perf_counter()
+        in_flight = self.in_flight
+        profile = self.sampler.start()
+        try:
+            await self.app(scope, receive, profiled_send)
+        finally:
+            self.sampler.stop(profile)
+            in_flight = max(in_flight, self.in_flight)
+            duration = time.perf_counter() - start
+            if sampled or duration >= self.slow_seconds:
+                record = {
+                    "id": profile_id,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route_template(scope),
+                    "status": status,
+                    "started_at": started_at.isoformat(),
+                    "duration_seconds": duration,
+                    "reason": "requested" if requested else "sampled" if sampled else "slow",
+                    "interval_seconds": self.sampler.interval,
+                    "samples": profile.samples,
+                    # Stacks are from every thread; this many requests (this
+                    # one included) were being served at its start or end
+                    "scope": "process",
+                    "in_flight": in_flight,
+                    "stacks": dict(profile.stacks),
+                }
+                await asyncio.to_thread(self.store.save, record)
+
+stack_sampler = StackSampler(interval=settings.PROFILE_INTERVAL_SECONDS)
+profile_store = ProfileStore(settings.PROFILE_DIR, settings.PROFILE_MAX_FILES)
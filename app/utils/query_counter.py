@@ -0,0 +1,52 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+
+class QueryStats:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+# The stats object is shared by reference, so statements run from threadpool
+# workers (which get a copy of the request's context) still count towards it
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        context._query_started = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _time_statement(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None:
+        started = getattr(context, "_query_started", None)
+        if started is not None:
+            stats.seconds += time.perf_counter() - started
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """
+    Count and time the SQL statements executed inside the block, e.g. per request:
+
+        with count_queries() as queries:
+            ...
+        assert queries.count == 2
+        print(f"{queries.seconds:.4f}s in the database")
+    """
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
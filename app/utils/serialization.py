@@ -0,0 +1,28 @@
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Type
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+from app.utils.conditional import JSON_MEDIA_TYPE
+
+# FastAPI serializes a returned list by validating it into models, dumping
+# those to Python dicts and encoding the dicts with json. For large lists we
+# validate straight from the ORM rows and dump to JSON bytes in one pass
+# inside pydantic-core instead.
+
+@lru_cache(maxsize=None)
+def list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[schema])
+
+def dump_list(schema: Type[BaseModel], rows: Iterable) -> bytes:
+    adapter = list_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+def list_response(schema: Type[BaseModel], rows: Iterable, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Serialize ORM rows with `schema` and send them as a JSON array. Endpoints
+    keep `response_model=List[schema]` for the docs; the response itself
+    bypasses FastAPI's encoder.
+    """
+    return Response(content=dump_list(schema, rows), media_type=JSON_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,82 @@
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime
+from typing import Callable, Iterator, Literal, Type
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select
+from sqlalchemy.orm import Query, Session
+
+from app.database import SessionLocal
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+STREAM_BATCH_SIZE = 1000
+
+ExportFormat = Literal["csv", "ndjson"]
+
+def iter_ndjson(build_query: Callable[[Session], Query], schema: Type[BaseModel]) -> Iterator[bytes]:
+    # The stream outlives the request's session, so it opens its own and
+    # walks the result with a server-side cursor, one batch at a time
+    with SessionLocal() as db:
+        buffer = []
+        for row in build_query(db).yield_per(STREAM_BATCH_SIZE):
+            buffer.append(schema.model_validate(row, from_attributes=True).model_dump_json())
+            if len(buffer) >= STREAM_BATCH_SIZE:
+                yield ("\n".join(buffer) + "\n").encode()
+                buffer.clear()
+        if buffer:
+            yield ("\n".join(buffer) + "\n").encode()
+
+def ndjson_response(build_query: Callable[[Session], Query], schema: Type[BaseModel]) -> StreamingResponse:
+    """
+    Stream every row of a query as newline-delimited JSON in constant memory.
+    """
+    return StreamingResponse(iter_ndjson(build_query, schema), media_type=NDJSON_MEDIA_TYPE)
+
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def iter_export(build_statement: Callable[[], Select], format: ExportFormat) -> Iterator[bytes]:
+    # Flat column rows straight from the cursor: no ORM objects or relations
+    # are built, and each chunk is written out before the next is fetched
+    with SessionLocal() as db:
+        result = db.execute(
+            build_statement(),
+            execution_options={"stream_results": True, "yield_per": STREAM_BATCH_SIZE}
+        )
+        columns = list(result.keys())
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if format == "csv":
+            writer.writerow(columns)
+        for rows in result.partitions():
+            for row in rows:
+                values = [_plain(value) for value in row]
+                if format == "csv":
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(columns, values))) + "\n")
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+
+def export_response(build_statement: Callable[[], Select], format: ExportFormat, filename: str) -> StreamingResponse:
+    """
+    Stream every row of a select as a CSV or NDJSON download in constant memory.
+    """
+    return StreamingResponse(
+        iter_export(build_statement, format),
+        media_type=CSV_MEDIA_TYPE if format == "csv" else NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'}
+    )
@@ -0,0 +1,19 @@
+from typing import Dict, Optional
+
+from jose import JWTError, jwt
+
+from app.config import settings
+
+def bearer_claims(headers: Dict[bytes, bytes]) -> Optional[dict]:
+    """
+    Verified claims of the request's bearer token, read straight from raw ASGI
+    headers for middleware that runs before authentication. None if there is
+    no valid token.
+    """
+    scheme, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
@@ -0,0 +1,67 @@
+from typing import Any, Dict, Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+_DIALECT_INSERTS = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+def increment(
+    db: Session,
+    model,
+    keys: Dict[str, Any],
+    deltas: Dict[str, float],
+    values: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Add `deltas` to the row of `model` identified by `keys` (its primary key or a
+    unique constraint), creating the row if it does not exist yet, and set any
+    `values` on it. Runs as one INSERT ... ON CONFLICT DO UPDATE where the
+    backend supports it.
+    """
+    values = values or {}
+    dialect_insert = _DIALECT_INSERTS.get(db.get_bind().dialect.name)
+    if dialect_insert is not None:
+        statement = dialect_insert(model).values(**keys, **deltas, **values)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={
+                **{column: getattr(model, column) + statement.excluded[column] for column in deltas},
+                **{column: statement.excluded[column] for column in values},
+            }
+        )
+        db.execute(statement)
+        return
+
+    conditions = [getattr(model, column) == value for column, value in keys.items()]
+    result = db.execute(
+        update(model)
+        .where(*conditions)
+        .values({**{column: getattr(model, column) + delta for column, delta in deltas.items()}, **values})
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.execute(insert(model).values(**keys, **deltas, **values))
+
+def insert_if_absent(db: Session, model, keys: Dict[str, Any], values: Dict[str, Any]) -> bool:
+    """
+    Insert a row of `model` unless one with the same `keys` (its primary key or
+    a unique constraint) exists. Runs as one INSERT ... ON CONFLICT DO NOTHING
+    where the backend supports it, so concurrent callers never collide.
+    Returns True if this call inserted the row.
+    """
+    dialect_insert = _DIALECT_INSERTS.get(db.get_bind().dialect.name)
+    if dialect_insert is not None:
+        result = db.execute(
+            dialect_insert(model).values(**keys, **values).on_conflict_do_nothing(index_elements=list(keys))
+        )
+        return result.rowcount == 1
+
+    if db.query(model).filter_by(**keys).first() is None:
+        db.execute(insert(model).values(**keys, **values))
+        return True
+    return False
@@ -0,0 +1 @@
+# Stress tests and benchmarks. Run each module with `python -m benchmarks.<name>`.
@@ -0,0 +1,86 @@
+import asyncio
+import json
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+class ASGIClient:
+    """
+    Minimal in-process HTTP client that calls an ASGI app directly, so
+    benchmarks measure the application rather than sockets or a server.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        json_body=None,
+        form: Optional[Dict[str, str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        query: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        request_headers = {key.lower(): value for key, value in (headers or {}).items()}
+        body = b""
+        if json_body is not None:
+            body = json.dumps(json_body, default=str).encode()
+            request_headers["content-type"] = "application/json"
+        elif form is not None:
+            body = urlencode(form).encode()
+            request_headers["content-type"] = "application/x-www-form-urlencoded"
+        request_headers["content-length"] = str(len(body))
+        request_headers.setdefault("host", "benchmark")
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": urlencode(query or {}).encode(),
+            "root_path": "",
+            "headers": [(key.encode(), value.encode()) for key, value in request_headers.items()],
+            "client": ("127.0.0.1", 50000),
+            "server": ("benchmark", 80),
+        }
+        sent = False
+        finished = asyncio.Event()
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Middleware listens for a disconnect; only report one once the response is done
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        status = 500
+        response_headers: Dict[str, str] = {}
+        chunks = []
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers.update(
+                    (key.decode().lower(), value.decode()) for key, value in message.get("headers", [])
+                )
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    finished.set()
+
+        await self.app(scope, receive, send)
+        return status, response_headers, b"".join(chunks)
+
+    async def login(self, username: str, password: str) -> Dict[str, str]:
+        status, _, body = await self.request(
+            "POST", "/api/auth/token", form={"username": username, "password": password}
+        )
+        if status != 200:
+            raise RuntimeError(f"Login failed for {username}: {status} {body[:200]!r}")
+        return {"Authorization": f"Bearer {json.loads(body)['access_token']}"}
@@ -0,0 +1,160 @@
+"""
+Concurrency check for cancellations.
+
+Fires parallel cancels at one paid booking, and at an expired unpaid hold
+while the hold sweeper runs, through POST /bookings/{id}/cancel. Refunds are
+answered in process after --gateway-latency seconds, so the requests overlap
+the way they do against a real gateway. Exactly one cancel of each booking
+may win: the paid booking must be refunded once, and each booking must hand
+back exactly one seat to the inventory and the seat map. Exits with status 1
+otherwise.
+
+    python -m benchmarks.cancel_race_check --requests 5 --gateway-latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+
+def setup(SessionLocal, seats):
+    from app.models.booking import Booking, BookingStatus, PaymentStatus
+    from app.models.flight import Flight
+    from app.models.user import User
+    from app.services.inventory import reserve_seats
+    from app.services.seat_map import claim_seat_numbers, create_seat_map
+
+    with SessionLocal() as db:
+        user = User(email="cancel@example.com", username="cancel", hashed_password="x")
+        flight = Flight(
+            flight_number=f"CX{uuid.uuid4().hex[:6].upper()}",
+            airline="Cancel Air",
+            departure_city="KTM",
+            arrival_city="DEL",
+            departure_time=datetime.utcnow() + timedelta(days=1),
+            arrival_time=datetime.utcnow() + timedelta(days=1, hours=2),
+            price=100.0,
+            available_seats=seats,
+        )
+        db.add_all([user, flight])
+        create_seat_map(db, flight)
+        db.flush()
+
+        def book(seat_number, **values):
+            reserve_seats(db, flight.id)
+            claim_seat_numbers(db, flight, [seat_number])
+            booking = Booking(
+                booking_reference=f"BK-{uuid.uuid4().hex[:8].upper()}",
+                passenger_id=user.id,
+                flight_id=flight.id,
+                seat_number=seat_number,
+                payment_amount=100.0,
+                **values
+            )
+            db.add(booking)
+            return booking
+
+        paid = book(
+            "1A",
+            status=BookingStatus.CONFIRMED,
+            payment_status=PaymentStatus.COMPLETED,
+            payment_id=f"PAY-{uuid.uuid4().hex[:12].upper()}",
+        )
+        # Made long enough ago for the sweeper to expire it
+        expired = book(
+            "1B",
+            status=BookingStatus.PENDING,
+            payment_status=PaymentStatus.PENDING,
+            booking_date=datetime.utcnow() - timedelta(days=1),
+        )
+        db.commit()
+        return user.username, flight.id, paid.id, expired.id
+
+def inventory(SessionLocal, flight_id):
+    from app.models.flight import Flight
+    from app.models.seat_map import SeatMap
+    from app.services.seat_map import load_bitmap
+
+    with SessionLocal() as db:
+        seats = db.query(Flight.available_seats).filter(Flight.id == flight_id).scalar()
+        seat_map = db.query(SeatMap).filter(SeatMap.flight_id == flight_id).one()
+        return seats, load_bitmap(seat_map).occupied_count()
+
+async def main_async(args):
+    from app.database import SessionLocal
+    from app.main import app
+    from app.routes import bookings
+    from app.services.auth import create_access_token
+    from app.services.hold_sweeper import hold_sweeper
+    from benchmarks.asgi import ASGIClient
+
+    username, flight_id, paid_id, expired_id = setup(SessionLocal, args.seats)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': username, 'role': 'passenger'})}"}
+
+    refunds = []
+    refund_payment = bookings.refund_payment
+
+    async def slow_refund(payment_id):
+        refunds.append(payment_id)
+        await asyncio.sleep(args.gateway_latency)
+        return await refund_payment(payment_id)
+
+    bookings.refund_payment = slow_refund
+    client = ASGIClient(app)
+
+    async def cancel_all(booking_id, *others):
+        responses = await asyncio.gather(
+            *(client.request("POST", f"/api/bookings/{booking_id}/cancel", headers=headers) for _ in range(args.requests)),
+            *others
+        )
+        return [status for status, _, _ in responses[:args.requests]]
+
+    failures = 0
+
+    def check(label, statuses, allowed_wins, seats_before, seats_after, extra=""):
+        nonlocal failures
+        wins = statuses.count(200)
+        returned = seats_after[0] - seats_before[0]
+        freed = seats_before[1] - seats_after[1]
+        ok = wins in allowed_wins and returned == 1 and freed == 1
+        failures += not ok
+        print(
+            f"{label:<22} statuses {sorted(statuses)}  seats returned {returned}  "
+            f"seat map freed {freed}{extra}{'' if ok else '  <-- FAIL'}"
+        )
+
+    before = inventory(SessionLocal, flight_id)
+    statuses = await cancel_all(paid_id)
+    after = inventory(SessionLocal, flight_id)
+    failures += len(refunds) != 1
+    check("paid booking", statuses, {1}, before, after, f"  refunds {len(refunds)}")
+
+    # The sweeper may win the hold before any cancel does
+    before = after
+    statuses = await cancel_all(expired_id, asyncio.to_thread(hold_sweeper.sweep, SessionLocal))
+    after = inventory(SessionLocal, flight_id)
+    check("hold vs sweeper", statuses, {0, 1}, before, after)
+
+    bookings.refund_payment = refund_payment
+    from app import database
+    await database.dispose_async_engine()
+    if failures:
+        print("FAIL: a booking was cancelled, refunded or released more than once")
+        return 1
+    print("OK: each booking was cancelled, refunded and released exactly once")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5, help="parallel cancels per booking")
+    parser.add_argument("--seats", type=int, default=10)
+    parser.add_argument("--gateway-latency", type=float, default=0.05)
+    args = parser.parse_args(argv)
+    # Point the app at a throwaway database before it is imported
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'cancel.db')}")
+    return asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    sys.exit(main())
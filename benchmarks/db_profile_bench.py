@@ -0,0 +1,116 @@
+"""
+Concurrent read/write benchmark for the database engine profiles.
+
+Runs reader threads (flight searches) alongside writer threads (seat
+reservations) against a fresh database for each profile, and reports
+throughput, latency percentiles and failed operations.
+
+    python -m benchmarks.db_profile_bench --readers 8 --writers 2 --seconds 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from app.database import PROFILES, Base, create_db_engine
+from app.models.flight import Flight
+from app.services.inventory import reserve_seats
+
+CITIES = ["KTM", "DEL", "BOM", "DXB", "DOH", "SIN", "BKK", "HKG"]
+
+def setup(SessionLocal, flights):
+    departure = datetime.utcnow() + timedelta(days=1)
+    with SessionLocal() as db:
+        db.add_all(
+            Flight(
+                flight_number=f"PB{index:05d}",
+                airline="Profile Air",
+                departure_city=CITIES[index % len(CITIES)],
+                arrival_city=CITIES[(index + 1 + index // len(CITIES)) % len(CITIES)],
+                departure_time=departure + timedelta(minutes=index),
+                arrival_time=departure + timedelta(minutes=index + 120),
+                price=100.0,
+                available_seats=1_000_000,
+            )
+            for index in range(flights)
+        )
+        db.commit()
+
+def read(SessionLocal, index):
+    with SessionLocal() as db:
+        db.query(Flight).filter(
+            Flight.departure_city == CITIES[index % len(CITIES)],
+            Flight.is_active == True,
+        ).limit(50).all()
+
+def write(SessionLocal, flight_id):
+    with SessionLocal() as db:
+        reserve_seats(db, flight_id)
+        db.commit()
+
+def worker(operation, SessionLocal, flights, deadline, timings, errors):
+    index = 0
+    while time.perf_counter() < deadline:
+        index += 1
+        start = time.perf_counter()
+        try:
+            operation(SessionLocal, index % flights + 1)
+        except Exception:
+            errors.append(1)
+            continue
+        timings.append(time.perf_counter() - start)
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+def run(profile, url, args):
+    engine = create_db_engine(url, profile)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    setup(SessionLocal, args.flights)
+
+    reads, writes, errors = [], [], []
+    deadline = time.perf_counter() + args.seconds
+    threads = [
+        threading.Thread(target=worker, args=(read, SessionLocal, args.flights, deadline, reads, errors))
+        for _ in range(args.readers)
+    ] + [
+        threading.Thread(target=worker, args=(write, SessionLocal, args.flights, deadline, writes, errors))
+        for _ in range(args.writers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    for label, timings in (("reads", reads), ("writes", writes)):
+        print(
+            f"{profile:<11} {label:<7} {len(timings) / args.seconds:8.0f}/s  "
+            f"p50 {percentile(timings, 0.5) * 1000:7.2f}ms  p99 {percentile(timings, 0.99) * 1000:8.2f}ms"
+        )
+    print(f"{profile:<11} errors  {len(errors):8d}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--flights", type=int, default=2000)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--profile", choices=PROFILES, action="append", help="defaults to every profile")
+    parser.add_argument("--database-url", default=None, help="defaults to a throwaway SQLite file per profile")
+    args = parser.parse_args(argv)
+
+    for profile in args.profile or PROFILES:
+        url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), f'{profile}.db')}"
+        run(profile, url, args)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+Concurrency stress test for the seat inventory.
+
+Fires thousands of parallel booking attempts at a single flight, each taking
+inventory and then claiming a seat on the seat map as POST /bookings/ does.
+Every successful reservation is handed a different seat, so a seat conflict
+is always spurious. Checks that the flight is never oversold, that seat map
+and inventory agree, and that no attempt failed with a conflict. Reports
+booking throughput.
+
+    python -m benchmarks.inventory_stress --attempts 5000 --seats 1000 --workers 64
+"""
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import Base
+from app.models.booking import Booking, BookingStatus, PaymentStatus
+from app.models.flight import Flight
+from app.models.user import User
+from app.models.seat_map import SeatMap
+from app.services.inventory import reserve_seats
+from app.services.seat_map import SeatBitmap, SeatConflictError, claim_seat_numbers, create_seat_map, load_bitmap
+
+def setup(SessionLocal, seats):
+    with SessionLocal() as db:
+        user = User(email="stress@example.com", username="stress", hashed_password="x")
+        flight = Flight(
+            flight_number=f"ST{uuid.uuid4().hex[:6].upper()}",
+            airline="Stress Air",
+            departure_city="KTM",
+            arrival_city="DEL",
+            departure_time=datetime.utcnow() + timedelta(days=1),
+            arrival_time=datetime.utcnow() + timedelta(days=1, hours=2),
+            price=100.0,
+            available_seats=seats,
+        )
+        db.add_all([user, flight])
+        create_seat_map(db, flight)
+        db.commit()
+        return user.id, flight.id
+
+class SeatDispenser:
+    """
+    Hands out seats in cabin order, one per successful reservation.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexes = itertools.count()
+        self._cabin = SeatBitmap(1, settings.DEFAULT_CABIN_LAYOUT)
+
+    def next(self) -> str:
+        with self._lock:
+            return self._cabin.label(next(self._indexes))
+
+def book(SessionLocal, user_id, flight_id, seats: SeatDispenser):
+    with SessionLocal() as db:
+        try:
+            flight = db.get(Flight, flight_id)
+            if not reserve_seats(db, flight_id):
+                db.rollback()
+                return "sold_out"
+            seat_number = seats.next()
+            claim_seat_numbers(db, flight, [seat_number])
+            db.add(Booking(
+                booking_reference=f"BK-{uuid.uuid4().hex[:8].upper()}",
+                passenger_id=user_id,
+                flight_id=flight_id,
+                seat_number=seat_number,
+                status=BookingStatus.PENDING,
+                payment_status=PaymentStatus.PENDING,
+                payment_amount=100.0,
+            ))
+            db.commit()
+            return "booked"
+        except SeatConflictError:
+            db.rollback()
+            return "conflict"
+        except Exception:
+            db.rollback()
+            return "error"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--attempts", type=int, default=5000)
+    parser.add_argument("--seats", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--database-url", default=None, help="defaults to a throwaway SQLite file")
+    args = parser.parse_args(argv)
+
+    url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'stress.db')}"
+    connect_args = {"check_same_thread": False, "timeout": 60} if url.startswith("sqlite") else {}
+    engine = create_engine(url, connect_args=connect_args, pool_size=args.workers, max_overflow=0)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    user_id, flight_id = setup(SessionLocal, args.seats)
+    seats = SeatDispenser()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(lambda _: book(SessionLocal, user_id, flight_id, seats), range(args.attempts)))
+    elapsed = time.perf_counter() - start
+
+    with SessionLocal() as db:
+        remaining = db.query(Flight.available_seats).filter(Flight.id == flight_id).scalar()
+        rows = db.query(func.count(Booking.id)).filter(Booking.flight_id == flight_id).scalar()
+        occupied = load_bitmap(db.query(SeatMap).filter(SeatMap.flight_id == flight_id).one()).occupied_count()
+
+    booked = results.count("booked")
+    print(f"attempts:    {args.attempts}")
+    print(f"booked:      {booked}")
+    print(f"sold out:    {results.count('sold_out')}")
+    print(f"conflicts:   {results.count('conflict')}")
+    print(f"errors:      {results.count('error')}")
+    print(f"seats left:  {remaining}")
+    print(f"seat map:    {occupied} occupied")
+    print(f"elapsed:     {elapsed:.3f}s")
+    print(f"throughput:  {args.attempts / elapsed:.0f} attempts/s, {booked / elapsed:.0f} bookings/s")
+
+    ok = remaining >= 0 and booked == rows and booked + remaining == args.seats and occupied == booked
+    if not ok:
+        print("FAIL: flight was oversold or inventory drifted")
+        return 1
+    if results.count("conflict"):
+        print("FAIL: bookings for free seats failed with a seat conflict")
+        return 1
+    print("OK: never oversold, no spurious seat conflicts")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
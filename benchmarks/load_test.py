@@ -0,0 +1,459 @@
+"""
+Load test: drives the real app in-process with a realistic traffic mix and
+reports throughput and p50/p95/p99 latency per endpoint as JSON.
+
+A throwaway database is seeded at --scale (see benchmarks.seed), the app's
+startup hooks are run, and --concurrency virtual clients send requests
+through the ASGI interface for --duration seconds after a --warmup that is
+not recorded. Each client picks its next request from the weighted mix
+below: flight searches and reads, booking, paying for and cancelling seats,
+e-tickets and admin reports. A request is timed from the call into the app
+until its body is complete.
+
+    python -m benchmarks.load_test --scale small --duration 30 --output baseline.json
+    python -m benchmarks.load_test --scale small --duration 30 --baseline baseline.json
+
+With --baseline, the run is compared with the JSON of an earlier run and the
+exit status is 1 if total throughput, or any endpoint's p50/p95/p99 latency,
+is worse by more than --threshold (a fraction), or if an endpoint has errors
+it did not have before. Errors are server errors and client errors the
+request could not legitimately get (a 400 for a sold-out flight is expected;
+a 403 on one's own booking is not, and neither is a 409, since every client
+books a seat no other client was handed). Latency differences under
+--min-delta-ms are treated as noise, and a percentile is only compared when
+enough requests were slower than it (p99 needs 1000 requests). Runs are only
+comparable on the same machine with the same scale, concurrency, mix and
+seed.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+PAYMENT = {"amount": 100, "card_number": "4111111111111111", "expiry_date": "12/30", "cvv": "123"}
+
+# Relative weight of each operation in the traffic mix
+DEFAULT_MIX = {
+    "search": 20,
+    "search_post": 10,
+    "connections": 5,
+    "flight": 15,
+    "flight_list": 5,
+    "seatmap": 5,
+    "my_bookings": 8,
+    "book": 10,
+    "pay": 8,
+    "cancel": 3,
+    "e_ticket": 6,
+    "admin_dashboard": 2,
+    "admin_popular_routes": 2,
+    "admin_revenue": 1,
+}
+
+PERCENTILES = (("p50_ms", 0.5), ("p95_ms", 0.95), ("p99_ms", 0.99))
+# A percentile is only compared when at least this many requests were slower
+# than it in both runs; a p99 of 200 requests is the second slowest, not a trend
+TAIL_SAMPLES = 10
+
+# Confirmed bookings loaded for e-ticket requests
+MAX_TICKETS = 20000
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def parse_mix(text: Optional[str]) -> Dict[str, int]:
+    mix = dict(DEFAULT_MIX)
+    for item in filter(None, (text or "").split(",")):
+        name, _, weight = item.partition("=")
+        if name not in mix:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r}, expected one of {', '.join(mix)}")
+        mix[name] = int(weight)
+    return mix
+
+class Workload:
+    """
+    What the virtual clients know about the seeded data: flights and their
+    next free seat, passengers, confirmed bookings with e-tickets, and the
+    bookings created during the run that can still be paid for or cancelled.
+    """
+
+    def __init__(self, db):
+        from sqlalchemy import func
+
+        from app.config import settings
+        from app.models.booking import Booking, BookingStatus
+        from app.models.flight import Flight
+        from app.models.user import User, UserRole
+        from app.services.seat_map import SeatBitmap
+
+        self.cabin = SeatBitmap(1, settings.DEFAULT_CABIN_LAYOUT)
+        self.flights = db.query(
+            Flight.id, Flight.departure_city, Flight.arrival_city, Flight.departure_time, Flight.available_seats
+        ).filter(Flight.is_active == True).order_by(Flight.id).all()
+        held = dict(db.query(Booking.flight_id, func.count(Booking.id)).filter(
+            Booking.status != BookingStatus.CANCELLED
+        ).group_by(Booking.flight_id).all())
+        # Seeded bookings fill cabins in seat order, so seats from the held
+        # count up are free
+        self.next_seat = {flight.id: held.get(flight.id, 0) for flight in self.flights}
+        self.capacity = {flight.id: held.get(flight.id, 0) + flight.available_seats for flight in self.flights}
+        self.bookable = [flight.id for flight in self.flights if flight.available_seats > 0]
+
+        usernames = dict(db.query(User.id, User.username).all())
+        self.passengers = [
+            username for (username,) in
+            db.query(User.username).filter(User.role == UserRole.PASSENGER).order_by(User.id)
+        ]
+        self.admin = db.query(User.username).filter(User.role == UserRole.ADMIN).order_by(User.id).scalar()
+        self.tickets = [
+            (booking_id, usernames[passenger_id]) for booking_id, passenger_id in
+            db.query(Booking.id, Booking.passenger_id).filter(
+                Booking.status == BookingStatus.CONFIRMED
+            ).order_by(Booking.id).limit(MAX_TICKETS)
+        ]
+        self.holds: List[Tuple[int, str]] = []
+        self.paid: List[Tuple[int, str]] = []
+        self._headers: Dict[str, Dict[str, str]] = {}
+        self._roles = {self.admin: "admin"}
+
+    def headers(self, username: str) -> Dict[str, str]:
+        # Tokens are minted directly: logging in runs bcrypt, which would
+        # dominate the mix (login_bench measures that on its own)
+        headers = self._headers.get(username)
+        if headers is None:
+            from app.services.auth import create_access_token
+
+            token = create_access_token({"sub": username, "role": self._roles.get(username, "passenger")})
+            headers = self._headers[username] = {"Authorization": f"Bearer {token}"}
+        return headers
+
+    def take_seat(self, rng: random.Random) -> Optional[Tuple[int, int]]:
+        while self.bookable:
+            index = rng.randrange(len(self.bookable))
+            flight_id = self.bookable[index]
+            seat = self.next_seat[flight_id]
+            if seat < self.capacity[flight_id]:
+                self.next_seat[flight_id] = seat + 1
+                return flight_id, seat
+            self.bookable[index] = self.bookable[-1]
+            self.bookable.pop()
+        return None
+
+class Recorder:
+    def __init__(self):
+        self.recording = False
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.errors: Counter = Counter()
+
+    def record(self, endpoint: str, status: int, seconds: float, expected: Set[int]) -> None:
+        if not self.recording:
+            return
+        self.latencies[endpoint].append(seconds)
+        self.statuses[endpoint][status] += 1
+        if status >= 400 and status not in expected:
+            self.errors[endpoint] += 1
+
+    @property
+    def count(self) -> int:
+        return sum(len(values) for values in self.latencies.values())
+
+class Runner:
+    def __init__(self, client, workload: Workload, recorder: Recorder):
+        self.client = client
+        self.workload = workload
+        self.recorder = recorder
+
+    async def call(self, endpoint: str, path: str, username: str, expected: Set[int] = frozenset(), **kwargs):
+        method = endpoint.split(" ", 1)[0]
+        headers = self.workload.headers(username)
+        start = time.perf_counter()
+        status, _, body = await self.client.request(method, path, headers=headers, **kwargs)
+        self.recorder.record(endpoint, status, time.perf_counter() - start, expected)
+        return status, body
+
+    def passenger(self, rng: random.Random) -> str:
+        return rng.choice(self.workload.passengers)
+
+    def route(self, rng: random.Random) -> Dict[str, str]:
+        flight = rng.choice(self.workload.flights)
+        return {
+            "departure_city": flight.departure_city,
+            "arrival_city": flight.arrival_city,
+            "departure_date": flight.departure_time.date().isoformat(),
+        }
+
+    async def search(self, rng):
+        await self.call("GET /api/flights/search", "/api/flights/search", self.passenger(rng), query=self.route(rng))
+
+    async def search_post(self, rng):
+        await self.call("POST /api/flights/search", "/api/flights/search", self.passenger(rng), json_body=self.route(rng))
+
+    async def connections(self, rng):
+        search = self.route(rng)
+        # Another flight's destination, so most searches need a connection
+        search["arrival_city"] = rng.choice(self.workload.flights).arrival_city
+        await self.call(
+            "POST /api/flights/search/connections", "/api/flights/search/connections", self.passenger(rng),
+            expected={422}, json_body=search
+        )
+
+    async def flight(self, rng):
+        flight_id = rng.choice(self.workload.flights).id
+        await self.call("GET /api/flights/{flight_id}", f"/api/flights/{flight_id}", self.passenger(rng))
+
+    async def flight_list(self, rng):
+        await self.call("GET /api/flights/", "/api/flights/", self.passenger(rng), query={"limit": "50"})
+
+    async def seatmap(self, rng):
+        flight_id = rng.choice(self.workload.flights).id
+        await self.call("GET /api/flights/{flight_id}/seatmap", f"/api/flights/{flight_id}/seatmap", self.passenger(rng))
+
+    async def my_bookings(self, rng):
+        await self.call("GET /api/bookings/", "/api/bookings/", self.passenger(rng), query={"limit": "20"})
+
+    async def book(self, rng):
+        taken = self.workload.take_seat(rng)
+        if taken is None:
+            return await self.flight(rng)
+        flight_id, seat = taken
+        seat_number = self.workload.cabin.label(seat)
+        username = self.passenger(rng)
+        status, body = await self.call(
+            "POST /api/bookings/", "/api/bookings/", username, expected={400},
+            json_body={"flight_id": flight_id, "seat_number": seat_number}
+        )
+        if status == 200:
+            self.workload.holds.append((json.loads(body)["id"], username))
+
+    async def pay(self, rng):
+        holds = self.workload.holds
+        if not holds:
+            return await self.book(rng)
+        booking_id, username = holds.pop(rng.randrange(len(holds)))
+        status, body = await self.call(
+            "POST /api/bookings/{booking_id}/payment", f"/api/bookings/{booking_id}/payment", username,
+            expected={400, 402}, json_body=dict(PAYMENT, booking_id=booking_id)
+        )
+        if status == 200 and json.loads(body)["payment_status"] == "completed":
+            self.workload.paid.append((booking_id, username))
+
+    async def cancel(self, rng):
+        pool = self.workload.paid or self.workload.holds
+        if not pool:
+            return await self.book(rng)
+        booking_id, username = pool.pop(rng.randrange(len(pool)))
+        await self.call(
+            "POST /api/bookings/{booking_id}/cancel", f"/api/bookings/{booking_id}/cancel", username,
+            expected={400}
+        )
+
+    async def e_ticket(self, rng):
+        if not self.workload.tickets:
+            return await self.my_bookings(rng)
+        booking_id, username = rng.choice(self.workload.tickets)
+        await self.call(
+            "GET /api/bookings/{booking_id}/e-ticket", f"/api/bookings/{booking_id}/e-ticket", username,
+            expected={400}
+        )
+
+    async def admin_dashboard(self, rng):
+        await self.call("GET /api/admin/dashboard/stats", "/api/admin/dashboard/stats", self.workload.admin)
+
+    async def admin_popular_routes(self, rng):
+        await self.call(
+            "GET /api/admin/popular-routes", "/api/admin/popular-routes", self.workload.admin,
+            query={"limit": "10", "hours": "24"}
+        )
+
+    async def admin_revenue(self, rng):
+        await self.call("GET /api/admin/revenue/daily", "/api/admin/revenue/daily", self.workload.admin)
+
+async def virtual_client(runner: Runner, rng: random.Random, mix: Dict[str, int], stop: asyncio.Event, budget):
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    while not stop.is_set() and not budget():
+        await getattr(runner, rng.choices(names, weights)[0])(rng)
+
+def summarize(latencies: List[float], statuses: Counter, errors: int, elapsed: float) -> Dict:
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3),
+    }
+
+async def run(args, mix: Dict[str, int]) -> Dict:
+    from app.database import SessionLocal
+    from app.main import app
+    from benchmarks import seed
+    from benchmarks.asgi import ASGIClient
+
+    # One log line per request would measure the terminal, not the app
+    logging.disable(logging.INFO)
+
+    scale = seed.scale_from_args(args)
+    with SessionLocal() as db:
+        if not args.skip_seed:
+            seeded = seed.seed(db, scale, args.seed, args.days)
+            print(
+                f"Seeded {seeded.users} users, {seeded.flights} flights and {seeded.bookings} bookings "
+                f"in {seeded.elapsed_seconds:.2f}s", file=sys.stderr
+            )
+        workload = Workload(db)
+
+    await app.router.startup()
+    try:
+        recorder = Recorder()
+        runner = Runner(ASGIClient(app), workload, recorder)
+        stop = asyncio.Event()
+        budget = (lambda: recorder.count >= args.requests) if args.requests else (lambda: False)
+        clients = [
+            asyncio.create_task(virtual_client(runner, random.Random(args.seed * 1000 + index), mix, stop, budget))
+            for index in range(args.concurrency)
+        ]
+        await asyncio.sleep(args.warmup)
+        recorder.recording = True
+        started = time.perf_counter()
+        if args.requests:
+            await asyncio.gather(*clients)
+        else:
+            await asyncio.sleep(args.duration)
+            stop.set()
+            await asyncio.gather(*clients)
+        # Requests still in flight when the clock stopped are counted, so
+        # the measured window ends when the last one does
+        elapsed = time.perf_counter() - started
+    finally:
+        await app.router.shutdown()
+
+    all_latencies = [value for values in recorder.latencies.values() for value in values]
+    all_statuses = sum(recorder.statuses.values(), Counter())
+    return {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "scale": {"users": scale.users, "flights": scale.flights, "bookings": scale.bookings},
+            "seed": args.seed,
+            "concurrency": args.concurrency,
+            "warmup_seconds": args.warmup,
+            "elapsed_seconds": round(elapsed, 3),
+            "mix": mix,
+            "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "total": summarize(all_latencies, all_statuses, sum(recorder.errors.values()), elapsed),
+        "endpoints": {
+            endpoint: summarize(latencies, recorder.statuses[endpoint], recorder.errors[endpoint], elapsed)
+            for endpoint, latencies in sorted(recorder.latencies.items())
+        },
+    }
+
+def print_report(result: Dict, file=sys.stderr) -> None:
+    meta = result["meta"]
+    print(
+        f"{meta['concurrency']} clients for {meta['elapsed_seconds']:.1f}s: "
+        f"{result['total']['requests']} requests, {result['total']['throughput_rps']:.1f} req/s",
+        file=file
+    )
+    print(f"{'endpoint':<42} {'reqs':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}", file=file)
+    for endpoint, summary in list(result["endpoints"].items()) + [("total", result["total"])]:
+        print(
+            f"{endpoint:<42} {summary['requests']:7d} {summary['throughput_rps']:8.1f} {summary['p50_ms']:8.2f} "
+            f"{summary['p95_ms']:8.2f} {summary['p99_ms']:8.2f} {summary['errors']:6d}",
+            file=file
+        )
+
+def compare(result: Dict, baseline: Dict, threshold: float, min_delta_ms: float) -> List[str]:
+    """
+    Regressions of `result` against `baseline`, as human-readable lines.
+    """
+    regressions = []
+    for key in ("scale", "concurrency", "mix", "seed", "cpus"):
+        if result["meta"].get(key) != baseline["meta"].get(key):
+            print(f"warning: baseline was recorded with a different {key}", file=sys.stderr)
+
+    before, after = baseline["total"]["throughput_rps"], result["total"]["throughput_rps"]
+    if after < before * (1 - threshold):
+        regressions.append(f"total throughput {before:.1f} -> {after:.1f} req/s ({after / before - 1:+.0%})")
+
+    for endpoint, old in baseline["endpoints"].items():
+        new = result["endpoints"].get(endpoint)
+        if new is None:
+            print(f"warning: {endpoint} was not exercised in this run", file=sys.stderr)
+            continue
+        for metric, fraction in PERCENTILES:
+            if min(old["requests"], new["requests"]) * (1 - fraction) < TAIL_SAMPLES:
+                continue
+            before, after = old[metric], new[metric]
+            if after > before * (1 + threshold) and after - before > min_delta_ms:
+                regressions.append(f"{endpoint} {metric[:3]} {before:.2f} -> {after:.2f}ms ({after / before - 1:+.0%})")
+        if new["errors"] and not old["errors"]:
+            regressions.append(f"{endpoint} returned {new['errors']} errors, none in the baseline")
+    return regressions
+
+def main(argv=None):
+    database_given = "DATABASE_URL" in os.environ
+    # Point the app at a throwaway database before it is imported
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'load.db')}")
+    from benchmarks.seed import add_scale_arguments
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_scale_arguments(parser)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of measured load")
+    parser.add_argument("--requests", type=int, help="stop after this many measured requests instead")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds of unrecorded load first")
+    parser.add_argument("--mix", help="weight overrides, e.g. search=40,book=0")
+    parser.add_argument("--skip-seed", action="store_true", help="use the DATABASE_URL database as it is")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown, as a fraction")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0)
+    args = parser.parse_args(argv)
+    try:
+        mix = parse_mix(args.mix)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    if args.skip_seed and not database_given:
+        parser.error("--skip-seed needs DATABASE_URL pointing at a seeded database")
+
+    result = asyncio.run(run(args, mix))
+    print_report(result)
+
+    report = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.threshold, args.min_delta_ms)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Login throughput with bcrypt running inline versus in the password-hashing
+process pool at different worker counts.
+
+    python -m benchmarks.login_bench --logins 200 --concurrency 32 --workers 0,1,2,4
+
+Worker count 0 hashes in the server thread pool. Rejected logins are
+those answered 503 because the hashing queue was full.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def run(client, logins, concurrency):
+    gate = asyncio.Semaphore(concurrency)
+    timings = []
+    statuses = []
+
+    async def login():
+        async with gate:
+            start = time.perf_counter()
+            status, _, _ = await client.request(
+                "POST", "/api/auth/token", form={"username": "bench", "password": "bench"}
+            )
+            timings.append(time.perf_counter() - start)
+            statuses.append(status)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    return time.perf_counter() - start, timings, statuses
+
+async def main_async(args):
+    from app.main import app
+    from app.services import auth
+    from app.services.password_hasher import PasswordHasher
+    from benchmarks.asgi import ASGIClient
+
+    client = ASGIClient(app)
+    await client.request("POST", "/api/auth/register", json_body={
+        "email": "bench@example.com", "username": "bench", "password": "bench", "role": "passenger"
+    })
+
+    print(f"{os.cpu_count()} CPUs, {args.logins} logins, {args.concurrency} concurrent, queue depth {args.queue_depth}")
+    for workers in args.workers:
+        hasher = PasswordHasher(workers, args.queue_depth)
+        hasher.start()
+        auth.password_hasher = hasher
+        try:
+            elapsed, timings, statuses = await run(client, args.logins, args.concurrency)
+        finally:
+            hasher.shutdown()
+        ok = statuses.count(200)
+        print(
+            f"workers={workers:<3} {ok / elapsed:7.1f} logins/s  "
+            f"p50 {percentile(timings, 0.5) * 1000:7.1f}ms  p99 {percentile(timings, 0.99) * 1000:7.1f}ms  "
+            f"ok {ok}  rejected {statuses.count(503)}"
+        )
+
+    from app import database
+    await database.dispose_async_engine()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--queue-depth", type=int, default=64)
+    parser.add_argument(
+        "--workers",
+        type=lambda value: [int(part) for part in value.split(",")],
+        default=sorted({0, 1, 2, os.cpu_count() or 1})
+    )
+    args = parser.parse_args(argv)
+    # Point the app at a throwaway database before it is imported
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+    asyncio.run(main_async(args))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Stand-in payment gateway for tests and benchmarks.
+
+Speaks the protocol app.services.payment uses (POST a charge or refund, get
+back {"status", "payment_id", "message"}), with configurable latency and
+failures. Replays the stored answer for a repeated Idempotency-Key, like a
+real gateway, so retried charges are only taken once.
+
+    python -m benchmarks.mock_gateway --port 8900 --latency 0.2 --error-rate 0.1
+
+Point the app at it with:
+
+    PAYMENT_GATEWAY_MOCK=false
+    PAYMENT_GATEWAY_URL=http://127.0.0.1:8900/api/v1/process
+    PAYMENT_GATEWAY_REFUND_URL=http://127.0.0.1:8900/api/v1/refund
+"""
+import argparse
+import asyncio
+import random
+import sys
+import uuid
+from dataclasses import dataclass
+
+from fastapi import FastAPI, Header, Request
+from fastapi.responses import JSONResponse
+
+@dataclass
+class GatewayBehaviour:
+    latency: float = 0.0
+    jitter: float = 0.0
+    # Share of requests answered with 503 (retryable)
+    error_rate: float = 0.0
+    # Share of charges that are declined (a normal, final answer)
+    decline_rate: float = 0.0
+
+def create_gateway(behaviour: GatewayBehaviour) -> FastAPI:
+    gateway = FastAPI(title="Mock payment gateway")
+    gateway.state.behaviour = behaviour
+    gateway.state.answers = {}
+    gateway.state.charges = 0
+
+    async def respond(request: Request, idempotency_key, answer):
+        behaviour = request.app.state.behaviour
+        delay = behaviour.latency + random.uniform(0, behaviour.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if random.random() < behaviour.error_rate:
+            return JSONResponse({"message": "Gateway overloaded"}, status_code=503)
+        if idempotency_key and idempotency_key in request.app.state.answers:
+            return request.app.state.answers[idempotency_key]
+        result = answer()
+        if idempotency_key:
+            request.app.state.answers[idempotency_key] = result
+        return result
+
+    @gateway.post("/api/v1/process")
+    async def process(request: Request, idempotency_key: str = Header(None)):
+        payload = await request.json()
+
+        def charge():
+            if len(payload.get("card_number", "")) not in range(13, 20) or len(payload.get("cvv", "")) != 3:
+                return {"status": "failed", "payment_id": None, "message": "Invalid card details"}
+            if random.random() < request.app.state.behaviour.decline_rate:
+                return {"status": "failed", "payment_id": None, "message": "Card declined"}
+            request.app.state.charges += 1
+            return {
+                "status": "completed",
+                "payment_id": f"PAY-{uuid.uuid4().hex[:12].upper()}",
+                "message": "Payment processed successfully"
+            }
+
+        return await respond(request, idempotency_key, charge)
+
+    @gateway.post("/api/v1/refund")
+    async def refund(request: Request, idempotency_key: str = Header(None)):
+        payload = await request.json()
+        return await respond(request, idempotency_key, lambda: {
+            "status": "refunded",
+            "payment_id": payload.get("payment_id"),
+            "message": "Refund processed successfully"
+        })
+
+    return gateway
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many extra seconds at random")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--decline-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    behaviour = GatewayBehaviour(args.latency, args.jitter, args.error_rate, args.decline_rate)
+    uvicorn.run(create_gateway(behaviour), host=args.host, port=args.port, log_level="warning")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Payment throughput against a slow or flaky gateway.
+
+Starts the stand-in gateway (benchmarks.mock_gateway) in a subprocess and
+fires concurrent charges at it, once through the pooled client with
+retries and circuit breaker, and once with a fresh connection and no retries
+per charge. Reports throughput, latency percentiles and failed charges for a
+range of gateway latencies.
+
+    python -m benchmarks.payment_gateway_bench --charges 2000 --concurrency 200 --latency 0.05 0.2 0.5
+"""
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from app.services.payment_gateway import CircuitBreaker, PaymentGatewayClient, PaymentGatewayError
+
+CHARGE = {"amount": 100.0, "card_number": "4111111111111111", "expiry_date": "12/30", "cvv": "123"}
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_gateway(port: int, latency: float, error_rate: float) -> subprocess.Popen:
+    # Its own process, so serving the gateway does not compete with the client for the GIL
+    process = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.mock_gateway", "--port", str(port),
+        "--latency", str(latency), "--jitter", str(latency / 2), "--error-rate", str(error_rate)
+    ])
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+async def run(charges: int, concurrency: int, charge):
+    timings, failures = [], []
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with slots:
+            start = time.perf_counter()
+            try:
+                await charge()
+            except (PaymentGatewayError, httpx.HTTPError) as e:
+                failures.append(e)
+                return
+            timings.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(charges)))
+    return time.perf_counter() - started, timings, failures
+
+def report(label, elapsed, timings, failures, charges):
+    print(
+        f"  {label:<9} {charges / elapsed:7.0f} charges/s  p50 {percentile(timings, 0.5) * 1000:7.1f}ms  "
+        f"p99 {percentile(timings, 0.99) * 1000:7.1f}ms  failed {len(failures)}"
+    )
+
+async def scenario(url: str, args):
+    client = PaymentGatewayClient(
+        api_key="bench",
+        timeout=args.timeout,
+        connect_timeout=2,
+        max_concurrency=args.pool,
+        max_retries=2,
+        backoff=0.05,
+        breaker=CircuitBreaker(threshold=args.charges, reset_timeout=5)
+    )
+    elapsed, timings, failures = await run(args.charges, args.concurrency, lambda: client.post(url, CHARGE))
+    report("pooled", elapsed, timings, failures, args.charges)
+    print(f"  {'':<9} {client.stats()}")
+    await client.aclose()
+
+    async def unpooled():
+        async with httpx.AsyncClient(timeout=args.timeout) as session:
+            response = await session.post(url, json=CHARGE)
+            response.raise_for_status()
+
+    elapsed, timings, failures = await run(args.charges, args.concurrency, unpooled)
+    report("unpooled", elapsed, timings, failures, args.charges)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--charges", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200, help="charges in flight from callers")
+    parser.add_argument("--pool", type=int, default=50, help="pooled client connections")
+    parser.add_argument("--latency", type=float, nargs="+", default=[0.05, 0.2, 0.5])
+    parser.add_argument("--error-rate", type=float, default=0.05, help="share of gateway answers that are 503")
+    parser.add_argument("--timeout", type=float, default=10)
+    args = parser.parse_args(argv)
+
+    for latency in args.latency:
+        port = free_port()
+        gateway = start_gateway(port, latency, args.error_rate)
+        print(f"gateway latency {latency * 1000:.0f}ms (+{latency * 500:.0f}ms jitter), {args.error_rate:.0%} errors")
+        asyncio.run(scenario(f"http://127.0.0.1:{port}/api/v1/process", args))
+        gateway.terminate()
+        gateway.wait()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Mixed read and payment load: concurrent flight reads while bookings are paid
+for, reporting latency percentiles for both and how long the event loop was
+stalled. Run it on two revisions to compare database layers.
+
+    python -m benchmarks.payment_load_bench --bookings 300 --readers 16
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+PAYMENT = {"amount": 100, "card_number": "4111111111111111", "expiry_date": "12/30", "cvv": "123"}
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def report(label, timings):
+    print(
+        f"{label:<10} {len(timings):6d} requests  p50 {percentile(timings, 0.5) * 1000:7.2f}ms  "
+        f"p99 {percentile(timings, 0.99) * 1000:7.2f}ms  max {max(timings) * 1000:7.2f}ms"
+    )
+
+async def monitor_loop(stop, lags, interval=0.005):
+    # Sleeps that wake up late mean something was blocking the event loop
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+async def main_async(args):
+    from app import database
+    from app.main import app
+    from benchmarks.asgi import ASGIClient
+
+    client = ASGIClient(app)
+    await client.request("POST", "/api/auth/register", json_body={
+        "email": "admin@example.com", "username": "admin", "password": "admin", "role": "admin"
+    })
+    await client.request("POST", "/api/auth/register", json_body={
+        "email": "pax@example.com", "username": "pax", "password": "pax", "role": "passenger"
+    })
+    admin = await client.login("admin", "admin")
+    pax = await client.login("pax", "pax")
+
+    _, _, body = await client.request("POST", "/api/flights/", headers=admin, json_body={
+        "flight_number": "BN1", "airline": "Bench Air", "departure_city": "KTM", "arrival_city": "DEL",
+        "departure_time": "2030-01-01T10:00:00", "arrival_time": "2030-01-01T12:00:00",
+        "price": 100.0, "available_seats": args.bookings,
+    })
+    flight_id = int(body.split(b'"id":')[1].split(b",")[0].strip(b" }"))
+
+    _, _, body = await client.request("GET", f"/api/flights/{flight_id}/seatmap", headers=pax)
+    booking_ids = []
+    letters = "ABCDEF"
+    for index in range(args.bookings):
+        seat = f"{index // len(letters) + 1}{letters[index % len(letters)]}"
+        status, _, body = await client.request(
+            "POST", "/api/bookings/", headers=pax, json_body={"flight_id": flight_id, "seat_number": seat}
+        )
+        assert status == 200, body
+        booking_ids.append(int(body.split(b'"id":')[1].split(b",")[0].strip(b" }")))
+
+    reads, payments, lags = [], [], []
+    stop = asyncio.Event()
+
+    async def reader():
+        while not stop.is_set():
+            start = time.perf_counter()
+            await client.request("GET", f"/api/flights/{flight_id}", headers=pax)
+            reads.append(time.perf_counter() - start)
+
+    async def payer(queue):
+        while queue:
+            booking_id = queue.pop()
+            start = time.perf_counter()
+            status, _, body = await client.request(
+                "POST", f"/api/bookings/{booking_id}/payment", headers=pax,
+                json_body=dict(PAYMENT, booking_id=booking_id)
+            )
+            payments.append(time.perf_counter() - start)
+            assert status == 200, body
+
+    queue = list(booking_ids)
+    monitor = asyncio.create_task(monitor_loop(stop, lags))
+    readers = [asyncio.create_task(reader()) for _ in range(args.readers)]
+    started = time.perf_counter()
+    await asyncio.gather(*(payer(queue) for _ in range(args.payers)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await asyncio.gather(monitor, *readers)
+
+    print(f"{args.bookings} payments by {args.payers} clients alongside {args.readers} readers in {elapsed:.2f}s")
+    report("reads", reads)
+    report("payments", payments)
+    print(
+        f"loop lag   mean {statistics.mean(lags) * 1000:7.2f}ms  p99 {percentile(lags, 0.99) * 1000:7.2f}ms  "
+        f"max {max(lags) * 1000:7.2f}ms"
+    )
+    # Older revisions have no async engine
+    if hasattr(database, "dispose_async_engine"):
+        await database.dispose_async_engine()
+    elif hasattr(database, "async_engine"):
+        await database.async_engine.dispose()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bookings", type=int, default=300)
+    parser.add_argument("--payers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=16)
+    args = parser.parse_args(argv)
+    # Point the app at a throwaway database before it is imported
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+    asyncio.run(main_async(args))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Per-request savings of the authenticated-principal cache on /flights/search.
+
+Runs the same authenticated searches with the principal cache disabled and
+enabled, and reports latency and SQL statements per request.
+
+    python -m benchmarks.principal_cache_bench --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def run(client, headers, requests):
+    timings = []
+    queries = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        status, response_headers, _ = await client.request(
+            "POST", "/api/flights/search", json_body={"departure_city": "KTM"}, headers=headers
+        )
+        timings.append(time.perf_counter() - start)
+        assert status == 200, status
+        queries.append(int(response_headers.get("x-query-count", 0)))
+    return timings, queries
+
+async def main_async(args):
+    from app.main import app
+    from app.services.auth import principal_cache
+    from benchmarks.asgi import ASGIClient
+
+    client = ASGIClient(app)
+    admin = {"email": "bench@example.com", "username": "bench", "password": "bench", "role": "admin"}
+    await client.request("POST", "/api/auth/register", json_body=admin)
+    headers = await client.login("bench", "bench")
+    await client.request("POST", "/api/flights/", headers=headers, json_body={
+        "flight_number": "BN1", "airline": "Bench Air", "departure_city": "KTM", "arrival_city": "DEL",
+        "departure_time": "2030-01-01T10:00:00", "arrival_time": "2030-01-01T12:00:00",
+        "price": 100.0, "available_seats": 100,
+    })
+    # Warm the search cache so the principal lookup is the only DB work left
+    await run(client, headers, 50)
+
+    maxsize = principal_cache.maxsize
+    results = {}
+    for label, size in (("without cache", 0), ("with cache", maxsize)):
+        principal_cache.maxsize = size
+        principal_cache.clear()
+        results[label] = await run(client, headers, args.requests)
+    principal_cache.maxsize = maxsize
+
+    for label, (timings, queries) in results.items():
+        print(
+            f"{label:<14} {args.requests / sum(timings):8.0f} req/s  "
+            f"mean {statistics.mean(timings) * 1e6:7.0f}us  p99 {percentile(timings, 0.99) * 1e6:7.0f}us  "
+            f"{statistics.mean(queries):.2f} queries/request"
+        )
+    saved = statistics.mean(results["without cache"][0]) - statistics.mean(results["with cache"][0])
+    print(f"saved per request: {saved * 1e6:.0f}us")
+    print(f"cache stats: {principal_cache.stats()}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args(argv)
+    # Point the app at a throwaway database before it is imported
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+    asyncio.run(main_async(args))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+N+1 check for the list endpoints.
+
+Seeds a throwaway database (see benchmarks.seed), then requests every list
+endpoint twice, with a small and a large page (or, for a flight's e-tickets,
+a flight with few and one with many passengers), and compares the
+X-Query-Count headers. Eager loading keeps the statements per request the
+same whatever the number of rows; a relationship that starts lazy-loading
+per row shows up as a higher count on the large page, and the check exits
+with status 1.
+
+    python -m benchmarks.query_count_check --small 5 --large 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+async def main_async(args):
+    from sqlalchemy import func
+
+    from app.database import SessionLocal
+    from app.main import app
+    from app.models.booking import Booking, BookingStatus
+    from app.models.user import User
+    from app.services.auth import create_access_token
+    from benchmarks import seed
+    from benchmarks.asgi import ASGIClient
+
+    with SessionLocal() as db:
+        seed.seed(db, seed.SCALES["small"], args.seed)
+        # The passenger with the most bookings, and flights with the fewest
+        # and the most confirmed passengers
+        busiest = db.query(User.username).join(Booking, Booking.passenger_id == User.id).group_by(User.id).order_by(
+            func.count(Booking.id).desc()
+        ).limit(1).scalar()
+        confirmed = db.query(Booking.flight_id, func.count(Booking.id)).filter(
+            Booking.status == BookingStatus.CONFIRMED
+        ).group_by(Booking.flight_id).order_by(func.count(Booking.id), Booking.flight_id).all()
+        quiet_flight, busy_flight = confirmed[0][0], confirmed[-1][0]
+
+    def headers(username, role):
+        return {"Authorization": f"Bearer {create_access_token({'sub': username, 'role': role})}"}
+
+    admin = headers(seed.ADMIN_USERNAME, "admin")
+    staff = headers(seed.STAFF_USERNAME, "staff")
+    passenger = headers(busiest, "passenger")
+    small, large = str(args.small), str(args.large)
+    checks = [
+        ("GET /api/flights/", admin, "/api/flights/", {"limit": small}, {"limit": large}),
+        ("GET /api/bookings/ (all)", admin, "/api/bookings/", {"limit": small}, {"limit": large}),
+        ("GET /api/bookings/ (own)", passenger, "/api/bookings/", {"limit": "1"}, {"limit": large}),
+        ("GET /api/passengers/", staff, "/api/passengers/", {"limit": small}, {"limit": large}),
+        ("GET /api/passengers/ (offset)", staff, "/api/passengers/", {"skip": "1", "limit": small}, {"skip": "1", "limit": large}),
+        ("GET /api/flights/{id}/e-tickets", staff, None, quiet_flight, busy_flight),
+    ]
+
+    client = ASGIClient(app)
+    # Authenticate each user once, so the principal cache is warm for both pages
+    for user_headers in (admin, staff, passenger):
+        await client.request("GET", "/api/auth/me", headers=user_headers)
+
+    async def measure(user_headers, path, query):
+        status, response_headers, body = await client.request("GET", path, headers=user_headers, query=query)
+        assert status == 200, (path, query, status, body[:200])
+        return len(json.loads(body)), int(response_headers["x-query-count"])
+
+    failures = 0
+    print(f"{'endpoint':<34} {'rows':>6} {'queries':>8} {'rows':>6} {'queries':>8}")
+    for label, user_headers, path, few, many in checks:
+        if path is None:
+            small_rows, small_queries = await measure(user_headers, f"/api/flights/{few}/e-tickets", None)
+            large_rows, large_queries = await measure(user_headers, f"/api/flights/{many}/e-tickets", None)
+        else:
+            small_rows, small_queries = await measure(user_headers, path, few)
+            large_rows, large_queries = await measure(user_headers, path, many)
+        flag = "" if small_queries == large_queries else "  <-- grows with rows"
+        failures += bool(flag)
+        print(f"{label:<34} {small_rows:6d} {small_queries:8d} {large_rows:6d} {large_queries:8d}{flag}")
+
+    from app import database
+    await database.dispose_async_engine()
+    if failures:
+        print(f"FAIL: {failures} endpoints run more statements for more rows")
+        return 1
+    print("OK: statements per request do not depend on the number of rows")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--small", type=int, default=5)
+    parser.add_argument("--large", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+    # Point the app at a throwaway database before it is imported
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'queries.db')}")
+    return asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    sys.exit(main())
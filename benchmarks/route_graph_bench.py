@@ -0,0 +1,95 @@
+"""
+Connection search benchmark on a synthetic flight network.
+
+Builds a route graph of --flights legs between --airports airports spread
+over --days days, then times one- and two-stop searches between random
+airport pairs.
+
+    python -m benchmarks.route_graph_bench --flights 120000 --airports 150 --queries 500
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app.services.events import FlightSnapshot
+from app.services.route_graph import RouteGraph
+
+def synthetic_network(flights, airports, days, seed):
+    rng = random.Random(seed)
+    codes = [f"A{i:03d}" for i in range(airports)]
+    # A few hubs carry most of the traffic, like real networks
+    weights = [1.0 / (rank + 1) for rank in range(airports)]
+    base = datetime(2030, 1, 1)
+    legs = []
+    for flight_id in range(1, flights + 1):
+        origin, destination = rng.choices(codes, weights=weights, k=2)
+        while destination == origin:
+            destination = rng.choice(codes)
+        departure = base + timedelta(minutes=rng.randrange(days * 24 * 60))
+        arrival = departure + timedelta(minutes=rng.randint(45, 600))
+        legs.append(FlightSnapshot(
+            id=flight_id,
+            flight_number=f"SY{flight_id}",
+            airline=rng.choice(["Alpha", "Bravo", "Charlie"]),
+            departure_city=origin,
+            arrival_city=destination,
+            departure_time=departure,
+            arrival_time=arrival,
+            price=float(rng.randint(50, 900)),
+            available_seats=rng.randint(0, 180),
+            is_active=True,
+        ))
+    return codes, base, legs
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flights", type=int, default=120000)
+    parser.add_argument("--airports", type=int, default=150)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    codes, base, legs = synthetic_network(args.flights, args.airports, args.days, args.seed)
+    graph = RouteGraph()
+    start = time.perf_counter()
+    graph.load(legs)
+    build = time.perf_counter() - start
+
+    rng = random.Random(args.seed + 1)
+    start = time.perf_counter()
+    for flight_id in range(args.flights + 1, args.flights + 1001):
+        leg = rng.choice(legs)
+        graph.upsert(FlightSnapshot(**{**leg.__dict__, "id": flight_id}))
+    upserts = (time.perf_counter() - start) / 1000
+
+    print(f"network:  {len(graph)} legs, {args.airports} airports, {args.days} days")
+    print(f"build:    {build:.3f}s")
+    print(f"upsert:   {upserts * 1e6:.1f}us per flight")
+    for sort_by in ("duration", "price"):
+        timings = []
+        found = 0
+        for _ in range(args.queries):
+            origin, destination = rng.sample(codes, 2)
+            day = base + timedelta(days=rng.randrange(args.days - 1))
+            start = time.perf_counter()
+            results = graph.search(origin, destination, day, day + timedelta(days=1), sort_by=sort_by, limit=args.limit)
+            timings.append(time.perf_counter() - start)
+            found += bool(results)
+        print(
+            f"search by {sort_by:<8} p50 {percentile(timings, 0.5) * 1000:.2f}ms  "
+            f"p95 {percentile(timings, 0.95) * 1000:.2f}ms  p99 {percentile(timings, 0.99) * 1000:.2f}ms  "
+            f"mean {statistics.mean(timings) * 1000:.2f}ms  ({found}/{args.queries} with results)"
+        )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+Synthetic data generator for benchmarks and load tests.
+
+Fills the database named by DATABASE_URL with passengers (plus one admin and
+one staff account), flights over a network of busy and quiet airports, and
+bookings in every state, using chunked executemany INSERTs. The dashboard
+counters, revenue rollup and popular-route counters are then rebuilt by the
+same jobs used in maintenance; seat maps are created on first use from the
+seeded bookings, as for imported flights.
+
+The same --seed always gives the same rows. Dates are relative to the day of
+seeding, so flights are in the future and unpaid holds are still live.
+Every account's password is "bench".
+
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.seed --scale medium
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.seed --users 5000 --bookings 250000
+"""
+import argparse
+import random
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.booking import Booking, BookingStatus, PaymentStatus
+from app.models.flight import Flight
+from app.models.user import User, UserRole
+from app.services import popular_routes, revenue, stats
+from app.services.catalog_version import touch_catalog
+from app.services.events import catalog_reset
+from app.services.flight_import import IMPORT_BATCH_SIZE
+from app.services.password_hasher import pwd_context
+from app.services.seat_map import SeatBitmap
+
+PASSWORD = "bench"
+ADMIN_USERNAME = "admin"
+STAFF_USERNAME = "staff"
+
+@dataclass(frozen=True)
+class Scale:
+    users: int
+    flights: int
+    bookings: int
+
+SCALES = {
+    "small": Scale(users=1_000, flights=500, bookings=10_000),
+    "medium": Scale(users=10_000, flights=5_000, bookings=100_000),
+    "large": Scale(users=100_000, flights=20_000, bookings=1_000_000),
+}
+
+# Busiest first; airports are picked with Zipf-like weights so a few routes
+# carry most of the traffic, as in a real schedule
+AIRPORTS = (
+    "ATL", "DXB", "LHR", "DFW", "HND", "DEN", "IST", "LAX", "ORD", "DEL",
+    "CDG", "JFK", "AMS", "MAD", "FRA", "SIN", "ICN", "BKK", "SFO", "SEA",
+    "MIA", "BCN", "MUC", "FCO", "SYD", "YYZ", "DOH", "HKG", "KUL", "MEX",
+    "GRU", "ZRH", "VIE", "CPH", "OSL", "DUB", "LIS", "ATH", "KTM", "NBO",
+)
+AIRLINES = ("Skyward", "Blue Meridian", "Northwind", "Coastal Air", "Orbit Airways")
+CAPACITIES = (60, 120, 150, 180, 240)
+
+# Share of seeded bookings in each state; the rest are cancelled
+CONFIRMED_SHARE = 0.7
+PENDING_SHARE = 0.15
+
+@dataclass
+class SeedResult:
+    users: int = 0
+    flights: int = 0
+    bookings: int = 0
+    elapsed_seconds: float = 0.0
+
+def _insert(db: Session, model, rows: List[dict]) -> None:
+    for start in range(0, len(rows), IMPORT_BATCH_SIZE):
+        db.execute(insert(model), rows[start:start + IMPORT_BATCH_SIZE])
+
+def _users(count: int, hashed_password: str) -> List[dict]:
+    # bcrypt is deliberately slow, so every account shares one hash
+    rows = [
+        {"id": 1, "email": "admin@example.com", "username": ADMIN_USERNAME, "hashed_password": hashed_password,
+         "role": UserRole.ADMIN, "full_name": "Bench Admin"},
+        {"id": 2, "email": "staff@example.com", "username": STAFF_USERNAME, "hashed_password": hashed_password,
+         "role": UserRole.STAFF, "full_name": "Bench Staff"},
+    ]
+    for number in range(1, count + 1):
+        rows.append({
+            "id": number + 2,
+            "email": f"pax{number}@example.com",
+            "username": f"pax{number}",
+            "hashed_password": hashed_password,
+            "role": UserRole.PASSENGER,
+            "full_name": f"Passenger {number}",
+            "phone": f"+1555{number:07d}",
+        })
+    return rows
+
+def _flights(rng: random.Random, count: int, first_day: datetime, days: int) -> List[dict]:
+    weights = [1 / (rank + 1) for rank in range(len(AIRPORTS))]
+    rows = []
+    for flight_id in range(1, count + 1):
+        origin, destination = rng.choices(AIRPORTS, weights, k=2)
+        while destination == origin:
+            destination = rng.choices(AIRPORTS, weights)[0]
+        departure = first_day + timedelta(minutes=5 * rng.randrange(days * 24 * 12))
+        rows.append({
+            "id": flight_id,
+            "flight_number": f"SY{flight_id:05d}",
+            "airline": rng.choice(AIRLINES),
+            "departure_city": origin,
+            "arrival_city": destination,
+            "departure_time": departure,
+            "arrival_time": departure + timedelta(minutes=5 * rng.randint(9, 150)),
+            "price": float(rng.randint(49, 1200)),
+            "available_seats": rng.choice(CAPACITIES),
+            "is_active": True,
+        })
+    return rows
+
+def seed(db: Session, scale: Scale, seed: int = 42, days: int = 30) -> SeedResult:
+    """
+    Write `scale` worth of synthetic rows into an empty database.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    first_day = datetime.combine(now.date(), datetime.min.time()) + timedelta(days=1)
+    result = SeedResult()
+    start = time.perf_counter()
+
+    users = _users(scale.users, pwd_context.hash(PASSWORD))
+    _insert(db, User, users)
+    result.users = len(users)
+    del users
+
+    flights = _flights(rng, scale.flights, first_day, days)
+    _insert(db, Flight, flights)
+    result.flights = len(flights)
+
+    # Live bookings take seats in cabin order; a cancelled booking names the
+    # next free seat without holding it, so the lazily built seat map and the
+    # inventory agree with the bookings table
+    bitmap = SeatBitmap(1, settings.DEFAULT_CABIN_LAYOUT)
+    held: Dict[int, int] = {flight["id"]: 0 for flight in flights}
+    open_flights = list(flights)
+    batch = []
+    for booking_id in range(1, scale.bookings + 1):
+        if not open_flights:
+            break
+        index = rng.randrange(len(open_flights))
+        flight = open_flights[index]
+        seat_number = bitmap.label(held[flight["id"]])
+        row = {
+            "id": booking_id,
+            "booking_reference": f"SD-{booking_id:08X}",
+            "passenger_id": rng.randint(3, scale.users + 2),
+            "flight_id": flight["id"],
+            "seat_number": seat_number,
+            "payment_amount": flight["price"],
+        }
+        share = rng.random()
+        if share < CONFIRMED_SHARE:
+            row.update(
+                status=BookingStatus.CONFIRMED, payment_status=PaymentStatus.COMPLETED,
+                payment_id=f"PAY-{rng.getrandbits(48):012X}",
+                booking_date=now - timedelta(seconds=rng.randrange(60 * 24 * 3600)),
+            )
+        elif share < CONFIRMED_SHARE + PENDING_SHARE:
+            row.update(
+                status=BookingStatus.PENDING, payment_status=PaymentStatus.PENDING, payment_id=None,
+                booking_date=now - timedelta(seconds=rng.randrange(settings.BOOKING_HOLD_MINUTES * 60)),
+            )
+        else:
+            refunded = rng.random() < 0.5
+            row.update(
+                status=BookingStatus.CANCELLED,
+                payment_status=PaymentStatus.REFUNDED if refunded else PaymentStatus.PENDING,
+                payment_id=f"PAY-{rng.getrandbits(48):012X}" if refunded else None,
+                booking_date=now - timedelta(seconds=rng.randrange(60 * 24 * 3600)),
+            )
+        if row["status"] != BookingStatus.CANCELLED:
+            held[flight["id"]] += 1
+            if held[flight["id"]] == flight["available_seats"]:
+                # Sold out: swap-remove so picking stays O(1)
+                open_flights[index] = open_flights[-1]
+                open_flights.pop()
+        batch.append(row)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            db.execute(insert(Booking), batch)
+            result.bookings += len(batch)
+            batch = []
+    if batch:
+        db.execute(insert(Booking), batch)
+        result.bookings += len(batch)
+
+    # Bulk UPDATE by primary key: one executemany for the remaining inventory
+    db.execute(update(Flight), [
+        {"id": flight["id"], "available_seats": flight["available_seats"] - held[flight["id"]]}
+        for flight in flights
+    ])
+    touch_catalog(db)
+    db.commit()
+
+    stats.reconcile(db)
+    revenue.backfill(db)
+    popular_routes.rebuild(db)
+    catalog_reset()
+    result.elapsed_seconds = time.perf_counter() - start
+    return result
+
+def scale_from_args(args) -> Scale:
+    base = SCALES[args.scale]
+    return Scale(
+        users=args.users if args.users is not None else base.users,
+        flights=args.flights if args.flights is not None else base.flights,
+        bookings=args.bookings if args.bookings is not None else base.bookings,
+    )
+
+def add_scale_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--users", type=int, help="override the preset's passenger count")
+    parser.add_argument("--flights", type=int, help="override the preset's flight count")
+    parser.add_argument("--bookings", type=int, help="override the preset's booking count")
+    parser.add_argument("--days", type=int, default=30, help="days of schedule, starting tomorrow")
+    parser.add_argument("--seed", type=int, default=42)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_scale_arguments(parser)
+    args = parser.parse_args(argv)
+
+    from app.database import Base, SessionLocal, engine
+    import app.models
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        if db.query(User.id).first() is not None:
+            print("The database already has users; seed an empty one")
+            return 2
+        result = seed(db, scale_from_args(args), args.seed, args.days)
+    print(
+        f"Seeded {result.users} users, {result.flights} flights and {result.bookings} bookings "
+        f"in {result.elapsed_seconds:.2f}s"
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+List response serialization benchmark.
+
+Builds --rows flights and --rows bookings (each with its flight and
+passenger loaded) as ORM objects, then times turning them into a response
+body three ways:
+
+  default   FastAPI's response_model path: validate, dump to dicts, json.dumps
+  orjson    the same, rendered by ORJSONResponse (the app's default class)
+  fast      app.utils.serialization: validate and dump to JSON in pydantic-core
+
+and reports the body size with and without gzip.
+
+    python -m benchmarks.serialization_bench --rows 10000 --repeat 5
+"""
+import argparse
+import asyncio
+import gc
+import gzip
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.config import settings
+from app.models.booking import Booking, BookingStatus, PaymentStatus
+from app.models.flight import Flight
+from app.models.user import User, UserRole
+from app.schemas.booking import Booking as BookingSchema
+from app.schemas.flight import Flight as FlightSchema
+from app.utils.serialization import dump_list
+
+def synthetic_rows(rows, seed):
+    rng = random.Random(seed)
+    base = datetime(2030, 1, 1)
+    flights = []
+    for flight_id in range(1, rows + 1):
+        departure = base + timedelta(minutes=rng.randrange(30 * 24 * 60))
+        flights.append(Flight(
+            id=flight_id,
+            flight_number=f"SY{flight_id}",
+            airline=rng.choice(["Alpha", "Bravo", "Charlie"]),
+            departure_city=f"A{rng.randrange(150):03d}",
+            arrival_city=f"A{rng.randrange(150):03d}",
+            departure_time=departure,
+            arrival_time=departure + timedelta(minutes=rng.randint(45, 600)),
+            price=float(rng.randint(50, 900)),
+            available_seats=rng.randint(0, 180),
+            is_active=True,
+        ))
+    bookings = []
+    for booking_id in range(1, rows + 1):
+        passenger = User(
+            id=booking_id,
+            email=f"passenger{booking_id}@example.com",
+            username=f"passenger{booking_id}",
+            full_name=f"Passenger {booking_id}",
+            phone=None,
+            role=UserRole.PASSENGER,
+        )
+        flight = rng.choice(flights)
+        bookings.append(Booking(
+            id=booking_id,
+            booking_reference=f"BK{booking_id:08d}",
+            passenger_id=passenger.id,
+            flight_id=flight.id,
+            booking_date=flight.departure_time - timedelta(days=rng.randint(1, 60)),
+            seat_number=f"{rng.randint(1, 30)}{rng.choice('ABCDEF')}",
+            status=BookingStatus.CONFIRMED,
+            payment_status=PaymentStatus.COMPLETED,
+            payment_id=f"PAY-{booking_id:012d}",
+            payment_amount=flight.price,
+            flight=flight,
+            passenger=passenger,
+        ))
+    return flights, bookings
+
+def time_best(render, repeat):
+    # Like timeit, keep the collector out of the measurement
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            body = render()
+            timings.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return min(timings), statistics.mean(timings), body
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    flights, bookings = synthetic_rows(args.rows, args.seed)
+    loop = asyncio.new_event_loop()
+
+    for label, schema, rows in (("flights", FlightSchema, flights), ("bookings", BookingSchema, bookings)):
+        field = create_response_field(name=f"Response_{label}", type_=List[schema], mode="serialization")
+
+        def via_fastapi(response_class):
+            content = loop.run_until_complete(serialize_response(field=field, response_content=rows))
+            return response_class(content).body
+
+        results = {
+            "default": time_best(lambda: via_fastapi(JSONResponse), args.repeat),
+            "orjson": time_best(lambda: via_fastapi(ORJSONResponse), args.repeat),
+            "fast": time_best(lambda: dump_list(schema, rows), args.repeat),
+        }
+        baseline = results["default"][0]
+        print(f"{args.rows} {label}")
+        for name, (best, mean, body) in results.items():
+            print(
+                f"  {name:<8} best {best * 1000:8.1f}ms  mean {mean * 1000:8.1f}ms  "
+                f"x{baseline / best:5.2f}  {len(body) / 1024:8.0f} KiB"
+            )
+        body = results["fast"][2]
+        start = time.perf_counter()
+        compressed = gzip.compress(body, compresslevel=settings.GZIP_COMPRESS_LEVEL)
+        print(
+            f"  gzip     level {settings.GZIP_COMPRESS_LEVEL}  {(time.perf_counter() - start) * 1000:8.1f}ms  "
+            f"{len(compressed) / 1024:8.0f} KiB ({len(compressed) / len(body):.0%} of body)"
+        )
+
+    loop.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())